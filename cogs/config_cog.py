@@ -1,16 +1,19 @@
 # ==========================================================
 # config_cog.py
 # Descrizione: Cog che gestisce la configurazione dinamica del bot tramite comandi Discord. Permette di visualizzare e modificare i parametri principali (articoli e video correlati, canali, dominio) e di mostrare lo stato attuale tramite embed.
-# Dipendenze principali: discord.ext.commands, logging, json, config/config.json, config/messages.json, utils.youtube_handler.
-# Flusso di lavoro: Caricato all'avvio dal bot principale, espone i comandi !status, !setrelatedarticles e !setrelatedvideos. Interagisce con la configurazione e aggiorna i parametri in tempo reale.
+# Dipendenze principali: discord.ext.commands, discord.ext.tasks, logging, json, config/config.json, config/messages.json, utils.youtube_handler (istanza condivisa), utils.wordpress_handler, utils.ai_handler (istanza condivisa), utils.resilience.
+# Flusso di lavoro: Caricato all'avvio dal bot principale, espone i comandi !status, !setrelatedarticles e !setrelatedvideos. Interagisce con la configurazione e aggiorna i parametri in tempo reale. Aggiorna in background le informazioni del canale YouTube, così che !status risponda sempre dalla cache.
 # ==========================================================
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import logging
 import json
 import os
 from datetime import datetime
-from utils.youtube_handler import YouTubeHandler
+from utils.youtube_handler import get_youtube_handler
+from utils.wordpress_handler import get_wordpress_handler
+from utils.ai_handler import get_ai_handler
+from utils.resilience import get_resilience_policy
 
 class ConfigCog(commands.Cog):
     def __init__(self, bot):
@@ -26,7 +29,35 @@ class ConfigCog(commands.Cog):
             self.messages = json.load(f)
         
         # Inizializza l'handler di YouTube
-        self.youtube_handler = YouTubeHandler()
+        self.youtube_handler = get_youtube_handler()
+        
+        # Intervallo di aggiornamento in background delle informazioni del canale
+        channel_cache_config = self.config['youtube'].get('channel_info_cache', {})
+        self.refresh_channel_info.change_interval(minutes=channel_cache_config.get('refresh_interval_minutes', 15))
+
+    async def cog_load(self):
+        self.refresh_channel_info.start()
+
+    async def cog_unload(self):
+        self.refresh_channel_info.cancel()
+        # Salva la quota YouTube ancora in attesa della scrittura differita
+        if self.youtube_handler.quota is not None:
+            self.youtube_handler.quota.flush()
+
+    @tasks.loop(minutes=15)
+    async def refresh_channel_info(self):
+        """Aggiorna periodicamente le informazioni del canale YouTube mostrate da !status."""
+        success, result = await self.youtube_handler.refresh_channel_info(self.config['youtube']['channel_id'])
+        if not success:
+            self.logger.warning(f"Aggiornamento delle informazioni del canale fallito: {result}")
+
+    def _format_age(self, seconds):
+        """Formatta un'età in secondi in forma leggibile (es. "12 min")."""
+        if seconds < 60:
+            return self.messages["age_seconds"].format(value=int(seconds))
+        if seconds < 3600:
+            return self.messages["age_minutes"].format(value=int(seconds // 60))
+        return self.messages["age_hours"].format(value=int(seconds // 3600))
 
     def _backup_config(self):
         """Crea un backup del file di configurazione."""
@@ -149,6 +180,7 @@ class ConfigCog(commands.Cog):
                 channel_name = "Errore nel recupero"
             else:
                 channel_name = channel_info['title']
+            channel_age = self.youtube_handler.channel_info_age(channel_id)
             
             # Prepara il dominio WordPress senza https://
             wp_domain_full = self.config['wordpress']['domain']
@@ -171,7 +203,10 @@ class ConfigCog(commands.Cog):
             )
             embed.add_field(
                 name=self.messages["status_field_youtube"],
-                value=f"[{channel_name}](https://www.youtube.com/channel/{channel_id})",
+                value=f"[{channel_name}](https://www.youtube.com/channel/{channel_id})" + (
+                    "\n" + self.messages["status_youtube_cache_age"].format(age=self._format_age(channel_age))
+                    if channel_age is not None else ""
+                ),
                 inline=False
             )
             embed.add_field(
@@ -179,6 +214,114 @@ class ConfigCog(commands.Cog):
                 value=f"[{wp_domain_clean}]({wp_domain_full})",
                 inline=False
             )
+            cache_stats = get_wordpress_handler().cache_stats()
+            embed.add_field(
+                name=self.messages["status_field_wp_cache"],
+                value=self.messages["status_wp_cache"].format(
+                    entries=cache_stats['entries'],
+                    hits=cache_stats['hits'],
+                    misses=cache_stats['misses'],
+                    hit_rate=cache_stats['hit_rate'] * 100
+                ),
+                inline=False
+            )
+            quota_stats = self.youtube_handler.quota_stats()
+            if quota_stats is not None:
+                embed.add_field(
+                    name=self.messages["status_field_youtube_quota"],
+                    value=self.messages["status_youtube_quota"].format(
+                        used=quota_stats['used'],
+                        limit=quota_stats['daily_limit'],
+                        percent=quota_stats['used'] / quota_stats['daily_limit'] * 100 if quota_stats['daily_limit'] else 0,
+                        reset=self._format_age(quota_stats['reset_in'])
+                    ),
+                    inline=False
+                )
+            http_stats = get_wordpress_handler().http_cache_stats()
+            if http_stats is not None:
+                embed.add_field(
+                    name=self.messages["status_field_http_cache"],
+                    value=self.messages["status_http_cache"].format(
+                        entries=http_stats['entries'],
+                        revalidated=http_stats['revalidated'],
+                        saved_mb=http_stats['bytes_saved'] / 1_000_000
+                    ),
+                    inline=False
+                )
+            queue_stats = get_ai_handler().scheduler_stats()
+            embed.add_field(
+                name=self.messages["status_field_ai_queue"],
+                value=self.messages["status_ai_queue"].format(
+                    in_flight=queue_stats['in_flight'],
+                    max_in_flight=queue_stats['max_in_flight'],
+                    queued=queue_stats['queued'],
+                    users=queue_stats['users_waiting'],
+                    avg_wait=queue_stats['avg_wait'],
+                    max_wait=queue_stats['max_wait'],
+                    tokens=queue_stats['tokens_last_minute'],
+                    tpm=queue_stats['tokens_per_minute'] or "∞"
+                ),
+                inline=False
+            )
+            router_stats = get_ai_handler().model_router_stats()
+            if router_stats is not None:
+                embed.add_field(
+                    name=self.messages["status_field_ai_models"],
+                    value="\n".join(
+                        self.messages["status_ai_model"].format(
+                            model=model,
+                            choices=stats['choices'],
+                            first_token=stats['first_token'],
+                            per_1k=stats['seconds_per_1k_output'],
+                            samples=stats['samples']
+                        )
+                        for model, stats in sorted(router_stats.items())
+                    ),
+                    inline=False
+                )
+            ai_cache_stats = get_ai_handler().completion_cache_stats()
+            if ai_cache_stats is not None:
+                embed.add_field(
+                    name=self.messages["status_field_ai_cache"],
+                    value=self.messages["status_ai_cache"].format(
+                        entries=ai_cache_stats['entries'],
+                        size_mb=ai_cache_stats['bytes'] / 1_000_000,
+                        max_mb=ai_cache_stats['max_bytes'] / 1_000_000,
+                        hits=ai_cache_stats['hits'],
+                        misses=ai_cache_stats['misses'],
+                        hit_rate=ai_cache_stats['hit_rate'] * 100
+                    ),
+                    inline=False
+                )
+            connection_stats = get_ai_handler().connection_stats()
+            embed.add_field(
+                name=self.messages["status_field_ai_connections"],
+                value=self.messages["status_ai_connections"].format(
+                    requests=connection_stats['requests'],
+                    reused=connection_stats['reused'],
+                    reuse_rate=connection_stats['reuse_rate'] * 100,
+                    new=connection_stats['new_connections'],
+                    avg_connect_ms=connection_stats['avg_connect'] * 1000,
+                    protocol="HTTP/2" if connection_stats['http2'] else "HTTP/1.1",
+                    warmups=connection_stats['warmups']
+                ),
+                inline=False
+            )
+            breaker_stats = get_resilience_policy().stats()
+            if breaker_stats:
+                embed.add_field(
+                    name=self.messages["status_field_circuits"],
+                    value="\n".join(
+                        self.messages["status_circuit"].format(
+                            endpoint=endpoint,
+                            state=stats['state'],
+                            failures=stats['failures'],
+                            successes=stats['successes']
+                        )
+                        for endpoint, stats in sorted(breaker_stats.items())
+                    ),
+                    inline=False
+                )
             await ctx.send(embed=embed)
             self.logger.info("Stato del bot inviato con successo (embed)")
             
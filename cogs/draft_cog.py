@@ -1,29 +1,35 @@
 # ==========================================================
 # draft_cog.py
-# Descrizione: Cog che gestisce la generazione di articoli tramite AI, la ricerca e l'inserimento di articoli e video correlati, e la creazione di draft su WordPress. Espone il comando !draft e la ricarica dei prompt.
-# Dipendenze principali: discord.ext.commands, cloudscraper, utils.ai_handler, utils.wordpress_handler, utils.youtube_handler, utils.command_utils, config/config.json, config/messages.json, logging, asyncio, re, os.
-# Flusso di lavoro: Caricato all'avvio dal bot principale, espone il comando !draft e !reloadprompts. Interagisce con l'AI, WordPress e YouTube per generare contenuti e suggerimenti.
+# Descrizione: Cog che gestisce la generazione di articoli tramite AI (con sintesi preliminare del materiale di riferimento troppo lungo), la ricerca e l'inserimento di articoli e video correlati, e la creazione di draft su WordPress (anche in blocco, da più file .txt o da un archivio .zip). Espone il comando !draft (con l'opzione --rigenera per ignorare la cache dell'AI) e la ricarica dei prompt.
+# Dipendenze principali: discord.ext.commands, discord.ext.tasks, cloudscraper, utils.ai_handler (istanza condivisa), utils.wordpress_handler (istanza condivisa), utils.youtube_handler (istanza condivisa), utils.related_content, utils.article_stream, utils.gutenberg, utils.keyword_extractor, utils.command_utils, utils.discord_progress, config/config.json, config/messages.json, logging, asyncio, os.
+# Flusso di lavoro: Caricato all'avvio dal bot principale, espone il comando !draft e !reloadprompts. Interagisce con l'AI, WordPress e YouTube per generare contenuti e suggerimenti. Sincronizza periodicamente il catalogo locale dei video del canale e ricarica i prompt quando il file viene modificato.
 # ==========================================================
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import cloudscraper
-from utils.ai_handler import AIHandler
-from utils.wordpress_handler import WordPressHandler
-from utils.youtube_handler import YouTubeHandler
-from utils.command_utils import extract_command_argument
+from utils.ai_handler import get_ai_handler
+from utils.wordpress_handler import get_wordpress_handler
+from utils.youtube_handler import get_youtube_handler
+from utils.command_utils import extract_command_argument, extract_attachment_files, is_bulk_attachment_request, split_flag, REGENERATE_FLAG
+from utils.discord_progress import ProgressMessage
+from utils.related_content import RelatedContentResolver
+from utils.text_utils import strip_html
+from utils.article_stream import ArticleStream
+from utils.gutenberg import link_list_section
+from utils.keyword_extractor import extract_keywords, keyword_overlap
 import logging
 import os
 import asyncio
-import re
 import json
+import html
 
 class DraftCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.scraper = cloudscraper.create_scraper()
-        self.ai_handler = AIHandler()
-        self.wp_handler = WordPressHandler()
-        self.youtube_handler = YouTubeHandler()
+        self.ai_handler = get_ai_handler()
+        self.wp_handler = get_wordpress_handler()
+        self.youtube_handler = get_youtube_handler()
         self.logger = logging.getLogger(__name__)
         
         # Carica le configurazioni
@@ -37,6 +43,78 @@ class DraftCog(commands.Cog):
         # Estrai i limiti per i contenuti correlati
         self.max_articles = self.config['commands']['draft']['related_content']['max_articles']
         self.max_videos = self.config['commands']['draft']['related_content']['max_videos']
+        
+        # Limiti della modalità bozze in blocco
+        bulk_config = self.config['commands']['draft'].get('bulk', {})
+        self.bulk_max_files = bulk_config.get('max_files', 30)
+        self.bulk_max_workers = bulk_config.get('max_workers', 3)
+        self.bulk_max_file_size = bulk_config.get('max_file_size', 1000000)
+        self.progress_edit_interval = self.config['discord'].get('progress_edit_interval', 3.0)
+        
+        # Ranking per rilevanza degli articoli correlati
+        ranking_config = self.config['commands']['draft']['related_content'].get('ranking', {})
+        self.ranking_enabled = ranking_config.get('enabled', True)
+        self.related_resolver = RelatedContentResolver(
+            self.wp_handler,
+            candidates_per_keyword=ranking_config.get('candidates_per_keyword', 10),
+            max_candidates=ranking_config.get('max_candidates', 40)
+        )
+        
+        # Ricerca anticipata dei contenuti correlati con keywords estratte in locale, durante la generazione
+        prefetch_config = self.config['commands']['draft']['related_content'].get('prefetch', {})
+        self.prefetch_enabled = prefetch_config.get('enabled', True)
+        self.prefetch_max_keywords = prefetch_config.get('max_keywords', 5)
+        self.prefetch_min_overlap = prefetch_config.get('min_overlap', 0.5)
+        self.prefetch_youtube_api = prefetch_config.get('youtube_api', False)
+        
+        # Intervallo di controllo delle modifiche al file dei prompt
+        self.watch_prompts.change_interval(seconds=self.config['ai'].get('prompts_reload_interval', 5))
+        
+        # Intervallo di sincronizzazione del catalogo locale dei video
+        catalog_config = self.config['youtube'].get('catalog', {})
+        self.sync_video_catalog.change_interval(minutes=catalog_config.get('sync_interval_minutes', 360))
+        
+        # Warm-up delle connessioni verso l'API AI: all'avvio e poi periodicamente, prima che scada il keep-alive
+        warmup_config = self.config['ai'].get('http', {}).get('warmup', {})
+        self.warmup_enabled = warmup_config.get('enabled', True)
+        self.warm_up_ai.change_interval(minutes=warmup_config.get('interval_minutes', 4))
+
+    async def cog_load(self):
+        self.watch_prompts.start()
+        if self.youtube_handler.video_catalog is not None:
+            self.sync_video_catalog.start()
+        if self.warmup_enabled:
+            self.warm_up_ai.start()
+
+    async def cog_unload(self):
+        self.watch_prompts.cancel()
+        self.sync_video_catalog.cancel()
+        self.warm_up_ai.cancel()
+        # Salva la quota YouTube ancora in attesa della scrittura differita
+        if self.youtube_handler.quota is not None:
+            self.youtube_handler.quota.flush()
+
+    @tasks.loop(seconds=5)
+    async def watch_prompts(self):
+        """Ricarica i prompt quando il file config/prompts.json viene modificato."""
+        result = await self.ai_handler.reload_prompts_if_changed()
+        if result is not None and not result[0]:
+            self.logger.error(f"Prompt modificati ma non validi, resta in uso la versione precedente: {result[1]}")
+
+    @tasks.loop(minutes=360)
+    async def sync_video_catalog(self):
+        """Sincronizza periodicamente il catalogo locale dei video del canale YouTube."""
+        success, result = await self.youtube_handler.sync_video_catalog()
+        if not success:
+            self.logger.error(f"Sincronizzazione del catalogo video fallita: {result}")
+
+    @tasks.loop(minutes=4)
+    async def warm_up_ai(self):
+        """Mantiene aperte le connessioni verso l'API AI, così che il prossimo !draft non attenda la connessione."""
+        # Con generazioni in corso le connessioni sono già attive
+        if self.ai_handler.scheduler.in_flight:
+            return
+        await self.ai_handler.warm_up()
 
     @commands.command(name="reloadprompts")
     async def reload_prompts(self, ctx):
@@ -52,108 +130,404 @@ class DraftCog(commands.Cog):
     async def draft(self, ctx, *, content=None):
         self.logger.info(f"Comando !draft ricevuto da {ctx.author}")
         
+        # --rigenera: ignora gli articoli salvati nella cache dell'AI
+        regenerate, _ = split_flag(ctx.message.content, REGENERATE_FLAG)
+        
+        # Più file .txt o un archivio .zip: modalità bozze in blocco
+        if is_bulk_attachment_request(ctx.message):
+            await self.bulk_draft(ctx, regenerate=regenerate)
+            return
+        
         # Usa la funzione centralizzata per estrarre l'argomento
         success, content = await extract_command_argument(ctx)
+        if success:
+            _, content = split_flag(content, REGENERATE_FLAG)
         if not success or not content or not content.strip():
             await ctx.send(self.messages["draft_missing_input"])
             self.logger.info("Nessun argomento o allegato fornito: richiesta non inviata all'AI.")
             return
 
-        # Invia il messaggio di elaborazione
+        # Invia il messaggio di elaborazione, aggiornato con l'avanzamento al massimo una volta ogni intervallo
         processing_msg = await ctx.send(self.messages["draft_processing"])
+        progress = ProgressMessage(processing_msg, min_interval=self.progress_edit_interval)
+        notes = []
+        preview = []
+        queue_line = []
+        
+        def render_progress():
+            return "\n".join([self.messages["draft_processing"], *queue_line, *notes, *preview])
+        
+        def on_queue(position):
+            # Posizione nella coda globale delle generazioni (0 = generazione avviata)
+            queue_line[:] = [self.messages["draft_queue_position"].format(position=position)] if position else []
+            progress.update(render_progress())
+        
+        async def notify(text):
+            notes.append(text)
+            progress.update(render_progress())
+        
+        def on_progress(article):
+            # Anteprima della generazione: caratteri scritti e ultima sezione completata
+            preview[:] = [self.messages["draft_stream_progress"].format(
+                chars=len(article), sections=len(article.sections)
+            )]
+            if article.sections:
+                preview.append(self.messages["draft_stream_section"].format(section=article.sections[-1]))
+            progress.update(render_progress())
+        
+        def on_condense(stage, done, total):
+            # Avanzamento della sintesi del materiale di riferimento troppo lungo
+            if stage == "map":
+                preview[:] = [self.messages["draft_condense_map"].format(done=done, total=total)]
+            else:
+                preview[:] = [self.messages["draft_condense_reduce"]]
+            progress.update(render_progress())
         
         try:
-            # Genera l'articolo usando l'AI
-            self.logger.debug(f"Inizio generazione articolo con content: {content[:100]}...")
-            generated_content = await self.ai_handler.generate_article("", content)
-            self.logger.info("Articolo generato con successo")
+            success, message, url = await self.generate_and_publish(
+                content, notify=notify, on_progress=on_progress, on_condense=on_condense,
+                use_cache=not regenerate, user=ctx.author.id, on_queue=on_queue
+            )
+            
+            if success:
+                await progress.finish(f"{self.messages['draft_success']} Puoi visualizzarlo qui: {url}")
+                self.logger.info(f"Draft creato con successo: {url}")
+            else:
+                await progress.finish(f"❌ {message}")
+                self.logger.error(f"Errore durante la creazione del draft: {message}")
 
-            # Estrai le keywords dal blocco SEO
-            keywords_match = re.search(r'<!-- KEYWORDS -->\n(.*?)\n\n<!-- META DESCRIPTION -->', generated_content, re.DOTALL)
-            self.logger.info(f"Pattern di ricerca keywords: <!-- KEYWORDS -->\n(.*?)\n\n<!-- META DESCRIPTION -->")
-            self.logger.info(f"Contenuto generato: {generated_content[:500]}...")  # Log dei primi 500 caratteri
+        except Exception as e:
+            error_msg = self.messages["draft_ai_error"].format(error=str(e))
+            self.logger.error(f"{error_msg}\nStack trace:", exc_info=True)
+            await progress.finish(error_msg)
+
+    async def bulk_draft(self, ctx, regenerate=False):
+        """
+        Genera una bozza per ogni file .txt allegato (o contenuto in un archivio .zip),
+        con un numero limitato di generazioni contemporanee e un unico messaggio di avanzamento.
+        Con regenerate=True gli articoli salvati nella cache dell'AI vengono ignorati.
+        """
+        success, files = await extract_attachment_files(
+            ctx.message,
+            max_files=self.bulk_max_files,
+            max_file_size=self.bulk_max_file_size
+        )
+        if not success:
+            await ctx.send(files)
+            return
+        
+        total = len(files)
+        self.logger.info(f"Bozze in blocco: {total} file ricevuti da {ctx.author}")
+        processing_msg = await ctx.send(self.messages["draft_bulk_started"].format(
+            count=total, workers=self.bulk_max_workers
+        ))
+        progress = ProgressMessage(processing_msg, min_interval=self.progress_edit_interval)
+        
+        semaphore = asyncio.Semaphore(self.bulk_max_workers)
+        running = []
+        results = {}
+        
+        def render_progress():
+            succeeded = sum(1 for ok, _ in results.values() if ok)
+            return self.messages["draft_bulk_progress"].format(
+                done=len(results),
+                total=total,
+                succeeded=succeeded,
+                failed=len(results) - succeeded,
+                running=", ".join(running) or "-"
+            )
+        
+        async def process(index, filename, content):
+            async with semaphore:
+                running.append(filename)
+                progress.update(render_progress())
+                try:
+                    ok, message, url = await self.generate_and_publish(
+                        content, use_cache=not regenerate, user=ctx.author.id
+                    )
+                    results[index] = (ok, url if ok else message)
+                except Exception as e:
+                    self.logger.error(f"Errore nella generazione della bozza per {filename}: {str(e)}", exc_info=True)
+                    results[index] = (False, str(e))
+                finally:
+                    running.remove(filename)
+                    progress.update(render_progress())
+        
+        await asyncio.gather(*(process(index, filename, content) for index, (filename, content) in enumerate(files)))
+        
+        # Riepilogo finale: URL delle bozze create ed errori, in ordine di invio
+        succeeded = sum(1 for ok, _ in results.values() if ok)
+        await progress.finish(self.messages["draft_bulk_summary"].format(
+            succeeded=succeeded, failed=total - succeeded, total=total
+        ))
+        lines = []
+        for index, (filename, _) in enumerate(files):
+            ok, detail = results[index]
+            if ok:
+                lines.append(self.messages["draft_bulk_item_success"].format(filename=filename, url=detail))
+            else:
+                lines.append(self.messages["draft_bulk_item_failure"].format(filename=filename, error=detail))
+        for chunk in self._split_message("\n".join(lines)):
+            await ctx.send(chunk)
+        self.logger.info(f"Bozze in blocco completate: {succeeded}/{total} create")
+
+    def _split_message(self, text):
+        """Suddivide un testo in blocchi di righe che rispettano il limite di caratteri di Discord."""
+        limit = self.config['discord']['message_limit']
+        chunks = []
+        current = ""
+        for line in text.split("\n"):
+            line = line[:limit]
+            if current and len(current) + len(line) + 1 > limit:
+                chunks.append(current)
+                current = line
+            else:
+                current = f"{current}\n{line}" if current else line
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def generate_and_publish(self, content, notify=None, on_progress=None, on_condense=None,
+                                   use_cache=True, user=None, on_queue=None):
+        """
+        Esegue l'intera pipeline per un contenuto: generazione AI, contenuti correlati e creazione della bozza.
+        L'articolo viene generato in streaming. La ricerca dei contenuti correlati parte subito in modo
+        speculativo, con keywords estratte in locale dal materiale di riferimento, e viene completata appena
+        il blocco SEO contiene le keywords dell'AI, mentre la generazione prosegue. Sintesi del materiale e generazione occupano
+        uno slot dello scheduler globale dell'AI, liberato appena termina lo streaming.
+        
+        Args:
+            content (str): Il materiale di riferimento per l'articolo
+            notify (callable, optional): Coroutine chiamata con i messaggi di avanzamento per l'utente
+            on_progress (callable, optional): Funzione chiamata con l'ArticleStream a ogni frammento generato
+            on_condense (callable, optional): Funzione chiamata con (fase, completate, totale) durante la
+                sintesi del materiale di riferimento troppo lungo
+            use_cache (bool, optional): Se False ignora gli articoli e i riassunti salvati nella cache dell'AI
+            user (optional): Identificativo dell'utente, per il turno equo nella coda delle generazioni
+            on_queue (callable, optional): Funzione chiamata con la posizione nella coda delle generazioni
+                quando cambia (0 = generazione avviata)
+            
+        Returns:
+            tuple: (success, message, url) come restituito da WordPressHandler.create_draft
+            
+        Raises:
+            Exception: Se la generazione dell'articolo fallisce
+        """
+        # Genera l'articolo usando l'AI, in streaming
+        self.logger.debug(f"Inizio generazione articolo con content: {content[:100]}...")
+        
+        article = ArticleStream()
+        related_task = None
+        prefetch = asyncio.create_task(self._prefetch_related(content)) if self.prefetch_enabled else None
+        try:
+            # Sintesi e generazione attendono il proprio turno nella coda globale delle generazioni
+            job_tokens = await self.ai_handler.estimate_job_tokens("", content)
+            async with self.ai_handler.scheduler.slot(user, job_tokens, on_position=on_queue):
+                # Materiale troppo lungo per il prompt: riassunti delle parti in parallelo, poi un'unica sintesi
+                reference = await self.ai_handler.condense_reference("", content, on_progress=on_condense, use_cache=use_cache)
+                if reference is not content and notify:
+                    await notify(self.messages['draft_condensed'].format(
+                        original=await self.ai_handler.count_tokens(content),
+                        condensed=await self.ai_handler.count_tokens(reference)
+                    ))
+                
+                async for delta in self.ai_handler.stream_article("", reference, use_cache=use_cache):
+                    article.feed(delta)
+                    if on_progress:
+                        on_progress(article)
+                    if related_task is None and article.keywords_ready:
+                        self.logger.info(f"Keywords disponibili durante la generazione: {article.keywords}")
+                        related_task = asyncio.create_task(
+                            self._find_related_content(article.keywords, article.body, notify, prefetch)
+                        )
+            article.close()
+            generated_content = article.text
+            self.logger.info("Articolo generato con successo")
             
-            if keywords_match:
-                keywords_text = keywords_match.group(1)
-                self.logger.info(f"Testo keywords trovato: {keywords_text}")
-                # Estrai le keywords (rimuovi i trattini e gli spazi)
-                keywords = [k.strip('- ').strip() for k in keywords_text.split('\n') if k.strip()]
-                self.logger.info(f"Keywords estratte: {keywords}")
-
-                # Cerca articoli correlati per ogni keyword
-                related_articles = []
-                for keyword in keywords:
-                    self.logger.info(f"Cercando articoli per keyword: {keyword}")
-                    success, results = await self.wp_handler.search_docs(keyword)
-                    if success and isinstance(results, list):
-                        self.logger.info(f"Trovati {len(results)} risultati per '{keyword}'")
-                        # Aggiungi i risultati alla lista, evitando duplicati
-                        for result in results:
-                            if result not in related_articles:
-                                related_articles.append(result)
-                                if len(related_articles) >= self.max_articles:
-                                    break
-                    if len(related_articles) >= self.max_articles:
-                        break
-
-                # Cerca video correlati
-                self.logger.info(f"Cercando video per keywords: {keywords}")
-                success, videos = await self.youtube_handler.search_videos(keywords, max_results=self.max_videos)
-                if success and videos:
-                    self.logger.info(f"Trovati {len(videos)} video correlati")
-                    await processing_msg.edit(content=f"{processing_msg.content}\n{self.messages['draft_related_videos_found'].format(count=len(videos))}")
+            # Blocco SEO completato solo a fine generazione (meta description senza chiusura): ultimo tentativo
+            if related_task is None:
+                keywords = article.keywords
+                if keywords:
+                    related_task = asyncio.create_task(
+                        self._find_related_content(keywords, article.body, notify, prefetch)
+                    )
                 else:
-                    self.logger.info("Nessun video correlato trovato")
-                    await processing_msg.edit(content=f"{processing_msg.content}\n{self.messages['draft_no_related_videos']}")
-
-                # Aggiungi la sezione "Articoli correlati" all'articolo
+                    self.logger.info("Blocco keywords non trovato nell'articolo generato")
+            
+            if related_task is not None:
+                related_articles, videos = await related_task
+                
+                sections = []
                 if related_articles:
-                    related_section = "\n\n<!-- wp:heading -->\n<h2>Articoli correlati</h2>\n<!-- /wp:heading -->\n\n<!-- wp:list -->\n<ul>"
-                    for article in related_articles[:self.max_articles]:  # Usa il limite dalla configurazione
-                        title = re.sub('<[^<]+?>', '', article['title'])  # Rimuovi tag HTML
-                        related_section += f"\n<li><a href=\"{article['link']}\">{title}</a></li>"
-                    related_section += "\n</ul>\n<!-- /wp:list -->"
-                    
-                    # Inserisci la sezione prima del blocco SEO
-                    generated_content = generated_content.replace('<!-- wp:html -->', f"{related_section}\n\n<!-- wp:html -->")
+                    # Il titolo è già testo semplice
+                    links = [(info['link'], html.escape(info['title'])) for info in related_articles[:self.max_articles]]
+                    sections.append(link_list_section("Articoli correlati", links))
                     self.logger.info(f"Aggiunti {len(related_articles)} articoli correlati")
-
-                # Aggiungi la sezione "Video correlati" se ci sono video
-                if success and videos:
-                    videos_section = "\n\n<!-- wp:heading -->\n<h2>Video correlati</h2>\n<!-- /wp:heading -->\n\n<!-- wp:list -->\n<ul>"
-                    for video in videos[:self.max_videos]:  # Usa il limite dalla configurazione
-                        videos_section += f"\n<li><a href=\"{video['url']}\">{video['title']}</a></li>"
-                    videos_section += "\n</ul>\n<!-- /wp:list -->"
-                    
-                    # Inserisci la sezione prima del blocco SEO
-                    generated_content = generated_content.replace('<!-- wp:html -->', f"{videos_section}\n\n<!-- wp:html -->")
+                if videos:
+                    # Anche i titoli dei video sono testo semplice (API o catalogo locale)
+                    links = [(video['url'], html.escape(video['title'])) for video in videos[:self.max_videos]]
+                    sections.append(link_list_section("Video correlati", links))
                     self.logger.info(f"Aggiunti {len(videos)} video correlati")
+                
+                # Sezioni inserite una sola volta prima del blocco SEO, nella posizione trovata durante lo streaming
+                generated_content = article.insert_before_seo(sections)
+        finally:
+            # Generazione fallita: la ricerca dei contenuti correlati non serve più
+            if related_task is not None and not related_task.done():
+                related_task.cancel()
+            if prefetch is not None and not prefetch.done():
+                prefetch.cancel()
 
-            # Estrai il titolo dal primo header <h1> o <h2>
-            match = re.search(r'<h1>(.*?)</h1>|<h2>(.*?)</h2>', generated_content, re.IGNORECASE)
-            if match:
-                title = match.group(1) if match.group(1) else match.group(2)
-            else:
-                title = content.split('\n')[0][:100]  # Usa la prima riga come titolo, massimo 100 caratteri
-                if not title:
-                    title = "Nuovo articolo"  # Titolo di default se non c'è contenuto
+        # Titolo dal primo header <h1> o <h2>, riconosciuto durante lo streaming
+        title = article.title
+        if not title:
+            title = content.split('\n')[0][:100]  # Usa la prima riga come titolo, massimo 100 caratteri
+            if not title:
+                title = "Nuovo articolo"  # Titolo di default se non c'è contenuto
+        
+        self.logger.debug(f"Titolo estratto: {title}")
+        if article.meta_description:
+            self.logger.debug(f"Meta description: {article.meta_description}")
+
+        # Crea il draft
+        return await self.wp_handler.create_draft(title=title, content=generated_content)
+
+    def _video_search_uses_api(self):
+        """True se la ricerca dei video userebbe l'API YouTube (catalogo locale assente o non aggiornato)."""
+        catalog = self.youtube_handler.video_catalog
+        return catalog is None or catalog.is_stale()
+
+    async def _search_videos(self, keywords):
+        """Cerca i video correlati per le keywords, scegliendo i migliori se è attivo l'arricchimento."""
+        self.logger.info(f"Cercando video per keywords: {keywords}")
+        if self.youtube_handler.enrichment_enabled:
+            # Più candidati, poi i migliori per rilevanza, visualizzazioni e recenza
+            candidates = max(self.max_videos, self.youtube_handler.enrichment_candidates)
+            success, result = await self.youtube_handler.search_videos(keywords, max_results=candidates)
+            return await self.youtube_handler.select_best_videos(result, self.max_videos) if success else []
+        success, result = await self.youtube_handler.search_videos(keywords, max_results=self.max_videos)
+        return result if success else []
+
+    async def _prefetch_related(self, content):
+        """
+        Ricerca anticipata (speculativa) dei contenuti correlati, eseguita mentre l'AI genera l'articolo,
+        con keywords estratte in locale dal materiale di riferimento. La ricerca dei video con l'API YouTube
+        (che consuma quota) viene anticipata solo se abilitata da prefetch.youtube_api.
+        
+        Args:
+            content (str): Il materiale di riferimento
+            
+        Returns:
+            dict: keywords locali, candidati per gli articoli e video trovati (None dove la ricerca non
+                è stata anticipata), oppure None se non è stato possibile estrarre keywords
+        """
+        try:
+            stats = await self.wp_handler.get_term_statistics()
+            keywords = await asyncio.to_thread(extract_keywords, str(content), self.prefetch_max_keywords, stats=stats)
+            if not keywords:
+                return None
+            self.logger.info(f"Ricerca anticipata dei contenuti correlati con keywords locali: {keywords}")
+            
+            async def collect_articles():
+                # Senza ranking i risultati dipendono dalle keywords esatte: si attendono quelle dell'AI
+                if not self.ranking_enabled:
+                    return None
+                candidates, _ = await self.related_resolver.collect(
+                    keywords, self.related_resolver.candidates_per_keyword, self.related_resolver.max_candidates
+                )
+                return candidates
+            
+            async def search_videos():
+                if not self.youtube_handler.video_search_available():
+                    return None
+                if self._video_search_uses_api() and not self.prefetch_youtube_api:
+                    return None
+                return await self._search_videos(keywords)
             
-            self.logger.debug(f"Titolo estratto: {title}")
+            candidates, videos = await asyncio.gather(collect_articles(), search_videos())
+            return {'keywords': keywords, 'candidates': candidates, 'videos': videos}
+        except Exception as e:
+            self.logger.warning(f"Ricerca anticipata dei contenuti correlati fallita: {str(e)}")
+            return None
 
-            # Crea il draft
-            success, message, url = await self.wp_handler.create_draft(title=title, content=generated_content)
+    async def _find_related_content(self, keywords, reference_html, notify=None, prefetch=None):
+        """
+        Cerca articoli e video correlati per le keywords dell'articolo. Se è disponibile la ricerca
+        anticipata, i suoi risultati vengono riconciliati con le keywords dell'AI: si cercano solo le
+        keywords non coperte da quelle locali e tutti i candidati vengono ordinati rispetto all'articolo.
+        
+        Args:
+            keywords (list): Le keywords estratte dal blocco SEO
+            reference_html (str): Il testo dell'articolo (HTML) usato per il ranking degli articoli
+            notify (callable, optional): Coroutine chiamata con i messaggi di avanzamento per l'utente
+            prefetch (asyncio.Task, optional): La ricerca anticipata avviata con _prefetch_related
             
-            if success:
-                await processing_msg.edit(content=f"{self.messages['draft_success']} Puoi visualizzarlo qui: {url}")
-                self.logger.info(f"Draft creato con successo: {url}")
-            else:
-                await processing_msg.edit(content=f"❌ {message}")
-                self.logger.error(f"Errore durante la creazione del draft: {message}")
+        Returns:
+            tuple: (related_articles, videos)
+        """
+        self.logger.info(f"Keywords estratte: {keywords}")
+        
+        speculative = await prefetch if prefetch is not None else None
+        covered = []
+        if speculative:
+            covered = keyword_overlap(keywords, speculative['keywords'])
+            self.logger.info(
+                f"Ricerca anticipata: {len(covered)}/{len(keywords)} keywords dell'AI coperte "
+                f"dalle keywords locali {speculative['keywords']}"
+            )
 
-        except Exception as e:
-            error_msg = self.messages["draft_ai_error"].format(error=str(e))
-            self.logger.error(f"{error_msg}\nStack trace:", exc_info=True)
-            await processing_msg.edit(content=error_msg)
+        # Cerca articoli correlati per tutte le keywords in parallelo e
+        # scegli i più rilevanti rispetto al testo dell'articolo generato
+        reference_text = strip_html(reference_html) if self.ranking_enabled else None
+        if speculative and speculative['candidates'] is not None:
+            candidates = speculative['candidates']
+            missing = [keyword for keyword in keywords if keyword not in covered]
+            if missing:
+                extra, _ = await self.related_resolver.collect(
+                    missing, self.related_resolver.candidates_per_keyword, self.related_resolver.max_candidates
+                )
+                seen = {candidate['id'] if candidate.get('id') is not None else candidate['link'] for candidate in candidates}
+                candidates = candidates + [
+                    candidate for candidate in extra
+                    if (candidate['id'] if candidate.get('id') is not None else candidate['link']) not in seen
+                ]
+            related_articles = await self.related_resolver.rank(reference_text, candidates, self.max_articles) if candidates else []
+        else:
+            related_articles, timings = await self.related_resolver.resolve(
+                keywords, self.max_articles, reference_text=reference_text
+            )
+            if timings:
+                # Dettaglio per keyword già registrato dal resolver: qui solo la ricerca più lenta
+                slowest = max(timings, key=lambda keyword: timings[keyword]['seconds'])
+                self.logger.debug(
+                    f"Ricerca articoli correlati su {len(timings)} keyword, la più lenta '{slowest}' "
+                    f"in {timings[slowest]['seconds'] * 1000:.0f} ms"
+                )
+
+        # Cerca video correlati (sezione saltata se la quota YouTube è quasi esaurita)
+        videos = []
+        skip_videos = not self.youtube_handler.video_search_available()
+        if skip_videos:
+            self.logger.warning("Quota YouTube quasi esaurita: sezione video correlati saltata")
+            if notify:
+                await notify(self.messages['draft_videos_skipped_quota'])
+        elif (speculative and speculative['videos'] is not None and self._video_search_uses_api()
+              and len(covered) >= self.prefetch_min_overlap * len(keywords)):
+            # Keywords abbastanza simili: si riusano i video della ricerca anticipata senza consumare altra quota
+            self.logger.info("Uso i video della ricerca anticipata")
+            videos = speculative['videos']
+        else:
+            videos = await self._search_videos(keywords)
+        if videos:
+            self.logger.info(f"Trovati {len(videos)} video correlati")
+            if notify:
+                await notify(self.messages['draft_related_videos_found'].format(count=len(videos)))
+        elif not skip_videos:
+            self.logger.info("Nessun video correlato trovato")
+            if notify:
+                await notify(self.messages['draft_no_related_videos'])
+
+        return related_articles, videos
 
 async def setup(bot):
     await bot.add_cog(DraftCog(bot))
\ No newline at end of file
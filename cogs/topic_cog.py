@@ -1,22 +1,20 @@
 # ==========================================================
 # topic_cog.py
 # Descrizione: Cog che gestisce la ricerca di documenti/articoli tramite il comando !topic, creando thread Discord dedicati e mostrando i risultati tramite embed.
-# Dipendenze principali: discord.ext.commands, utils.wordpress_handler, utils.command_utils, config/config.json, config/messages.json, logging, html, re.
-# Flusso di lavoro: Caricato all'avvio dal bot principale, espone il comando !topic. Interagisce con WordPress per la ricerca e con Discord per la creazione di thread e la visualizzazione dei risultati.
+# Dipendenze principali: discord.ext.commands, discord.ext.tasks, utils.wordpress_handler (istanza condivisa), utils.command_utils, config/config.json, config/messages.json, logging.
+# Flusso di lavoro: Caricato all'avvio dal bot principale, espone il comando !topic. Interagisce con WordPress per la ricerca e con Discord per la creazione di thread e la visualizzazione dei risultati. Sincronizza periodicamente l'indice locale dei documenti.
 # ==========================================================
 import discord
-from discord.ext import commands
-from utils.wordpress_handler import WordPressHandler
+from discord.ext import commands, tasks
+from utils.wordpress_handler import get_wordpress_handler
 from utils.command_utils import extract_command_argument
 import logging
-import html
-import re
 import json
 
 class TopicCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.wp_handler = WordPressHandler()
+        self.wp_handler = get_wordpress_handler()
         self.logger = logging.getLogger(__name__)
         
         # Load config
@@ -31,6 +29,24 @@ class TopicCog(commands.Cog):
         self.DISCORD_MESSAGE_LIMIT = self.config['discord']['message_limit']
         self.DISCORD_THREAD_TITLE_LIMIT = self.config['discord']['thread_title_limit']
         self.MAX_RESULTS_PER_EMBED = self.config['discord']['max_results_per_embed']
+        
+        # Intervallo di sincronizzazione dell'indice locale dei documenti
+        index_config = self.config['wordpress'].get('index', {})
+        self.sync_docs_index.change_interval(minutes=index_config.get('sync_interval_minutes', 15))
+
+    async def cog_load(self):
+        if self.wp_handler.docs_index is not None:
+            self.sync_docs_index.start()
+
+    async def cog_unload(self):
+        self.sync_docs_index.cancel()
+
+    @tasks.loop(minutes=15)
+    async def sync_docs_index(self):
+        """Sincronizza periodicamente l'indice locale dei documenti WordPress."""
+        success, result = await self.wp_handler.sync_docs_index()
+        if not success:
+            self.logger.error(f"Sincronizzazione dell'indice locale fallita: {result}")
 
     @commands.command(name="topic")
     async def topic(self, ctx, *, search_term=None):
@@ -54,52 +70,65 @@ class TopicCog(commands.Cog):
         # Inviare il messaggio iniziale nel thread
         processing_msg = await thread.send(f"🔍 Sto cercando documenti relativi a: {search_term}")
 
-        # Eseguire la ricerca
-        success, results = await self.wp_handler.search_docs(search_term)
-        
-        if success and isinstance(results, list):
-            if not results:
-                self.logger.info(f"Ricerca completata per '{search_term}' - Nessun risultato trovato")
-                await processing_msg.edit(content=self.messages["topic_no_results"])
-                return
+        # Eseguire la ricerca: i risultati arrivano pagina per pagina e gli embed
+        # vengono inviati appena un gruppo è completo
+        totals = []
+        batch = []
+        count = 0
+        stream = self.wp_handler.iter_docs(search_term, on_total=totals.append)
+        try:
+            async for doc in stream:
+                if count == 0:
+                    # Messaggio iniziale con il numero totale di risultati
+                    await processing_msg.edit(content=self.messages["topic_results_found"].format(
+                        total_results=totals[0],
+                        search_term=search_term
+                    ))
+                count += 1
+                batch.append(doc)
+                if len(batch) == self.MAX_RESULTS_PER_EMBED:
+                    await self._send_results_embed(thread, batch, count - len(batch), totals[0])
+                    batch = []
+            if batch:
+                await self._send_results_embed(thread, batch, count - len(batch), totals[0])
+        except Exception as e:
+            error_message = str(e) or "Si è verificato un errore durante la ricerca."
+            self.logger.error(f"Errore durante la ricerca di '{search_term}': {error_message}")
+            await processing_msg.edit(content=f"❌ {error_message}")
+            return
+        finally:
+            await stream.aclose()
 
-            # Log dei risultati trovati
-            total_results = len(results)
-            self.logger.info(f"Ricerca completata per '{search_term}' - Trovati {total_results} risultati")
-            
-            # Messaggio iniziale con il numero totale di risultati
-            await processing_msg.edit(content=self.messages["topic_results_found"].format(
-                total_results=total_results,
-                search_term=search_term
-            ))
+        if count == 0:
+            self.logger.info(f"Ricerca completata per '{search_term}' - Nessun risultato trovato")
+            await processing_msg.edit(content=self.messages["topic_no_results"])
+            return
 
-            # Suddividi i risultati in gruppi per embed
-            for start_idx in range(0, total_results, self.MAX_RESULTS_PER_EMBED):
-                end_idx = min(start_idx + self.MAX_RESULTS_PER_EMBED, total_results)
-                current_batch = results[start_idx:end_idx]
-                
-                # Prepara la descrizione per questo gruppo
-                description = []
-                for i, doc in enumerate(current_batch, start=start_idx + 1):
-                    title = html.unescape(re.sub('<[^<]+?>', '', doc['title']))
-                    result_line = f"{i}. [{title}]({doc['link']})"
-                    description.append(result_line)
-                    self.logger.info(f"Risultato {i}: {title} - {doc['link']}")
+        # Log dei risultati trovati
+        self.logger.info(f"Ricerca completata per '{search_term}' - Trovati {count} risultati")
 
-                # Crea e invia l'embed per questo gruppo
-                embed = discord.Embed(
-                    title=f"Risultati {start_idx + 1}-{end_idx} di {total_results}",
-                    description="\n".join(description),
-                    color=discord.Color.blue()
-                )
-                await thread.send(embed=embed)
+        # Aggiungere un messaggio di follow-up nel thread
+        await thread.send(self.messages["topic_follow_up"])
 
-            # Aggiungere un messaggio di follow-up nel thread
-            await thread.send(self.messages["topic_follow_up"])
-        else:
-            error_message = results if isinstance(results, str) else "Si è verificato un errore durante la ricerca."
-            self.logger.error(f"Errore durante la ricerca di '{search_term}': {error_message}")
-            await processing_msg.edit(content=f"❌ {error_message}")
+    async def _send_results_embed(self, thread, batch, start_idx, total_results):
+        """Invia nel thread un embed con un gruppo di risultati."""
+        end_idx = start_idx + len(batch)
+        
+        # Prepara la descrizione per questo gruppo
+        description = []
+        for i, doc in enumerate(batch, start=start_idx + 1):
+            # Il titolo è già ripulito dall'HTML al momento dell'acquisizione
+            result_line = f"{i}. [{doc.title}]({doc.link})"
+            description.append(result_line)
+            self.logger.info(f"Risultato {i}: {doc.title} - {doc.link}")
+
+        # Crea e invia l'embed per questo gruppo
+        embed = discord.Embed(
+            title=f"Risultati {start_idx + 1}-{end_idx} di {max(total_results, end_idx)}",
+            description="\n".join(description),
+            color=discord.Color.blue()
+        )
+        await thread.send(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(TopicCog(bot))
\ No newline at end of file
@@ -0,0 +1,59 @@
+import json
+import pytest
+from aiohttp import web
+
+from utils.ai_handler import AIHandler
+from utils.wordpress_handler import WordPressHandler
+
+@pytest.fixture
+def mock_server():
+    """
+    Avvia un'app aiohttp finta su una porta libera, nell'event loop del test.
+
+    Returns:
+        Callable: coroutine che riceve l'app e restituisce (runner, URL base del server)
+    """
+    async def start(app):
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, 'localhost', 0).start()
+        host, port = runner.addresses[0][:2]
+        return runner, f"http://localhost:{port}"
+    return start
+
+@pytest.fixture
+def new_wp_handler(monkeypatch):
+    """
+    Crea WordPressHandler che puntano al server finto, senza cache HTTP né indice locale
+    nella cartella data del bot (i test che li usano li impostano su file temporanei).
+    """
+    monkeypatch.setenv('WP_USERNAME', 'test')
+    monkeypatch.setenv('WP_APP_PASSWORD', 'test')
+
+    def create(base_url='http://localhost'):
+        monkeypatch.setenv('WP_API_URL', f"{base_url}/wp-json/wp/v2/docs")
+        with open('config/config.json', 'r') as f:
+            config = json.load(f)
+        config['wordpress']['http_cache']['enabled'] = False
+        config['wordpress']['index']['enabled'] = False
+        return WordPressHandler(config)
+    return create
+
+@pytest.fixture
+def new_ai_handler(monkeypatch, tmp_path):
+    """
+    Crea AIHandler che puntano al server OpenAI finto, con la cache delle risposte
+    in una cartella temporanea invece di quella usata dal bot.
+    """
+    monkeypatch.setenv('AI_API_KEY', 'test')
+    handlers = []
+
+    def create(base_url):
+        monkeypatch.setenv('OPENAI_BASE_URL', f"{base_url}/v1")
+        handler = AIHandler(completion_cache_path=str(tmp_path / 'ai_cache.sqlite3'))
+        handlers.append(handler)
+        return handler
+    yield create
+    for handler in handlers:
+        if handler.completion_cache is not None:
+            handler.completion_cache.close()
@@ -0,0 +1,94 @@
+import asyncio
+import time
+import utils.ai_scheduler as ai_scheduler
+from utils.ai_scheduler import AIScheduler
+
+def test_fair_round_robin():
+    async def run():
+        scheduler = AIScheduler(max_in_flight=1)
+        started = []
+        positions = {}
+        gate = asyncio.Event()
+
+        async def job(name, user):
+            async with scheduler.slot(user, on_position=lambda position: positions.setdefault(name, []).append(position)):
+                started.append(name)
+                await gate.wait()
+
+        # L'utente A invia quattro richieste di fila, poi B ne invia due
+        tasks = [asyncio.create_task(job(f"A{i}", 'A')) for i in range(1, 5)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(job(f"B{i}", 'B')) for i in range(1, 3)]
+        await asyncio.sleep(0.01)
+        stats = scheduler.stats()
+        assert stats['in_flight'] == 1 and stats['queued'] == 5 and stats['users_waiting'] == 2
+        # B1 è la seconda in coda, anche se A aveva inviato prima altre richieste
+        assert positions['B1'] == [2], positions
+
+        gate.set()
+        await asyncio.gather(*tasks)
+        return started, positions, scheduler.stats()
+
+    started, positions, stats = asyncio.run(run())
+    assert started == ['A1', 'A2', 'B1', 'A3', 'B2', 'A4'], started
+    assert positions['A4'][-1] == 0 and 'A1' not in positions
+    assert stats['completed'] == 6 and stats['in_flight'] == 0 and stats['queued'] == 0
+    print(f"✅ Test coda equa round-robin passato! Ordine: {', '.join(started)}")
+
+def test_concurrency_and_token_budget():
+    ai_scheduler.TOKEN_WINDOW = 0.3
+    try:
+        async def run():
+            scheduler = AIScheduler(max_in_flight=2, tokens_per_minute=100)
+            running = 0
+            max_running = 0
+            start_times = []
+
+            async def job(user):
+                nonlocal running, max_running
+                async with scheduler.slot(user, tokens=40):
+                    start_times.append(time.monotonic())
+                    running += 1
+                    max_running = max(max_running, running)
+                    await asyncio.sleep(0.05)
+                    running -= 1
+
+            begin = time.monotonic()
+            await asyncio.gather(*(job(f"utente{i}") for i in range(4)))
+            return max_running, [t - begin for t in start_times]
+
+        max_running, offsets = asyncio.run(run())
+        assert max_running == 2
+        # 40 + 40 token entrano nel budget di 100, la terza generazione attende la finestra successiva
+        assert offsets[1] < 0.1 and offsets[2] >= 0.25, offsets
+    finally:
+        ai_scheduler.TOKEN_WINDOW = 60.0
+    print("✅ Test concorrenza e budget di token passato!")
+
+def test_cancelled_job_leaves_queue():
+    async def run():
+        scheduler = AIScheduler(max_in_flight=1)
+        gate = asyncio.Event()
+
+        async def job(user):
+            async with scheduler.slot(user):
+                await gate.wait()
+
+        first = asyncio.create_task(job('A'))
+        waiting = asyncio.create_task(job('B'))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.stats()['queued'] == 0
+        gate.set()
+        await first
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert stats['in_flight'] == 0 and stats['completed'] == 1
+    print("✅ Test richiesta annullata in coda passato!")
+
+if __name__ == "__main__":
+    test_fair_round_robin()
+    test_concurrency_and_token_budget()
+    test_cancelled_job_leaves_queue()
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+import socket
+from aiohttp import web
+
+from openai import AsyncOpenAI
+from utils.ai_transport import AIHttpTransport
+
+def mock_app(stats):
+    # Server OpenAI finto: elenco dei modelli (warm-up) e completamenti
+    async def models(request):
+        stats['models'] += 1
+        await asyncio.sleep(0.05)
+        return web.json_response({'object': 'list', 'data': [{'id': 'gpt-4', 'object': 'model', 'created': 0, 'owned_by': 'test'}]})
+
+    async def completions(request):
+        body = await request.json()
+        return web.json_response({
+            'id': 'chatcmpl-test', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': 'Ciao'}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        })
+
+    app = web.Application()
+    app.router.add_get('/v1/models', models)
+    app.router.add_post('/v1/chat/completions', completions)
+    return app
+
+def test_warm_up_and_connection_reuse(mock_server, new_ai_handler):
+    stats = {'models': 0}
+
+    async def run():
+        runner, base_url = await mock_server(mock_app(stats))
+        try:
+            handler = new_ai_handler(base_url)
+            handler.warmup_connections = 2
+            success, message = await handler.warm_up()
+            assert success, message
+            warm = handler.connection_stats()
+
+            # Le richieste successive riusano le connessioni aperte dal warm-up
+            for _ in range(3):
+                await handler.client.chat.completions.create(
+                    model='gpt-4', messages=[{'role': 'user', 'content': 'Ciao'}], max_tokens=5
+                )
+            after = handler.connection_stats()
+            await handler.http_transport.aclose()
+        finally:
+            await runner.cleanup()
+        return message, warm, after
+
+    message, warm, after = asyncio.run(run())
+    assert stats['models'] == 2
+    # Server finto su http: anche con h2 installato si usa HTTP/1.1, una connessione per richiesta in parallelo
+    assert warm['new_connections'] == 2, warm
+    assert warm['warmups'] == 1 and warm['last_warmup'] is not None
+    assert after['requests'] == warm['requests'] + 3
+    assert after['new_connections'] == warm['new_connections'], after
+    assert after['reused'] == 3 and after['reuse_rate'] > 0
+    print(f"✅ Test warm-up e riuso delle connessioni passato! {message}; {after['reused']}/{after['requests']} richieste su connessioni riusate")
+
+def test_warm_up_failure():
+    # Porta libera su cui non ascolta nessuno
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        closed_port = sock.getsockname()[1]
+
+    async def run():
+        transport = AIHttpTransport(connect_timeout=1.0)
+        client = AsyncOpenAI(api_key='test', base_url=f"http://localhost:{closed_port}/v1", http_client=transport.client)
+        try:
+            return await transport.warm_up(client, 2), transport.stats()
+        finally:
+            await transport.aclose()
+
+    (success, message), stats = asyncio.run(run())
+    assert not success and 'fallito' in message, message
+    assert stats['warmups'] == 0 and stats['requests'] == 0
+    print("✅ Test warm-up senza server passato!")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
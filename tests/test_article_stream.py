@@ -0,0 +1,84 @@
+import asyncio
+import json
+import pytest
+from aiohttp import web
+
+from utils.article_stream import ArticleStream
+
+ARTICLE = """<!-- wp:heading -->
+<h2>Introduzione ai chatbot</h2>
+<!-- /wp:heading -->
+<!-- wp:paragraph -->
+<p>Un chatbot risponde ai clienti.</p>
+<!-- /wp:paragraph -->
+<!-- wp:heading -->
+<h2>Configurare le automazioni</h2>
+<!-- /wp:heading -->
+<!-- wp:html -->
+<div class="betterdocs-seo-metadata" style="display: none;">
+<!-- SEO METADATA START -->
+<!-- KEYWORDS -->
+- chatbot
+- automazioni
+
+<!-- META DESCRIPTION -->
+Guida ai chatbot e alle automazioni.
+<!-- SEO METADATA END -->
+</div>
+<!-- /wp:html -->"""
+
+def chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_incremental_sections_and_keywords():
+    article = ArticleStream()
+    keywords_at = None
+    for delta in chunks(ARTICLE):
+        article.feed(delta)
+        if keywords_at is None and article.keywords_ready:
+            keywords_at = len(article)
+    assert article.text == ARTICLE
+    assert article.sections == ['Introduzione ai chatbot', 'Configurare le automazioni']
+    assert article.keywords == ['chatbot', 'automazioni']
+    # Le keywords sono disponibili prima della fine della generazione
+    assert keywords_at < len(ARTICLE) - 50, keywords_at
+    assert '<!-- wp:html -->' not in article.body
+    print(f"✅ Test analisi incrementale passato! Keywords pronte a {keywords_at}/{len(ARTICLE)} caratteri")
+
+def mock_app():
+    # Server OpenAI finto che risponde in streaming (Server-Sent Events)
+    async def handle(request):
+        body = await request.json()
+        assert body['stream'] is True
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        for delta in chunks(ARTICLE, 40):
+            event = {
+                'id': 'chatcmpl-test', 'object': 'chat.completion.chunk', 'created': 0, 'model': body['model'],
+                'choices': [{'index': 0, 'delta': {'content': delta}, 'finish_reason': None}]
+            }
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+            await asyncio.sleep(0.01)
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    app = web.Application()
+    app.router.add_post('/v1/chat/completions', handle)
+    return app
+
+def test_stream_article(mock_server, new_ai_handler):
+    async def run():
+        runner, base_url = await mock_server(mock_app())
+        try:
+            handler = new_ai_handler(base_url)
+            deltas = [delta async for delta in handler.stream_article("", "Materiale di riferimento", use_cache=False)]
+        finally:
+            await runner.cleanup()
+        return deltas
+
+    deltas = asyncio.run(run())
+    assert len(deltas) > 1 and ''.join(deltas) == ARTICLE
+    print(f"✅ Test generazione in streaming passato! {len(deltas)} frammenti")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
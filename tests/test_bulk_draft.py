@@ -0,0 +1,183 @@
+import asyncio
+import io
+import json
+import logging
+import zipfile
+from cogs.draft_cog import DraftCog
+from utils.command_utils import extract_attachment_files, is_bulk_attachment_request
+
+with open('config/messages.json', 'r') as f:
+    MESSAGES = json.load(f)
+
+class FakeAttachment:
+    """Allegato Discord finto con nome, dimensione e contenuto"""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.data = data if isinstance(data, bytes) else data.encode('utf-8')
+        self.size = len(self.data)
+        self.reads = 0
+
+    async def read(self):
+        self.reads += 1
+        return self.data
+
+class FakeMessage:
+    """Messaggio Discord finto: allegati e modifiche del contenuto"""
+
+    def __init__(self, attachments=(), content=''):
+        self.attachments = list(attachments)
+        self.content = content
+        self.edits = []
+
+    async def edit(self, content):
+        self.edits.append(content)
+        self.content = content
+
+class FakeAuthor:
+    id = 42
+
+    def __str__(self):
+        return "utente#0001"
+
+class FakeContext:
+    """Contesto finto di un comando: registra i messaggi inviati"""
+
+    def __init__(self, message):
+        self.message = message
+        self.author = FakeAuthor()
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+        return FakeMessage(content=content)
+
+def make_zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in entries.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+def extract(attachments, max_files=10, max_file_size=1000):
+    return asyncio.run(extract_attachment_files(FakeMessage(attachments), max_files, max_file_size))
+
+def test_zip_and_multiple_txt_extraction():
+    archive = make_zip({
+        'guide/whatsapp.txt': "Guida a WhatsApp",
+        'guide/chatbot.txt': "Guida ai chatbot",
+        'guide/': '',
+        '__MACOSX/guide/._whatsapp.txt': "metadati",
+        'guide/.nascosto.txt': "file nascosto",
+        'guide/immagine.png': "non testo",
+        'guide/vuoto.txt': "   ",
+    })
+    attachments = [FakeAttachment('archivio.zip', archive), FakeAttachment('extra.txt', "Materiale extra")]
+    assert is_bulk_attachment_request(FakeMessage(attachments))
+    assert is_bulk_attachment_request(FakeMessage([FakeAttachment('a.txt', 'a'), FakeAttachment('b.TXT', 'b')]))
+    assert not is_bulk_attachment_request(FakeMessage([FakeAttachment('a.txt', 'a')]))
+
+    success, files = extract(attachments)
+    assert success, files
+    # Solo i .txt non vuoti, senza cartelle, file di sistema e file nascosti, nell'ordine degli allegati
+    assert files == [
+        ('whatsapp.txt', "Guida a WhatsApp"),
+        ('chatbot.txt', "Guida ai chatbot"),
+        ('extra.txt', "Materiale extra"),
+    ], files
+    print("✅ Test estrazione da .zip e più file .txt passato!")
+
+def test_file_size_and_count_limits():
+    big = "x" * 2000
+    archive = make_zip({'grande.txt': big, 'piccolo.txt': "Documento piccolo"})
+    oversized = FakeAttachment('allegato_grande.txt', big)
+    success, files = extract([FakeAttachment('archivio.zip', archive), oversized, FakeAttachment('ok.txt', "Va bene")])
+    assert success, files
+    # I file oltre max_file_size vengono ignorati sia negli archivi sia tra gli allegati diretti
+    assert [name for name, _ in files] == ['piccolo.txt', 'ok.txt'], files
+    # L'allegato troppo grande non viene nemmeno scaricato
+    assert oversized.reads == 0
+
+    success, message = extract([FakeAttachment(f"file{i}.txt", f"Contenuto {i}") for i in range(4)], max_files=3)
+    assert not success
+    assert message == MESSAGES["draft_bulk_too_many_files"].format(max_files=3, count=4)
+
+    # I limiti valgono prima di leggere: né i .txt né le voci dell'archivio vengono letti
+    many = [FakeAttachment(f"file{i}.txt", f"Contenuto {i}") for i in range(2)]
+    crowded = make_zip({f"voce{i}.txt": f"Voce {i}" for i in range(5)})
+    success, message = extract(many + [FakeAttachment('archivio.zip', crowded)], max_files=3)
+    assert not success
+    assert message == MESSAGES["draft_bulk_too_many_files"].format(max_files=3, count=7)
+    assert all(attachment.reads == 0 for attachment in many)
+
+    huge_zip = FakeAttachment('enorme.zip', make_zip({'a.txt': "y" * 5000}))
+    success, message = extract([huge_zip], max_files=2, max_file_size=100)
+    assert not success
+    assert message == MESSAGES["draft_bulk_too_large"].format(max_size=200)
+    assert huge_zip.reads == 0
+
+    success, message = extract([oversized, FakeAttachment('vuoto.txt', "  ")])
+    assert not success and message == MESSAGES["draft_bulk_no_files"]
+
+    success, message = extract([FakeAttachment('rotto.zip', b"non un archivio")])
+    assert not success and message == MESSAGES["draft_bulk_invalid_zip"]
+    print("✅ Test limiti di dimensione e numero dei file passato!")
+
+def test_bulk_summary():
+    cog = object.__new__(DraftCog)
+    cog.logger = logging.getLogger('test_bulk_draft')
+    cog.messages = MESSAGES
+    cog.config = {'discord': {'message_limit': 2000}}
+    cog.bulk_max_files = 10
+    cog.bulk_max_workers = 2
+    cog.bulk_max_file_size = 1000
+    cog.progress_edit_interval = 0.0
+    in_flight = {'now': 0, 'max': 0}
+
+    async def fake_generate_and_publish(content, use_cache=True, user=None, **kwargs):
+        in_flight['now'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        await asyncio.sleep(0.05)
+        in_flight['now'] -= 1
+        if 'errore' in content:
+            return False, "WordPress non disponibile", None
+        if 'eccezione' in content:
+            raise Exception("Generazione fallita")
+        return True, "Bozza creata", f"https://example.com/{content.split()[-1]}"
+
+    cog.generate_and_publish = fake_generate_and_publish
+    message = FakeMessage([
+        FakeAttachment('uno.txt', "Documento uno"),
+        FakeAttachment('due.txt', "Documento con errore"),
+        FakeAttachment('tre.txt', "Documento tre"),
+        FakeAttachment('quattro.txt', "Documento con eccezione"),
+    ])
+    ctx = FakeContext(message)
+    asyncio.run(cog.bulk_draft(ctx))
+
+    assert in_flight['max'] == 2, in_flight
+    assert ctx.sent[0] == MESSAGES["draft_bulk_started"].format(count=4, workers=2)
+    # Il messaggio di avanzamento termina con il riepilogo, poi l'elenco delle bozze in ordine di invio
+    assert ctx.sent[-1] == "\n".join([
+        MESSAGES["draft_bulk_item_success"].format(filename='uno.txt', url="https://example.com/uno"),
+        MESSAGES["draft_bulk_item_failure"].format(filename='due.txt', error="WordPress non disponibile"),
+        MESSAGES["draft_bulk_item_success"].format(filename='tre.txt', url="https://example.com/tre"),
+        MESSAGES["draft_bulk_item_failure"].format(filename='quattro.txt', error="Generazione fallita"),
+    ]), ctx.sent[-1]
+    assert len(ctx.sent) == 2
+    print("✅ Test riepilogo delle bozze in blocco passato!")
+
+def test_summary_split_to_discord_limit():
+    cog = object.__new__(DraftCog)
+    cog.config = {'discord': {'message_limit': 50}}
+    lines = [f"✅ file{i}.txt: https://example.com/{i}" for i in range(10)]
+    chunks = cog._split_message("\n".join(lines))
+    assert len(chunks) > 1 and all(len(chunk) <= 50 for chunk in chunks)
+    assert "\n".join(chunks).split("\n") == lines
+    print("✅ Test suddivisione del riepilogo passato!")
+
+if __name__ == "__main__":
+    test_zip_and_multiple_txt_extraction()
+    test_file_size_and_count_limits()
+    test_bulk_summary()
+    test_summary_split_to_discord_limit()
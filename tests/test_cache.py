@@ -0,0 +1,52 @@
+import time
+from utils.cache import TTLCache
+from utils.text_utils import normalize_key
+
+def test_normalized_keys():
+    assert normalize_key("  WhatsApp   Business ") == "whatsapp business"
+    assert normalize_key("Modalità") == normalize_key("modalita")
+    print("✅ Test normalizzazione delle chiavi passato!")
+
+def test_lru_eviction():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" diventa la voce usata più di recente
+    cache.set("c", 3)           # viene eliminata "b", la meno usata
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats['hits'] == 3 and stats['misses'] == 1 and stats['evictions'] == 1
+    print("✅ Test eliminazione LRU passato!")
+
+def test_ttl_expiry_and_invalidation():
+    cache = TTLCache(max_entries=10, ttl=0.05)
+    cache.set("chatbot", ["risultato"])
+    assert cache.get("chatbot") == ["risultato"]
+    time.sleep(0.1)
+    assert cache.get("chatbot") is None
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None and cache.get("b") == 2
+    cache.invalidate()
+    assert len(cache) == 0
+    print("✅ Test scadenza e invalidazione passato!")
+
+def test_peek_returns_stale_entries():
+    cache = TTLCache(max_entries=10, ttl=0.05)
+    assert cache.peek("canale") == (None, None)
+    cache.set("canale", {"title": "Spoki"})
+    time.sleep(0.1)
+    value, age = cache.peek("canale")
+    # La voce scaduta resta disponibile, con la sua età, finché non viene sostituita
+    assert value == {"title": "Spoki"} and age > cache.ttl
+    assert cache.age("canale") >= age and cache.age("assente") is None
+    print("✅ Test lettura di voci scadute passato!")
+
+if __name__ == "__main__":
+    test_normalized_keys()
+    test_lru_eviction()
+    test_ttl_expiry_and_invalidation()
+    test_peek_returns_stale_entries()
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import pytest
+import tempfile
+import time
+from aiohttp import web
+
+from utils.docs_index import DocsIndex
+
+# Documenti del server WordPress finto, che supporta modified_after
+MOCK_DOCS = [
+    {
+        'id': 1,
+        'title': {'rendered': 'Come collegare <strong>WhatsApp</strong> &amp; Spoki'},
+        'link': 'https://example.com/whatsapp',
+        'excerpt': {'rendered': '<p>Guida alla connessione del numero</p>'},
+        'content': {'rendered': '<p>Configurazione del numero di telefono.</p>'},
+        'modified_gmt': '2024-05-01T10:00:00'
+    },
+    {
+        'id': 2,
+        'title': {'rendered': 'Creare un chatbot'},
+        'link': 'https://example.com/chatbot',
+        'excerpt': {'rendered': '<p>Automazioni e risposte</p>'},
+        'content': {'rendered': '<p>Il chatbot risponde in modalità automatica.</p>'},
+        'modified_gmt': '2024-05-02T10:00:00'
+    },
+]
+
+def mock_app(requests_log, published=MOCK_DOCS):
+    async def handle(request):
+        requests_log.append(dict(request.query))
+        modified_after = request.query.get('modified_after')
+        docs = published
+        if modified_after:
+            docs = [doc for doc in docs if doc['modified_gmt'] + 'Z' > modified_after]
+        return web.json_response(docs, headers={'X-WP-TotalPages': '1'})
+
+    app = web.Application()
+    app.router.add_get('/wp-json/wp/v2/docs', handle)
+    return app
+
+def test_index_search():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = DocsIndex(os.path.join(tmp, 'docs.sqlite3'), max_age=60)
+        assert index.is_stale()
+        index.upsert(MOCK_DOCS)
+        index.mark_synced()
+        assert not index.is_stale()
+
+        results = index.search('whatsapp')
+        assert [doc['id'] for doc in results] == [1]
+        # Titoli ed estratti sono già ripuliti al momento dell'inserimento
+        assert results[0]['title'] == 'Come collegare WhatsApp & Spoki'
+        assert results[0]['excerpt'] == 'Guida alla connessione del numero'
+        # Ricerca per prefisso e senza accenti
+        assert [doc['id'] for doc in index.search('modalita')] == [2]
+        assert [doc['id'] for doc in index.search('chat')] == [2]
+        assert index.search('inesistente') == []
+        index.close()
+    print("✅ Test ricerca nell'indice locale passato!")
+
+async def run_incremental_sync(mock_server, new_wp_handler, index_path):
+    requests_log = []
+    runner, base_url = await mock_server(mock_app(requests_log))
+    wp_handler = new_wp_handler(base_url)
+    wp_handler.docs_index = DocsIndex(index_path, max_age=60)
+    try:
+        first = await wp_handler.sync_docs_index()
+        second = await wp_handler.sync_docs_index()
+        search = await wp_handler.search_docs('chatbot')
+        return first, second, search, requests_log
+    finally:
+        wp_handler.close()
+        await runner.cleanup()
+
+def test_incremental_sync(mock_server, new_wp_handler):
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second, search, requests_log = asyncio.run(
+            run_incremental_sync(mock_server, new_wp_handler, os.path.join(tmp, 'docs.sqlite3'))
+        )
+
+    assert first == (True, 2), first
+    # La seconda sincronizzazione chiede solo i documenti modificati dopo l'ultimo indicizzato
+    assert 'modified_after' not in requests_log[0]
+    assert requests_log[1]['modified_after'] == '2024-05-02T09:59:59Z'
+    assert second == (True, 1), second
+    # Dopo la sincronizzazione la ricerca viene servita dall'indice
+    success, results = search
+    assert success and results[0]['link'] == 'https://example.com/chatbot'
+    # Il download completo fornisce già tutti gli id: nessuna richiesta aggiuntiva per il confronto
+    assert len(requests_log) == 2
+    print("✅ Test sincronizzazione incrementale passato!")
+
+async def run_reconcile(mock_server, new_wp_handler, index_path):
+    requests_log = []
+    published = list(MOCK_DOCS)
+    runner, base_url = await mock_server(mock_app(requests_log, published))
+    wp_handler = new_wp_handler(base_url)
+    wp_handler.docs_index = DocsIndex(index_path, max_age=60)
+    try:
+        # Documento già indicizzato ma non più pubblicato: mai confrontato, quindi la prima sincronizzazione scarica anche gli id
+        wp_handler.docs_index.upsert([{**MOCK_DOCS[0], 'id': 3, 'modified_gmt': '2024-04-01T10:00:00'}])
+        first = await wp_handler.sync_docs_index()
+        first_ids = sorted(doc['id'] for doc in wp_handler.docs_index.search('whatsapp'))
+
+        # Documento eliminato su WordPress: la sincronizzazione incrementale non lo vede
+        published.remove(MOCK_DOCS[0])
+        incremental = await wp_handler.sync_docs_index()
+        still_indexed = wp_handler.docs_index.count()
+
+        # Trascorso l'intervallo, il confronto completo degli id lo rimuove dall'indice
+        wp_handler.reconcile_interval = 0
+        reconciled = await wp_handler.sync_docs_index()
+        search = await wp_handler.search_docs('whatsapp')
+        return first, first_ids, incremental, still_indexed, reconciled, search, wp_handler.docs_index.count(), requests_log
+    finally:
+        wp_handler.close()
+        await runner.cleanup()
+
+def test_reconcile_removed_docs(mock_server, new_wp_handler):
+    with tempfile.TemporaryDirectory() as tmp:
+        first, first_ids, incremental, still_indexed, reconciled, search, count, requests_log = asyncio.run(
+            run_reconcile(mock_server, new_wp_handler, os.path.join(tmp, 'docs.sqlite3'))
+        )
+
+    # 2 documenti aggiornati e 1 rimosso
+    assert first == (True, 3), first
+    assert first_ids == [1], first_ids
+    assert 'modified_after' in requests_log[0] and requests_log[1]['_fields'] == 'id'
+    assert incremental == (True, 1) and still_indexed == 2, (incremental, still_indexed)
+    assert reconciled == (True, 2), reconciled
+    # L'elenco degli id chiede solo il campo id
+    assert requests_log[-1]['_fields'] == 'id'
+    assert not search[0] and count == 1, (search, count)
+    print("✅ Test rimozione dei documenti eliminati dall'indice passato!")
+
+def test_index_search_does_not_block_event_loop(new_wp_handler):
+    async def run(index_path):
+        wp_handler = new_wp_handler()
+        wp_handler.docs_index = DocsIndex(index_path, max_age=60)
+        wp_handler.docs_index.upsert(MOCK_DOCS)
+        wp_handler.docs_index.mark_synced()
+        max_stall = 0.0
+        searching = True
+
+        async def heartbeat():
+            nonlocal max_stall
+            while searching:
+                start = time.perf_counter()
+                await asyncio.sleep(0.02)
+                max_stall = max(max_stall, time.perf_counter() - start - 0.02)
+
+        try:
+            beat = asyncio.create_task(heartbeat())
+            # Una sincronizzazione in corso tiene il lock dell'indice
+            with wp_handler.docs_index._lock:
+                search = asyncio.create_task(wp_handler.search_docs('chatbot'))
+                await asyncio.sleep(0.3)
+            result = await search
+            searching = False
+            await beat
+            return result, max_stall
+        finally:
+            wp_handler.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (success, results), max_stall = asyncio.run(run(os.path.join(tmp, 'docs.sqlite3')))
+    assert success and results[0]['link'] == 'https://example.com/chatbot', results
+    assert max_stall < 0.15, f"Event loop bloccato per {max_stall:.2f}s"
+    print("✅ Test ricerca nell'indice senza bloccare l'event loop passato!")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
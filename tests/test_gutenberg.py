@@ -0,0 +1,104 @@
+import time
+from utils.gutenberg import GutenbergParser, link_list_section, parse_article
+
+ARTICLE = """<!-- wp:heading {"level":1} -->
+<h1 class="wp-block-heading">Guida ai <strong>chatbot</strong></h1>
+<!-- /wp:heading -->
+
+<!-- wp:paragraph -->
+<p>Un chatbot risponde ai clienti.</p>
+<!-- /wp:paragraph -->
+
+<!-- wp:heading -->
+<h2>Configurare le automazioni</h2>
+<!-- /wp:heading -->
+
+<!-- wp:html -->
+<div class="esempio"><code>&lt;script&gt;</code></div>
+<!-- /wp:html -->
+
+<!-- wp:separator /-->
+
+<!-- wp:html -->
+<div class="betterdocs-seo-metadata" style="display: none;">
+<!-- SEO METADATA START -->
+<!-- KEYWORDS -->
+- chatbot
+- automazioni
+
+<!-- META DESCRIPTION -->
+Guida ai chatbot e alle automazioni.
+<!-- SEO METADATA END -->
+</div>
+<!-- /wp:html -->"""
+
+def test_parse_article():
+    article = parse_article(ARTICLE)
+    assert article.title == 'Guida ai chatbot'
+    assert article.sections == ['Configurare le automazioni']
+    assert article.keywords == ['chatbot', 'automazioni']
+    assert article.meta_description == 'Guida ai chatbot e alle automazioni.'
+    # Il blocco SEO è l'ultimo blocco html, non il primo
+    assert ARTICLE[article.seo_start:].startswith('<!-- wp:html -->\n<div class="betterdocs-seo-metadata"')
+    names = [block.name for block in article.blocks]
+    assert names == ['heading', 'paragraph', 'heading', 'html', 'separator', 'html'], names
+    assert article.blocks[0].attrs == {'level': 1}
+    assert all(block.end is not None for block in article.blocks)
+    print("✅ Test analisi dei blocchi passato!")
+
+def test_streaming_matches_single_pass():
+    expected = parse_article(ARTICLE)
+    for size in (1, 3, 7, 40):
+        parser = GutenbergParser()
+        for i in range(0, len(ARTICLE), size):
+            parser.feed(ARTICLE[i:i + size])
+        parser.close()
+        assert parser.headings == expected.headings, size
+        assert parser.keywords == expected.keywords and parser.meta_description == expected.meta_description
+        assert parser.seo_start == expected.seo_start
+        assert [(block.name, block.start, block.end) for block in parser.blocks] == \
+            [(block.name, block.start, block.end) for block in expected.blocks], size
+        assert len(parser) == len(ARTICLE) and parser.text == ARTICLE
+    print("✅ Test analisi in streaming passato!")
+
+def test_streaming_long_article():
+    body = ARTICLE[:ARTICLE.index('<!-- wp:html -->\n<div class="betterdocs')]
+    text = body * 300 + ARTICLE
+    parser = GutenbergParser()
+    largest = 0
+    start = time.perf_counter()
+    for i in range(0, len(text), 5):
+        parser.feed(text[i:i + 5])
+        largest = max(largest, len(parser._buffer))
+    parser.close()
+    elapsed = time.perf_counter() - start
+    # Solo la parte non ancora esaminata resta nel buffer: il costo di ogni frammento non cresce con il testo
+    assert largest < 500, largest
+    assert len(parser.sections) == 301 and parser.keywords == ['chatbot', 'automazioni']
+    assert parser.text == text and text[parser.seo_start:].startswith('<!-- wp:html -->\n<div class="betterdocs')
+    assert elapsed < 2.0, f"Analisi troppo lenta ({elapsed:.2f}s)"
+    print(f"✅ Test analisi in streaming di un articolo lungo passato! ({len(text)} caratteri in {elapsed * 1000:.0f} ms)")
+
+def test_insert_before_seo():
+    article = parse_article(ARTICLE)
+    related = link_list_section("Articoli correlati", [("https://example.com/1", "Articolo 1")])
+    videos = link_list_section("Video correlati", [("https://youtu.be/1", "Video 1")])
+    result = article.insert_before_seo([related, videos])
+    # Sezioni inserite una sola volta, anche con più blocchi html, e nell'ordine richiesto
+    assert result.count('<h2>Articoli correlati</h2>') == 1 and result.count('<h2>Video correlati</h2>') == 1
+    assert result.index('Articoli correlati') < result.index('Video correlati') < result.index('betterdocs-seo-metadata')
+    assert result.index('<code>') < result.index('Articoli correlati')
+    assert result.replace(f"\n\n{related}", '').replace(f"\n\n{videos}", '') == ARTICLE
+    assert article.insert_before_seo([]) == ARTICLE
+
+    # Senza blocco SEO le sezioni vanno in fondo
+    plain = parse_article("<!-- wp:paragraph -->\n<p>Testo</p>\n<!-- /wp:paragraph -->\n")
+    assert plain.keywords is None and plain.title is None
+    assert plain.insert_before_seo([related]).endswith(related)
+    print("✅ Test inserimento delle sezioni passato!")
+
+if __name__ == "__main__":
+    test_parse_article()
+    test_streaming_matches_single_pass()
+    test_streaming_long_article()
+    test_insert_before_seo()
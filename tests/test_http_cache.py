@@ -0,0 +1,59 @@
+import asyncio
+import os
+import pytest
+import tempfile
+from aiohttp import web
+
+from utils.http_cache import RevalidationCache
+
+# Server WordPress finto in locale che supporta le richieste condizionali con ETag
+ETAG = '"docs-v1"'
+
+def mock_app(log):
+    async def handle(request):
+        if request.headers.get('If-None-Match') == ETAG:
+            log.append(304)
+            return web.Response(status=304, headers={'ETag': ETAG})
+        log.append(200)
+        docs = [
+            {'id': i, 'title': {'rendered': f"Documento {i}"}, 'link': f"https://example.com/{i}", 'excerpt': {'rendered': ''}}
+            for i in range(3)
+        ]
+        return web.json_response(docs, headers={'ETag': ETAG, 'X-WP-TotalPages': '1', 'X-WP-Total': '3'})
+
+    app = web.Application()
+    app.router.add_get('/wp-json/wp/v2/docs', handle)
+    return app
+
+async def search_with_fresh_handler(new_wp_handler, base_url, cache_path):
+    # Un nuovo handler simula il riavvio del bot: la cache in memoria è vuota, quella su disco no
+    wp_handler = new_wp_handler(base_url)
+    wp_handler.http_cache = RevalidationCache(cache_path)
+    try:
+        result = await wp_handler.search_docs('documento')
+        return result, wp_handler.http_cache_stats()
+    finally:
+        wp_handler.close()
+
+def test_revalidation_across_restarts(mock_server, new_wp_handler):
+    async def run():
+        log = []
+        runner, base_url = await mock_server(mock_app(log))
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, 'http_cache.sqlite3')
+            try:
+                first, first_stats = await search_with_fresh_handler(new_wp_handler, base_url, cache_path)
+                second, second_stats = await search_with_fresh_handler(new_wp_handler, base_url, cache_path)
+            finally:
+                await runner.cleanup()
+        return log, first, second, first_stats, second_stats
+
+    log, first, second, first_stats, second_stats = asyncio.run(run())
+    assert log == [200, 304], log
+    assert first == second and first[0] and len(first[1]) == 3, (first, second)
+    assert first_stats['stored'] == 1 and first_stats['revalidated'] == 0
+    assert second_stats['revalidated'] == 1 and second_stats['bytes_saved'] > 0
+    print(f"✅ Test rivalidazione HTTP passato! {second_stats['bytes_saved']} byte risparmiati")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,43 @@
+import time
+from utils.keyword_extractor import extract_keywords, keyword_overlap
+
+REFERENCE = """
+<h2>Come collegare WhatsApp Business a Spoki</h2>
+<p>Per usare WhatsApp Business con Spoki serve un numero di telefono verificato. Dopo il collegamento
+puoi creare automazioni e chatbot che rispondono ai clienti anche fuori orario.</p>
+<p>Le automazioni di WhatsApp Business inviano messaggi di benvenuto, promemoria e conferme d'ordine.
+Il chatbot inoltra le richieste complesse a un operatore.</p>
+<p>Con i template approvati da Meta puoi inviare campagne di WhatsApp Business ai contatti che hanno
+dato il consenso. Le automazioni e il chatbot si configurano dalla sezione Automazioni.</p>
+"""
+
+def test_extract_keywords():
+    keywords = extract_keywords(REFERENCE, max_keywords=5)
+    assert 1 <= len(keywords) <= 5, keywords
+    # La frase più frequente del testo è la prima keyword
+    assert keywords[0] == 'whatsapp business', keywords
+    assert 'automazioni' in keywords and 'chatbot' in keywords, keywords
+    # Nessuna stopword, nessun tag HTML e nessuna keyword già coperta da un'altra
+    assert not any(word in ('con', 'che', 'h2', 'whatsapp') for word in keywords), keywords
+    assert len(set(keywords)) == len(keywords)
+    assert extract_keywords("") == [] and extract_keywords("di e il la") == []
+
+    # Veloce anche su materiale lungo
+    start = time.perf_counter()
+    extract_keywords(REFERENCE * 200)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 2.0, f"Estrazione troppo lenta ({elapsed:.2f}s)"
+    print(f"✅ Test estrazione keywords passato! {keywords} (testo lungo in {elapsed * 1000:.0f} ms)")
+
+def test_keyword_overlap():
+    local = ['whatsapp business', 'automazioni', 'chatbot']
+    ai = ['WhatsApp Business', 'chatbot clienti', 'automazioni', 'template Meta']
+    covered = keyword_overlap(ai, local)
+    # Confronto senza maiuscole; "chatbot clienti" e "template Meta" hanno parole non presenti in locale
+    assert covered == ['WhatsApp Business', 'automazioni'], covered
+    assert keyword_overlap(ai, []) == []
+    print("✅ Test sovrapposizione keywords passato!")
+
+if __name__ == "__main__":
+    test_extract_keywords()
+    test_keyword_overlap()
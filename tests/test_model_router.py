@@ -0,0 +1,50 @@
+from utils.model_router import ModelRouter
+
+TOKEN_LIMITS = {'gpt-3.5-turbo': 4096, 'gpt-4': 8192, 'gpt-4-32k': 32768}
+MODELS = {
+    'gpt-3.5-turbo': {'input_cost': 0.0005, 'output_cost': 0.0015, 'seconds_per_1k_output': 12, 'first_token_seconds': 0.5},
+    'gpt-4': {'input_cost': 0.03, 'output_cost': 0.06, 'seconds_per_1k_output': 40, 'first_token_seconds': 1.0},
+    'gpt-4-32k': {'input_cost': 0.06, 'output_cost': 0.12, 'seconds_per_1k_output': 45, 'first_token_seconds': 1.5}
+}
+
+def test_size_aware_choice():
+    router = ModelRouter(MODELS, TOKEN_LIMITS, output_tokens=2500)
+    # Prompt piccolo: il modello più rapido ed economico con spazio per la risposta
+    assert router.choose(800) == 'gpt-3.5-turbo'
+    # Prompt medio: gpt-3.5 non ha più spazio per 2500 token di risposta
+    assert router.choose(3000) == 'gpt-4'
+    # Prompt grande: invece di essere rifiutato va al modello con la finestra più ampia
+    assert router.choose(12000) == 'gpt-4-32k'
+    assert router.choose(40000) == 'gpt-4-32k'
+    # Risposta più breve richiesta: gpt-3.5 torna candidato
+    assert router.choose(3000, output_tokens=500) == 'gpt-3.5-turbo'
+    assert router.stats()['gpt-4-32k']['choices'] == 2
+    print("✅ Test scelta in base alla dimensione passato!")
+
+def test_measured_latency_changes_choice():
+    # Solo latenza: con le stime iniziali gpt-3.5 è il più rapido
+    router = ModelRouter(MODELS, TOKEN_LIMITS, output_tokens=1000, cost_weight=0.0, ewma_alpha=0.5)
+    assert router.choose(500) == 'gpt-3.5-turbo'
+    # Misure reali: gpt-3.5 molto lento (100 s per 1000 token), gpt-4 rapido
+    for _ in range(6):
+        router.record('gpt-3.5-turbo', elapsed=100.5, output_tokens=1000, first_token=0.5)
+        router.record('gpt-4', elapsed=11.0, output_tokens=1000, first_token=1.0)
+    stats = router.stats()
+    assert stats['gpt-3.5-turbo']['samples'] == 6 and stats['gpt-3.5-turbo']['seconds_per_1k_output'] > 90
+    assert router.choose(500) == 'gpt-4'
+    print("✅ Test latenza misurata (media mobile) passato!")
+
+def test_models_outside_token_limits_ignored():
+    router = ModelRouter({**MODELS, 'modello-sconosciuto': {}}, TOKEN_LIMITS)
+    assert 'modello-sconosciuto' not in router.stats()
+    try:
+        ModelRouter({'modello-sconosciuto': {}}, TOKEN_LIMITS)
+        assert False, "Configurazione senza modelli validi non rilevata"
+    except ValueError:
+        pass
+    print("✅ Test modelli non presenti in token_limits passato!")
+
+if __name__ == "__main__":
+    test_size_aware_choice()
+    test_measured_latency_changes_choice()
+    test_models_outside_token_limits_ignored()
@@ -0,0 +1,107 @@
+import builtins
+import json
+import os
+import tempfile
+from utils.prompt_registry import PromptRegistry, PromptError
+
+def write_prompts(path, prompts):
+    with open(path, 'w') as f:
+        json.dump(prompts, f)
+    # Garantisce una data di modifica diversa anche su filesystem a bassa risoluzione
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_reload_only_on_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'prompts.json')
+        write_prompts(path, {'article_generation': {'template': 'Scrivi su {topic}: {content}', 'description': 'Articolo'}})
+        registry = PromptRegistry(path)
+        assert registry.load()[0] and registry.reloads == 1
+        assert registry.get('article_generation').fields == {'topic', 'content'}
+
+        # File invariato: nessuna rilettura
+        assert not registry.changed()
+        assert registry.load()[0] and registry.reloads == 1
+
+        write_prompts(path, {
+            'article_generation': {'template': 'Nuovo: {topic} {content}'},
+            'summary': {'template': 'Riassumi: {content}'}
+        })
+        assert registry.changed()
+        assert registry.load()[0] and registry.reloads == 2
+        assert registry.names() == ['article_generation', 'summary']
+        assert registry.get('summary').format(content='testo') == 'Riassumi: testo'
+
+        # Ricarica forzata anche senza modifiche
+        assert registry.load(force=True)[0] and registry.reloads == 3
+    print("✅ Test ricarica solo su modifica passato!")
+
+def test_invalid_file_keeps_previous():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'prompts.json')
+        write_prompts(path, {'article_generation': {'template': 'Scrivi su {topic}'}})
+        registry = PromptRegistry(path)
+        registry.load()
+
+        with open(path, 'w') as f:
+            f.write('{"article_generation": ')
+        success, _ = registry.load(force=True)
+        assert not success
+        assert registry.get('article_generation').template == 'Scrivi su {topic}'
+
+        write_prompts(path, {'article_generation': {'template': 'Segnaposto {non valido}'}})
+        assert not registry.load()[0]
+        assert registry.get('article_generation').template == 'Scrivi su {topic}'
+
+        # File non valido invariato: non risulta modificato e non viene riletto
+        assert not registry.changed()
+        opened = []
+        original_open = open
+
+        def tracking_open(*args, **kwargs):
+            opened.append(args[0])
+            return original_open(*args, **kwargs)
+
+        builtins.open = tracking_open
+        try:
+            success, message = registry.load()
+        finally:
+            builtins.open = original_open
+        assert not success and 'Segnaposto non valido' in message and opened == []
+
+        # Nuova modifica: si riprova e il file valido viene caricato
+        write_prompts(path, {'article_generation': {'template': 'Corretto {topic}'}})
+        assert registry.changed()
+        assert registry.load()[0]
+        assert registry.get('article_generation').template == 'Corretto {topic}'
+    print("✅ Test file non valido passato!")
+
+def test_template_errors():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'prompts.json')
+        write_prompts(path, {'article_generation': {'template': 'Scrivi su {topic}: {content}'}})
+        registry = PromptRegistry(path)
+        registry.load()
+        try:
+            registry.get('article_generation').format(topic='chatbot')
+            assert False, "Valore mancante non rilevato"
+        except PromptError:
+            pass
+        try:
+            registry.get('inesistente')
+            assert False, "Template inesistente non rilevato"
+        except PromptError:
+            pass
+    print("✅ Test errori dei template passato!")
+
+def test_repository_prompts():
+    registry = PromptRegistry('config/prompts.json')
+    assert registry.load()[0]
+    assert registry.get('article_generation').fields == {'topic', 'content'}
+    print("✅ Test prompt del repository passato!")
+
+if __name__ == "__main__":
+    test_reload_only_on_change()
+    test_invalid_file_keeps_previous()
+    test_template_errors()
+    test_repository_prompts()
@@ -0,0 +1,47 @@
+import time
+from utils.ranking import BM25Ranker, TermStatistics, document_tokens
+
+ARTICLE = """
+<h2>Come creare un chatbot su WhatsApp</h2>
+<p>Un chatbot permette di rispondere automaticamente ai clienti su WhatsApp.
+In questa guida vediamo come configurare le automazioni del chatbot e le risposte rapide.</p>
+"""
+
+CANDIDATES = [
+    {'title': 'Fatturazione e metodi di pagamento', 'excerpt': 'Gestisci le fatture del tuo account'},
+    {'title': 'Collegare il numero WhatsApp', 'excerpt': 'Configurazione del numero di telefono'},
+    {'title': 'Creare un chatbot', 'excerpt': 'Automazioni e risposte automatiche per i clienti'},
+    {'title': 'Risposte rapide', 'excerpt': 'Messaggi salvati da riutilizzare'},
+]
+
+def test_bm25_orders_by_relevance():
+    ranked = BM25Ranker().rank(ARTICLE, CANDIDATES)
+    titles = [candidate['title'] for candidate in ranked]
+    assert titles[0] == 'Creare un chatbot', titles
+    assert titles[-1] == 'Fatturazione e metodi di pagamento', titles
+    assert len(BM25Ranker().rank(ARTICLE, CANDIDATES, top_k=2)) == 2
+    print("✅ Test ordinamento BM25 passato!")
+
+def test_precomputed_statistics_are_fast():
+    # Corpus fittizio di 2000 documenti per le statistiche precalcolate
+    corpus = [
+        document_tokens(f"Documento {i} whatsapp", f"chatbot {'argomento' if i % 50 == 0 else ''} guida")
+        for i in range(2000)
+    ]
+    stats = TermStatistics.from_token_lists(corpus)
+    assert stats.document_count == 2000
+    # "whatsapp" compare in tutti i documenti: pesa meno di un termine raro
+    assert stats.idf('whatsapp') < stats.idf('argomento') < stats.idf('automazioni')
+
+    ranker = BM25Ranker(stats=stats)
+    candidates = CANDIDATES * 50
+    start = time.perf_counter()
+    ranked = ranker.rank(ARTICLE, candidates, top_k=5)
+    per_candidate = (time.perf_counter() - start) / len(candidates)
+    assert ranked[0]['title'] == 'Creare un chatbot'
+    assert per_candidate < 0.001, f"{per_candidate * 1000:.3f} ms per candidato"
+    print(f"✅ Test statistiche precalcolate passato! {per_candidate * 1e6:.0f} µs per candidato")
+
+if __name__ == "__main__":
+    test_bm25_orders_by_relevance()
+    test_precomputed_statistics_are_fast()
@@ -0,0 +1,47 @@
+import asyncio
+import time
+from utils.related_content import RelatedContentResolver
+from utils.wordpress_handler import DocResult
+
+class FakeWordPressHandler:
+    """Handler finto: ogni keyword restituisce i suoi documenti con un ritardo per risultato"""
+
+    def __init__(self, docs_by_keyword, delays):
+        self.docs_by_keyword = docs_by_keyword
+        self.delays = delays
+
+    async def get_term_statistics(self):
+        return None
+
+    async def iter_docs(self, keyword, on_total=None, use_index=None):
+        for doc_id in self.docs_by_keyword[keyword]:
+            await asyncio.sleep(self.delays[keyword])
+            yield DocResult(doc_id, f"Documento {doc_id}", f"https://example.com/{doc_id}")
+
+def test_concurrent_resolution_with_dedup_and_cancellation():
+    wp_handler = FakeWordPressHandler(
+        docs_by_keyword={
+            'whatsapp': [1, 2, 3],
+            'chatbot': [2, 4, 5],
+            'lento': [6, 7, 8],
+        },
+        delays={'whatsapp': 0.05, 'chatbot': 0.05, 'lento': 2.0}
+    )
+    resolver = RelatedContentResolver(wp_handler)
+
+    start = time.perf_counter()
+    articles, timings = asyncio.run(resolver.resolve(['whatsapp', 'chatbot', 'lento'], max_articles=4))
+    elapsed = time.perf_counter() - start
+
+    ids = [article['id'] for article in articles]
+    # Nessun duplicato (il documento 2 è restituito da due keywords)
+    assert len(ids) == len(set(ids)) == 4, ids
+    assert set(ids) <= {1, 2, 3, 4, 5}
+    # La keyword lenta viene annullata appena si hanno abbastanza risultati
+    assert elapsed < 1.0, f"Ricerche non annullate ({elapsed:.2f}s)"
+    assert timings['lento']['status'] == 'annullata'
+    assert timings['whatsapp']['results'] >= 1 and 'seconds' in timings['chatbot']
+    print(f"✅ Test passato! {len(articles)} articoli in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    test_concurrent_resolution_with_dedup_and_cancellation()
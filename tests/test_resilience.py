@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+import time
+from aiohttp import web
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy, parse_retry_after
+
+def test_retry_then_circuit_opens():
+    policy = ResiliencePolicy(max_attempts=3, base_delay=0.01, max_delay=0.02,
+                              failure_threshold=4, reset_timeout=0.2)
+    calls = []
+
+    async def failing():
+        calls.append(time.perf_counter())
+        return 503
+
+    async def ok():
+        return 200
+
+    def retry_result(status):
+        return status >= 500, None
+
+    async def run():
+        # Primo giro: 3 tentativi falliti, il circuito resta chiuso
+        assert await policy.call('test', failing, retry_result=retry_result) == 503
+        assert len(calls) == 3
+        assert policy.breaker('test').state == CircuitBreaker.CLOSED
+        # Secondo giro: al quarto errore consecutivo il circuito si apre e si smette di ritentare
+        assert await policy.call('test', failing, retry_result=retry_result) == 503
+        assert len(calls) == 4
+        assert policy.breaker('test').state == CircuitBreaker.OPEN
+        # Con il circuito aperto la chiamata fallisce subito
+        try:
+            await policy.call('test', ok, retry_result=retry_result)
+            assert False, "CircuitOpenError attesa"
+        except CircuitOpenError as e:
+            assert e.endpoint == 'test'
+        # Dopo reset_timeout passa una chiamata di prova che richiude il circuito
+        await asyncio.sleep(0.25)
+        assert await policy.call('test', ok, retry_result=retry_result) == 200
+        assert policy.breaker('test').state == CircuitBreaker.CLOSED
+
+    asyncio.run(run())
+    assert policy.stats()['test']['rejected'] == 1
+    assert parse_retry_after('2') == 2.0 and parse_retry_after(None) is None
+    print("✅ Test retry e circuit breaker passato!")
+
+def flaky_app(attempts, failures):
+    # Server WordPress finto: le prime richieste rispondono 503 con Retry-After
+
+    async def handle(request):
+        attempts.append(time.perf_counter())
+        if len(attempts) <= failures:
+            return web.Response(status=503, headers={'Retry-After': '0.2'})
+        return web.json_response(
+            [{'id': 1, 'title': {'rendered': 'Documento'}, 'link': 'https://example.com/1', 'excerpt': {'rendered': ''}}],
+            headers={'X-WP-TotalPages': '1', 'X-WP-Total': '1'}
+        )
+
+    app = web.Application()
+    app.router.add_get('/wp-json/wp/v2/docs', handle)
+    return app
+
+def test_wordpress_honors_retry_after(mock_server, new_wp_handler):
+    async def run():
+        attempts = []
+        runner, base_url = await mock_server(flaky_app(attempts, failures=2))
+        wp_handler = new_wp_handler(base_url)
+        try:
+            success, docs = await wp_handler.search_docs('documento')
+        finally:
+            wp_handler.close()
+            await runner.cleanup()
+        return success, docs, attempts
+
+    success, docs, attempts = asyncio.run(run())
+    assert success and len(docs) == 1, docs
+    assert len(attempts) == 3
+    # Tra un tentativo e l'altro viene rispettata l'attesa indicata da Retry-After
+    assert all(b - a >= 0.18 for a, b in zip(attempts, attempts[1:])), attempts
+    print(f"✅ Test Retry-After passato! {len(attempts)} tentativi")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,42 @@
+import json
+import time
+from utils.token_counter import TokenCounter
+
+def test_exact_offline_count():
+    counter = TokenCounter('gpt-4')
+    assert counter.exact, "Vocabolario cl100k_base non trovato in config/tokenizers"
+    # Valori noti del tokenizer cl100k_base
+    assert counter.count("hello world") == 2
+    assert counter.count("") == 0
+    # Testo italiano e HTML: la stima di 4 caratteri per token sbaglia in entrambe le direzioni
+    text = "<!-- wp:paragraph -->\n<p>Perché l'automazione è più efficace?</p>\n<!-- /wp:paragraph -->"
+    assert counter.count(text) != len(text) // 4
+    assert TokenCounter('gpt-4o-mini').exact
+    print("✅ Test conteggio esatto offline passato!")
+
+def test_template_fast_path():
+    counter = TokenCounter('gpt-4')
+    with open('config/prompts.json', 'r') as f:
+        template = json.load(f)['article_generation']['template']
+    content = "Il chatbot di WhatsApp risponde ai clienti.\n\n" * 400
+    exact = counter.count(template.format(topic="Tono informale", content=content))
+    fast = counter.count_template(template, topic="Tono informale", content=content)
+    # Per eccesso, al massimo un token di margine per segnaposto
+    assert exact <= fast <= exact + 2, (exact, fast)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        counter.count_template(template, topic="Tono informale", content="Breve testo di riferimento")
+    per_call = (time.perf_counter() - start) / 100
+    assert per_call < 0.001, f"{per_call * 1000:.3f} ms per conteggio"
+    print(f"✅ Test parte statica memorizzata passato! {per_call * 1e6:.0f} µs per conteggio")
+
+def test_fallback_for_unknown_model():
+    counter = TokenCounter('modello-sconosciuto')
+    assert not counter.exact and counter.count("a" * 40) == 10
+    print("✅ Test stima di ripiego passato!")
+
+if __name__ == "__main__":
+    test_exact_offline_count()
+    test_template_fast_path()
+    test_fallback_for_unknown_model()
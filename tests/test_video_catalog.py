@@ -0,0 +1,41 @@
+import os
+import tempfile
+import time
+from utils.video_catalog import VideoCatalog
+
+VIDEOS = [
+    {'id': 'a1', 'title': 'Come creare un chatbot su WhatsApp', 'description': 'Guida passo passo', 'tags': ['chatbot', 'automazioni']},
+    {'id': 'b2', 'title': 'Campagne marketing', 'description': 'Invia messaggi broadcast ai clienti', 'tags': ['broadcast']},
+    {'id': 'c3', 'title': 'Webinar di presentazione', 'description': 'Panoramica della piattaforma', 'tags': ['chatbot']},
+    {'id': 'd4', 'title': 'Fatturazione', 'description': 'Gestione dei pagamenti', 'tags': []},
+]
+
+def test_local_search_and_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.json')
+        catalog = VideoCatalog(path, max_age=3600)
+        assert catalog.is_stale() and catalog.search(['chatbot']) == []
+
+        catalog.replace(VIDEOS)
+        assert not catalog.is_stale()
+
+        results = catalog.search(['chatbot', 'whatsapp'], max_results=5)
+        ids = [video['id'] for video in results]
+        # Il titolo pesa più dei soli tag; i video senza keyword non vengono restituiti
+        assert ids == ['a1', 'c3'], ids
+        assert results[0]['url'] == 'https://www.youtube.com/watch?v=a1'
+
+        # Il catalogo viene ricaricato da disco (es. dopo un riavvio del bot)
+        reloaded = VideoCatalog(path, max_age=3600)
+        assert len(reloaded) == len(VIDEOS)
+        assert [video['id'] for video in reloaded.search(['broadcast'])] == ['b2']
+
+        start = time.perf_counter()
+        for _ in range(100):
+            reloaded.search(['chatbot', 'whatsapp'])
+        per_search = (time.perf_counter() - start) / 100
+    assert per_search < 0.001, f"{per_search * 1000:.3f} ms per ricerca"
+    print(f"✅ Test catalogo video passato! {per_search * 1e6:.0f} µs per ricerca")
+
+if __name__ == "__main__":
+    test_local_search_and_persistence()
@@ -0,0 +1,149 @@
+import asyncio
+import cloudscraper
+import pytest
+import time
+from aiohttp import web
+
+# Server WordPress finto in locale: ogni pagina risponde dopo un ritardo fisso
+PAGE_DELAY = 0.3
+TOTAL_PAGES = 3
+
+def mock_app(requests_log=None):
+    async def handle(request):
+        if requests_log is not None:
+            requests_log.append(dict(request.query))
+        page = int(request.query.get('page', '1'))
+        search = request.query.get('search', '')
+        await asyncio.sleep(PAGE_DELAY)
+        docs = [
+            {
+                'id': page * 100 + i,
+                'title': {'rendered': f"{search} pagina {page} #{i}"},
+                'link': f"https://example.com/{search}/{page}/{i}",
+                'excerpt': {'rendered': ''}
+            }
+            for i in range(2)
+        ]
+        return web.json_response(docs, headers={
+            'X-WP-TotalPages': str(TOTAL_PAGES),
+            'X-WP-Total': str(TOTAL_PAGES * 2)
+        })
+
+    app = web.Application()
+    app.router.add_get('/wp-json/wp/v2/docs', handle)
+    return app
+
+async def run_concurrent_searches(mock_server, new_wp_handler):
+    runner, base_url = await mock_server(mock_app())
+    wp_handler = new_wp_handler(base_url)
+    max_stall = 0.0
+    searching = True
+
+    async def heartbeat():
+        # Misura il ritardo massimo dell'event loop mentre le ricerche sono in corso
+        nonlocal max_stall
+        while searching:
+            start = time.perf_counter()
+            await asyncio.sleep(0.05)
+            max_stall = max(max_stall, time.perf_counter() - start - 0.05)
+
+    try:
+        beat = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            wp_handler.search_docs("whatsapp", use_index=False),
+            wp_handler.search_docs("chatbot", use_index=False),
+        )
+        elapsed = time.perf_counter() - start
+        searching = False
+        await beat
+        return results, elapsed, max_stall
+    finally:
+        wp_handler.close()
+        await runner.cleanup()
+
+async def run_single_search(mock_server, new_wp_handler):
+    runner, base_url = await mock_server(mock_app())
+    wp_handler = new_wp_handler(base_url)
+    try:
+        start = time.perf_counter()
+        success, docs = await wp_handler.search_docs("whatsapp", use_index=False)
+        return success, docs, time.perf_counter() - start
+    finally:
+        wp_handler.close()
+        await runner.cleanup()
+
+def test_pages_fetched_in_parallel_and_in_order(mock_server, new_wp_handler):
+    success, docs, elapsed = asyncio.run(run_single_search(mock_server, new_wp_handler))
+
+    assert success, docs
+    # Le pagine vengono riunite nell'ordine originale
+    pages = [int(doc['link'].split('/')[-2]) for doc in docs]
+    assert pages == sorted(pages), pages
+    # Prima pagina da sola, le altre in parallelo: circa due round-trip invece di TOTAL_PAGES
+    assert elapsed < TOTAL_PAGES * PAGE_DELAY, f"Pagine scaricate in sequenza ({elapsed:.2f}s)"
+    print(f"✅ Test passato! {len(docs)} risultati in {elapsed:.2f}s")
+
+async def run_streaming_search(mock_server, new_wp_handler):
+    requests_log = []
+    runner, base_url = await mock_server(mock_app(requests_log))
+    wp_handler = new_wp_handler(base_url)
+    totals = []
+    try:
+        start = time.perf_counter()
+        stream = wp_handler.iter_docs("whatsapp", on_total=totals.append, use_index=False)
+        try:
+            async for doc in stream:
+                first = doc
+                first_elapsed = time.perf_counter() - start
+                break
+        finally:
+            await stream.aclose()
+        return first, first_elapsed, totals, requests_log, len(wp_handler.search_cache)
+    finally:
+        wp_handler.close()
+        await runner.cleanup()
+
+def test_streaming_search_stops_early(mock_server, new_wp_handler):
+    first, first_elapsed, totals, requests_log, cached = asyncio.run(run_streaming_search(mock_server, new_wp_handler))
+
+    # Il primo risultato arriva dopo la prima pagina, senza attendere le altre
+    assert first_elapsed < 2 * PAGE_DELAY, f"Primo risultato dopo {first_elapsed:.2f}s"
+    assert first.title == "whatsapp pagina 1 #0"
+    assert totals == [TOTAL_PAGES * 2]
+    # Le richieste usano la proiezione dei campi
+    assert requests_log[0]['_fields'] == 'id,title,link,excerpt'
+    # Una ricerca interrotta non viene messa in cache
+    assert cached == 0
+    print(f"✅ Test passato! Primo risultato dopo {first_elapsed:.2f}s")
+
+def test_searches_do_not_block_event_loop(mock_server, new_wp_handler):
+    results, elapsed, max_stall = asyncio.run(run_concurrent_searches(mock_server, new_wp_handler))
+
+    for success, docs in results:
+        assert success, docs
+        assert len(docs) == TOTAL_PAGES * 2
+
+    # Le due ricerche procedono in parallelo: il tempo totale non è la somma delle due
+    assert elapsed < 2 * TOTAL_PAGES * PAGE_DELAY, f"Ricerche serializzate ({elapsed:.2f}s)"
+    # L'event loop resta reattivo durante le richieste HTTP
+    assert max_stall < PAGE_DELAY / 2, f"Event loop bloccato per {max_stall:.2f}s"
+    print(f"✅ Test passato! Tempo totale {elapsed:.2f}s, blocco massimo del loop {max_stall * 1000:.0f}ms")
+
+def test_connection_pool_sized_to_workers(new_wp_handler):
+    wp_handler = new_wp_handler()
+    try:
+        https = wp_handler.scraper.get_adapter('https://example.com')
+        http = wp_handler.scraper.get_adapter('http://example.com')
+        # Il pool di ogni adapter accetta tante connessioni quanti sono i worker
+        for adapter in (https, http):
+            assert adapter.poolmanager.connection_pool_kw['maxsize'] == wp_handler.max_workers
+        # L'adapter https resta quello di cloudscraper, con il suo contesto SSL
+        assert isinstance(https, cloudscraper.CipherSuiteAdapter)
+        assert https.poolmanager.connection_pool_kw['ssl_context'] is https.ssl_context
+    finally:
+        wp_handler.close()
+    print("✅ Test dimensione del pool di connessioni passato!")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
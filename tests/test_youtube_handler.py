@@ -0,0 +1,173 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from utils.youtube_handler import YouTubeHandler, get_youtube_handler, parse_duration
+from utils.youtube_quota import QuotaTracker
+
+class SlowRequest:
+    """Richiesta finta di googleapiclient: execute() blocca il thread per un po'"""
+
+    def __init__(self, delay, log):
+        self.delay = delay
+        self.log = log
+
+    def execute(self, http=None):
+        self.log.append((threading.current_thread().name, id(http)))
+        time.sleep(self.delay)
+        return {'items': []}
+
+def test_shared_client_without_network():
+    start = time.perf_counter()
+    handler = get_youtube_handler()
+    elapsed = time.perf_counter() - start
+    assert get_youtube_handler() is handler
+    assert hasattr(handler.youtube, 'search') and hasattr(handler.youtube, 'channels')
+    print(f"✅ Test client condiviso passato! Creato in {elapsed * 1000:.0f} ms")
+
+def test_requests_run_off_loop():
+    handler = YouTubeHandler()
+    log = []
+    max_stall = 0.0
+    running = True
+
+    async def heartbeat():
+        # Misura il ritardo massimo dell'event loop mentre le richieste sono in corso
+        nonlocal max_stall
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.02)
+            max_stall = max(max_stall, time.perf_counter() - start - 0.02)
+
+    async def run():
+        nonlocal running
+        beat = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            handler._execute(f'test:{i}', SlowRequest(0.3, log)) for i in range(4)
+        ))
+        elapsed = time.perf_counter() - start
+        running = False
+        await beat
+        return elapsed
+
+    # Le chiamate finte vengono addebitate su una quota temporanea, non su quella giornaliera del bot
+    with tempfile.TemporaryDirectory() as tmp:
+        handler.quota = QuotaTracker(os.path.join(tmp, 'quota.json'))
+        try:
+            elapsed = asyncio.run(run())
+        finally:
+            handler.close()
+        charged = handler.quota.stats()
+
+    assert elapsed < 0.6, f"Richieste non parallele ({elapsed:.2f}s)"
+    assert max_stall < 0.1, f"Event loop bloccato per {max_stall:.2f}s"
+    # Ogni thread usa la propria connessione httplib2
+    assert all(name.startswith('youtube-api') for name, _ in log)
+    assert len({http for _, http in log}) == len({name for name, _ in log})
+    assert len(charged['by_endpoint']) == 4 and charged['used'] > 0
+    print(f"✅ Test richieste fuori dal loop passato! {elapsed:.2f}s, blocco massimo {max_stall * 1000:.0f} ms")
+
+def test_channel_info_stale_while_revalidate():
+    handler = YouTubeHandler()
+    handler.channel_cache.ttl = 0.05
+    calls = []
+
+    async def fake_execute(endpoint, request):
+        calls.append(endpoint)
+        await asyncio.sleep(0.1)
+        return {'items': [{
+            'snippet': {'title': f"Canale v{len(calls)}", 'description': ''},
+            'statistics': {'subscriberCount': '1', 'videoCount': '1'}
+        }]}
+
+    handler._execute = fake_execute
+
+    async def run():
+        _, first = await handler.get_channel_info('UC1')
+        await asyncio.sleep(0.1)
+        # Voce scaduta: risposta immediata dalla cache, aggiornamento in background
+        start = time.perf_counter()
+        _, stale = await handler.get_channel_info('UC1')
+        elapsed = time.perf_counter() - start
+        await asyncio.gather(*handler._channel_refreshes.values())
+        _, fresh = await handler.get_channel_info('UC1')
+        return first, stale, fresh, elapsed
+
+    try:
+        first, stale, fresh, elapsed = asyncio.run(run())
+    finally:
+        handler.close()
+    assert first['title'] == stale['title'] == 'Canale v1'
+    assert fresh['title'] == 'Canale v2'
+    assert elapsed < 0.01, f"Risposta non servita dalla cache ({elapsed:.3f}s)"
+    assert len(calls) == 2
+    print("✅ Test stale-while-revalidate delle info canale passato!")
+
+def test_batched_enrichment_and_best_videos():
+    handler = YouTubeHandler()
+    requested = []
+    details = {
+        'v1': ('PT30S', 500000),      # Short: scartato
+        'v2': ('PT8M10S', 100),
+        'v3': ('PT1H2M', 90000),
+        'v4': ('PT12M', 50),
+    }
+
+    async def fake_execute(endpoint, request):
+        # maxResults non è ammesso insieme a id in videos.list
+        assert 'maxResults' not in request.uri, request.uri
+        ids = request.uri.split('id=')[1].split('&')[0].split('%2C')
+        requested.append(ids)
+        return {'items': [
+            {
+                'id': video_id,
+                'snippet': {'publishedAt': '2024-01-01T00:00:00Z'},
+                'statistics': {'viewCount': str(details[video_id][1])},
+                'contentDetails': {'duration': details[video_id][0]}
+            }
+            for video_id in ids
+        ]}
+
+    handler._execute = fake_execute
+    candidates = [{'id': video_id, 'title': video_id, 'url': ''} for video_id in details]
+
+    async def run():
+        best = await handler.select_best_videos(candidates, 2)
+        again = await handler.select_best_videos(candidates, 2)
+        return best, again
+
+    try:
+        best, again = asyncio.run(run())
+    finally:
+        handler.close()
+    # Una sola chiamata per tutti gli ID, poi solo cache
+    assert requested == [['v1', 'v2', 'v3', 'v4']], requested
+    assert [video['id'] for video in best] == ['v3', 'v2'], best
+    assert best == again and best[0]['duration'] == 3720
+    assert parse_duration('P1DT1S') == 86401 and parse_duration('') == 0
+    print("✅ Test arricchimento in blocco dei video passato!")
+
+def test_search_titles_plain_text():
+    handler = YouTubeHandler()
+    handler.quota = None
+
+    async def fake_execute(endpoint, request):
+        # search.list restituisce i titoli con entità HTML
+        return {'items': [{'id': {'videoId': 'v1'}, 'snippet': {'title': 'Bot &amp; CRM: l&#39;integrazione'}}]}
+
+    handler._execute = fake_execute
+    try:
+        success, videos = asyncio.run(handler.search_videos(['crm'], use_catalog=False))
+    finally:
+        handler.close()
+    assert success and videos[0]['title'] == "Bot & CRM: l'integrazione", videos
+    print("✅ Test titoli dei video in testo semplice passato!")
+
+if __name__ == "__main__":
+    test_shared_client_without_network()
+    test_requests_run_off_loop()
+    test_channel_info_stale_while_revalidate()
+    test_batched_enrichment_and_best_videos()
+    test_search_titles_plain_text()
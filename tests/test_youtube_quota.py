@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+import tempfile
+from utils.youtube_quota import QuotaExceededError, QuotaTracker
+
+def test_budget_policy_and_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'quota.json')
+        quota = QuotaTracker(path, daily_limit=300, search_threshold=0.8)
+
+        # Due ricerche (200 unità) stanno sotto la soglia di 240, la terza no
+        quota.record('youtube:search')
+        quota.record('youtube:search')
+        assert not quota.allows('youtube:search')
+        # Le letture da 1 unità restano consentite fino al limite giornaliero
+        quota.record('youtube:videos')
+        assert quota.allows('youtube:videos')
+        try:
+            quota.record('youtube:search')
+            assert False, "QuotaExceededError attesa"
+        except QuotaExceededError:
+            pass
+
+        # I contatori sopravvivono al riavvio del bot
+        reloaded = QuotaTracker(path, daily_limit=300)
+        stats = reloaded.stats()
+        assert stats['used'] == 201 and stats['by_endpoint'] == {'youtube:search': 200, 'youtube:videos': 1}
+        assert 0 < stats['reset_in'] <= 25 * 3600
+
+        # I contatori di un altro giorno (ora del Pacifico) vengono ignorati
+        with open(path, 'w') as f:
+            json.dump({'day': '2000-01-01', 'used': 299, 'by_endpoint': {}}, f)
+        assert QuotaTracker(path, daily_limit=300).stats()['used'] == 0
+
+        reloaded.exhaust()
+        assert not reloaded.allows('youtube:videos')
+    print("✅ Test quota YouTube passato!")
+
+def test_debounced_save_in_event_loop():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'quota.json')
+        quota = QuotaTracker(path, daily_limit=300, save_delay=0.05)
+
+        async def run():
+            # Nell'event loop le chiamate non scrivono subito: una sola scrittura differita
+            for _ in range(5):
+                quota.record('youtube:videos')
+            assert not os.path.exists(path)
+            await asyncio.sleep(0.2)
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            quota.record('youtube:channels')
+            return saved
+
+        saved = asyncio.run(run())
+        assert saved['used'] == 5 and saved['by_endpoint'] == {'youtube:videos': 5}, saved
+        # La scrittura ancora in attesa viene completata da flush (chiusura del bot)
+        quota.flush()
+        assert QuotaTracker(path, daily_limit=300).stats()['used'] == 6
+    print("✅ Test salvataggio differito della quota passato!")
+
+if __name__ == "__main__":
+    test_budget_policy_and_persistence()
+    test_debounced_save_in_event_loop()
@@ -1,8 +1,8 @@
 # ==========================================================
 # ai_handler.py
-# Descrizione: Gestisce la comunicazione asincrona con l'API OpenAI/ChatGPT per la generazione di articoli e risposte. Carica e valida la configurazione AI e i prompt.
-# Dipendenze principali: openai, dotenv, logging, config/config.json, config/prompts.json, asyncio, os, json.
-# Flusso di lavoro: Invocato dai cog (soprattutto draft_cog) per generare contenuti tramite AI, stimare token e gestire i prompt dinamicamente.
+# Descrizione: Gestisce la comunicazione asincrona con l'API OpenAI/ChatGPT per la generazione di articoli e risposte, anche in streaming. Carica e valida la configurazione AI e i prompt.
+# Dipendenze principali: openai, dotenv, logging, config/config.json, config/prompts.json, asyncio, os, json, time, utils.ai_scheduler, utils.ai_transport, utils.completion_cache, utils.model_router, utils.prompt_registry, utils.text_chunker, utils.token_counter.
+# Flusso di lavoro: Invocato dai cog (soprattutto draft_cog) per generare contenuti tramite AI, contare i token (tokenizer BPE locale), condensare il materiale di riferimento troppo lungo (riassunti delle parti in parallelo, poi un'unica sintesi) e gestire i prompt dinamicamente (registro in memoria ricaricato solo quando il file cambia). Le risposte vengono salvate in una cache su disco indirizzata per contenuto, così che rigenerare lo stesso articolo sia immediato. Le generazioni passano da uno scheduler globale con coda equa per utente e il modello di ogni articolo viene scelto in base alla dimensione del prompt, alla latenza misurata e al costo. Il client usa un trasporto HTTP condiviso con connessioni keep-alive aperte in anticipo (warm-up).
 # ==========================================================
 import os
 import json
@@ -10,19 +10,104 @@ from dotenv import load_dotenv
 from openai import AsyncOpenAI
 import logging
 import asyncio
+import time
+from utils.ai_scheduler import AIScheduler
+from utils.ai_transport import AIHttpTransport
+from utils.completion_cache import CompletionCache
+from utils.model_router import ModelRouter
+from utils.prompt_registry import PromptRegistry
+from utils.text_chunker import split_into_chunks
+from utils.token_counter import TokenCounter
 
 # Configurazione del logger
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "Sei un assistente esperto nella scrittura di documentazione tecnica."
+
+# Istanza condivisa tra i cog (un solo client, una sola cache delle risposte)
+_shared_handler = None
+
+def get_ai_handler():
+    """
+    Restituisce l'istanza condivisa di AIHandler, creandola al primo utilizzo.
+    
+    Returns:
+        AIHandler: L'handler condiviso da tutti i cog
+    """
+    global _shared_handler
+    if _shared_handler is None:
+        _shared_handler = AIHandler()
+    return _shared_handler
+
 class AIHandler:
-    def __init__(self):
+    def __init__(self, completion_cache_path=None):
+        """
+        Args:
+            completion_cache_path (str, optional): File della cache delle risposte (default: quello di config.json)
+        """
         load_dotenv()
         self.load_config()
         api_key = os.getenv('AI_API_KEY')
         if not api_key:
             raise ValueError("AI_API_KEY non trovata nelle variabili d'ambiente")
-        self.client = AsyncOpenAI(api_key=api_key)
+        
+        # Trasporto HTTP condiviso: pool keep-alive, HTTP/2 opzionale e timeout dalla configurazione
+        self.http_transport = AIHttpTransport(
+            max_connections=self.http_config.get('max_connections', 10),
+            max_keepalive_connections=self.http_config.get('max_keepalive_connections', 5),
+            keepalive_expiry=self.http_config.get('keepalive_expiry', 300.0),
+            http2=self.http_config.get('http2', True),
+            connect_timeout=self.http_config.get('connect_timeout', 10.0),
+            read_timeout=self.http_config.get('read_timeout', 120.0),
+            write_timeout=self.http_config.get('write_timeout', 30.0),
+            pool_timeout=self.http_config.get('pool_timeout', 30.0)
+        )
+        self.warmup_connections = self.http_config.get('warmup', {}).get('connections', 2)
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=self.http_config.get('base_url') or None,
+            http_client=self.http_transport.client
+        )
+        self.token_counter = TokenCounter(self.model)
         self.load_prompts()
+        
+        # Sintesi a più passaggi (map-reduce) del materiale di riferimento troppo lungo
+        self.condense_enabled = self.condense_config.get('enabled', True)
+        self.condense_chunk_tokens = self.condense_config.get('chunk_tokens', 2000)
+        self.condense_summary_tokens = self.condense_config.get('summary_tokens', 500)
+        self.condense_brief_tokens = self.condense_config.get('brief_tokens', 1500)
+        self.condense_max_concurrency = self.condense_config.get('max_concurrency', 4)
+        self.condense_max_rounds = self.condense_config.get('max_rounds', 4)
+        self.condense_temperature = self.condense_config.get('temperature', 0.3)
+        
+        # Cache persistente delle risposte, con chiave l'hash di modello, temperatura e messaggi
+        self.completion_cache = None
+        if self.completion_cache_config.get('enabled', True):
+            self.completion_cache = CompletionCache(
+                completion_cache_path or self.completion_cache_config.get('path', 'data/ai_cache.sqlite3'),
+                max_bytes=self.completion_cache_config.get('max_bytes', 50_000_000)
+            )
+        
+        # Coda globale delle generazioni: concorrenza massima, turni equi per utente e token al minuto
+        self.scheduler = AIScheduler(
+            max_in_flight=self.scheduler_config.get('max_in_flight', 3),
+            tokens_per_minute=self.scheduler_config.get('tokens_per_minute', 0)
+        )
+        
+        # Scelta del modello per ogni articolo (senza routing si usa sempre il modello configurato)
+        self.router = None
+        if self.routing_config.get('enabled', False):
+            try:
+                self.router = ModelRouter(
+                    self.routing_config.get('models', {}),
+                    self.token_limits,
+                    output_tokens=self.routing_config.get('output_tokens', 2500),
+                    latency_weight=self.routing_config.get('latency_weight', 1.0),
+                    cost_weight=self.routing_config.get('cost_weight', 0.5),
+                    ewma_alpha=self.routing_config.get('ewma_alpha', 0.3)
+                )
+            except ValueError as e:
+                logger.error(f"Routing dei modelli disattivato: {str(e)}")
 
     def load_config(self):
         try:
@@ -31,6 +116,12 @@ class AIHandler:
                 self.model = config.get('ai', {}).get('model', 'gpt-3.5-turbo')
                 self.temperature = config.get('ai', {}).get('temperature', 0.7)
                 self.max_tokens_ratio = config.get('ai', {}).get('max_tokens_ratio', 0.8)
+                self.stream_idle_timeout = config.get('ai', {}).get('stream_idle_timeout', 60.0)
+                self.condense_config = config.get('ai', {}).get('condense', {})
+                self.completion_cache_config = config.get('ai', {}).get('completion_cache', {})
+                self.scheduler_config = config.get('ai', {}).get('scheduler', {})
+                self.routing_config = config.get('ai', {}).get('routing', {})
+                self.http_config = config.get('ai', {}).get('http', {})
                 self.token_limits = config.get('ai', {}).get('token_limits', {
                     'gpt-3.5-turbo': 4096,
                     'gpt-4': 8192,
@@ -42,6 +133,12 @@ class AIHandler:
             self.model = 'gpt-3.5-turbo'
             self.temperature = 0.7
             self.max_tokens_ratio = 0.8
+            self.stream_idle_timeout = 60.0
+            self.condense_config = {}
+            self.completion_cache_config = {}
+            self.scheduler_config = {}
+            self.routing_config = {}
+            self.http_config = {}
             self.token_limits = {
                 'gpt-3.5-turbo': 4096,
                 'gpt-4': 8192,
@@ -49,79 +146,334 @@ class AIHandler:
             }
 
     def load_prompts(self):
+        self.prompt_registry = PromptRegistry('config/prompts.json')
+        self.prompt_registry.load()
+
+    async def reload_prompts(self):
+        """Ricarica i prompt da file (anche se non sono cambiati)."""
+        return await asyncio.to_thread(self.prompt_registry.load, True)
+
+    async def reload_prompts_if_changed(self):
+        """
+        Ricarica i prompt solo se il file è cambiato (controllo con stat, senza rileggere il file).
+        
+        Returns:
+            tuple: (success, message), oppure None se il file non è cambiato
+        """
+        if not self.prompt_registry.changed():
+            return None
+        return await asyncio.to_thread(self.prompt_registry.load)
+
+    def estimate_tokens(self, text: str) -> int:
+        # Conteggio esatto con il tokenizer del modello (stima di 4 caratteri per token se non disponibile)
+        return self.token_counter.count(text)
+
+    async def count_tokens(self, text: str) -> int:
+        """Come estimate_tokens, ma fuori dall'event loop: da usare per il materiale di riferimento, che può essere lungo."""
+        return await asyncio.to_thread(self.token_counter.count, text)
+
+    def _candidate_models(self) -> list:
+        # Modelli che possono aver generato un articolo: con il routing la scelta dipende dalla latenza
+        # misurata e può cambiare tra due tentativi con lo stesso prompt
+        if self.router is None:
+            return [self.model]
+        return list(dict.fromkeys([*self.router.models, self.model]))
+
+    async def _cached_completion(self, messages: list, temperature: float, use_cache: bool = True, model: str = None,
+                                 alternatives: list = None):
+        # Restituisce (chiave, testo salvato); la chiave è None se la cache è disattivata.
+        # Con use_cache=False non si legge la cache, ma la chiave serve a sostituire la risposta salvata.
+        # Se la richiesta non è in cache per il modello scelto, si cerca la stessa richiesta per i modelli alternativi
+        if self.completion_cache is None:
+            return None, None
+        model = model or self.model
+        key = CompletionCache.key(model, temperature, messages)
+        if not use_cache:
+            return key, None
+        keys = [key] + [
+            CompletionCache.key(other, temperature, messages) for other in (alternatives or []) if other != model
+        ]
         try:
-            with open('config/prompts.json', 'r') as f:
-                self.prompts = json.load(f)
-            logger.info("Prompt caricati correttamente")
+            _, text = await asyncio.to_thread(self.completion_cache.get_any, keys)
+            return key, text
         except Exception as e:
-            logger.error(f"Errore nel caricamento dei prompt: {str(e)}")
-            self.prompts = {}
+            logger.warning(f"Errore nella lettura della cache dell'AI: {str(e)}")
+            return key, None
 
-    async def reload_prompts(self):
-        """Ricarica i prompt da file."""
+    async def _store_completion(self, key: str, text: str, model: str = None):
+        if key is None:
+            return
         try:
-            with open('config/prompts.json', 'r') as f:
-                self.prompts = json.load(f)
-            logger.info("Prompt ricaricati correttamente")
-            return True, "Prompt ricaricati con successo"
+            await asyncio.to_thread(self.completion_cache.put, key, model or self.model, text)
         except Exception as e:
-            logger.error(f"Errore nel ricaricamento dei prompt: {str(e)}")
-            return False, f"Errore nel ricaricamento dei prompt: {str(e)}"
+            logger.warning(f"Errore nel salvataggio nella cache dell'AI: {str(e)}")
 
-    def estimate_tokens(self, text: str) -> int:
-        # Stima approssimativa: 1 token ≈ 4 caratteri in italiano
-        return len(text) // 4
+    def scheduler_stats(self) -> dict:
+        """Restituisce lo stato della coda delle generazioni."""
+        return self.scheduler.stats()
+
+    def model_router_stats(self):
+        """Restituisce scelte e latenze stimate per modello (None se il routing è disattivato)."""
+        if self.router is None:
+            return None
+        return self.router.stats()
+
+    def completion_cache_stats(self):
+        """Restituisce le statistiche della cache delle risposte (None se disattivata)."""
+        if self.completion_cache is None:
+            return None
+        return self.completion_cache.stats()
+
+    def connection_stats(self):
+        """Restituisce le statistiche di riuso delle connessioni verso l'API."""
+        return self.http_transport.stats()
+
+    async def warm_up(self):
+        """
+        Apre in anticipo le connessioni verso l'API, così che la prossima generazione non paghi
+        connessione e handshake TLS.
+        
+        Returns:
+            tuple: (success, message)
+        """
+        success, message = await self.http_transport.warm_up(self.client, self.warmup_connections)
+        if success:
+            logger.info(message)
+        else:
+            logger.warning(message)
+        return success, message
+
+    async def _prepare_article_request(self, topic: str, content: str):
+        """
+        Prepara i messaggi e il limite di token per la generazione di un articolo.
+        
+        Args:
+            topic (str): Il topic o le istruzioni per l'articolo
+            content (str): Il contenuto del file allegato, se presente
+            
+        Returns:
+            tuple: (model, messages, max_tokens)
+            
+        Raises:
+            Exception: Se il prompt è troppo lungo per il modello
+        """
+        # Ottieni il template (già validato e in memoria)
+        prompt = self.prompt_registry.get('article_generation')
+        
+        # Formatta il template con topic e content
+        formatted_prompt = prompt.format(topic=topic, content=content)
+        
+        # Conta i token del prompt: la parte statica del template è memorizzata, si tokenizzano solo i valori
+        estimated_tokens = (
+            await asyncio.to_thread(self.token_counter.count_template, prompt.template, topic=str(topic), content=str(content))
+            + self.token_counter.count_messages([{"content": SYSTEM_PROMPT}, {"content": ""}])
+        )
+        # Modello per questa richiesta: scelto in base a dimensione, latenza e costo se il routing è attivo
+        model = self.router.choose(estimated_tokens) if self.router else self.model
+        model_limit = self.token_limits[model]
+        
+        # Calcola i token rimanenti per la risposta, lasciando un margine di sicurezza del 10%
+        remaining_tokens = int((model_limit - estimated_tokens) * 0.9)
+        logger.debug(f"Token stimati: {estimated_tokens}, Limite modello: {model_limit}, Token per risposta: {remaining_tokens}")
+        
+        if estimated_tokens > model_limit * 0.9:  # Se il prompt usa più del 90% dei token
+            logger.error(f"Prompt troppo lungo: {estimated_tokens} tokens > {model_limit * 0.9} limite")
+            raise Exception(f"Il prompt è troppo lungo per il modello {model} (stimati {estimated_tokens} tokens, limite {int(model_limit * 0.9)})")
+        
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": formatted_prompt}
+        ]
+        return model, messages, remaining_tokens
 
-    async def generate_article(self, topic: str, content: str = "") -> str:
+    def _prompt_overhead(self, name: str, **values) -> int:
+        # Token del prompt senza il materiale di riferimento: template, valori e messaggi di sistema
+        prompt = self.prompt_registry.get(name)
+        return (
+            self.token_counter.count_template(prompt.template, **values)
+            + self.token_counter.count_messages([{"content": SYSTEM_PROMPT}, {"content": ""}])
+        )
+
+    def reference_budget(self, topic: str = "") -> int:
+        """
+        Restituisce i token disponibili per il materiale di riferimento nel prompt dell'articolo
+        (quota max_tokens_ratio del limite del modello, il resto è riservato alla risposta).
+        Con il routing attivo vale il modello con la finestra più ampia.
+        """
+        model_limit = self.token_limits[self.router.largest_model if self.router else self.model]
+        return int(model_limit * self.max_tokens_ratio) - self._prompt_overhead('article_generation', topic=str(topic), content="")
+
+    async def estimate_job_tokens(self, topic: str, content: str) -> int:
+        """
+        Stima i token che una generazione richiederà al provider (prompt e risposta),
+        inclusi i riassunti se il materiale di riferimento deve essere condensato.
+        Usata dallo scheduler per il budget di token al minuto.
+        """
+        overhead = self._prompt_overhead('article_generation', topic=str(topic), content="")
+        content_tokens = await self.count_tokens(str(content))
+        
+        def article_tokens(reference_tokens):
+            # Prompt dell'articolo più i token riservati alla risposta (come in _prepare_article_request)
+            prompt_tokens = overhead + reference_tokens
+            model = self.router.select(prompt_tokens)[0] if self.router else self.model
+            return prompt_tokens + max(int((self.token_limits[model] - prompt_tokens) * 0.9), 0)
+        
+        if not self.condense_enabled or content_tokens <= self.reference_budget(topic):
+            return article_tokens(content_tokens)
+        # Riassunti delle parti (ingresso e uscita), sintesi finale e articolo sulla sintesi
+        chunks = -(-content_tokens // self.condense_chunk_tokens)
+        return (
+            content_tokens + chunks * self.condense_summary_tokens
+            + 2 * self.condense_brief_tokens + article_tokens(self.condense_brief_tokens)
+        )
+
+    async def _complete(self, messages: list, max_tokens: int, temperature: float, use_cache: bool = True) -> str:
+        # Chiamata non in streaming con timeout, usata per i riassunti del materiale di riferimento
+        key, cached = await self._cached_completion(messages, temperature, use_cache)
+        if cached is not None:
+            return cached
+        try:
+            response = await asyncio.wait_for(
+                self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                ),
+                timeout=120.0
+            )
+        except asyncio.TimeoutError:
+            logger.error("Timeout durante la chiamata a OpenAI")
+            raise Exception("Il riassunto del materiale di riferimento ha impiegato troppo tempo. Riprova più tardi.")
+        if not response or not response.choices or not response.choices[0].message.content:
+            raise Exception("Nessuna risposta generata dal modello")
+        text = response.choices[0].message.content.strip()
+        await self._store_completion(key, text)
+        return text
+
+    async def _summarize(self, name: str, max_tokens: int, use_cache: bool = True, **values) -> str:
+        prompt = self.prompt_registry.get(name)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt.format(**values)}
+        ]
+        return await self._complete(messages, max_tokens, self.condense_temperature, use_cache)
+
+    async def condense_reference(self, topic: str, content: str, on_progress=None, use_cache: bool = True) -> str:
+        """
+        Condensa il materiale di riferimento se non entra nel prompt dell'articolo (map-reduce):
+        il testo viene diviso ai confini dei paragrafi, le parti vengono riassunte in parallelo
+        (al massimo condense.max_concurrency alla volta) e i riassunti vengono uniti in un'unica sintesi.
+        Se i riassunti sono ancora troppo lunghi per la sintesi si ripete il passaggio sui riassunti.
+        
+        Args:
+            topic (str): Il topic o le istruzioni per l'articolo
+            content (str): Il materiale di riferimento
+            on_progress (callable, optional): Funzione chiamata con (fase, completate, totale);
+                la fase è "map" per i riassunti delle parti e "reduce" per la sintesi finale
+            use_cache (bool, optional): Se False ignora i riassunti salvati nella cache e li rigenera
+            
+        Returns:
+            str: Il materiale originale se entra nel prompt, altrimenti la sintesi
+            
+        Raises:
+            Exception: Se la sintesi fallisce o resta troppo lunga
+        """
+        budget = self.reference_budget(topic)
+        original_tokens = await self.count_tokens(str(content))
+        if not self.condense_enabled or original_tokens <= budget:
+            return content
+        
+        model_limit = int(self.token_limits[self.model] * 0.9)
+        # Parti abbastanza piccole da lasciare spazio al riassunto nella finestra del modello
+        chunk_tokens = min(
+            self.condense_chunk_tokens,
+            model_limit - self.condense_summary_tokens - self._prompt_overhead('reference_chunk_summary', content="")
+        )
+        # Riassunti che possono essere uniti in un'unica sintesi
+        reduce_tokens = model_limit - self.condense_brief_tokens - self._prompt_overhead('reference_brief', topic=str(topic), content="")
+        if chunk_tokens <= 0 or reduce_tokens <= 0:
+            raise Exception(f"Il modello {self.model} non ha spazio sufficiente per riassumere il materiale di riferimento")
+        logger.info(f"Materiale di riferimento troppo lungo ({original_tokens} tokens, disponibili {budget}): sintesi a più passaggi")
+        
+        semaphore = asyncio.Semaphore(self.condense_max_concurrency)
+        text = str(content)
+        for round_number in range(1, self.condense_max_rounds + 1):
+            chunks = await asyncio.to_thread(split_into_chunks, text, self.token_counter.count, chunk_tokens)
+            done = 0
+            if on_progress:
+                on_progress("map", done, len(chunks))
+            
+            async def summarize_chunk(chunk):
+                nonlocal done
+                async with semaphore:
+                    summary = await self._summarize('reference_chunk_summary', self.condense_summary_tokens, use_cache, content=chunk)
+                done += 1
+                if on_progress:
+                    on_progress("map", done, len(chunks))
+                return summary
+            
+            summaries = await asyncio.gather(*(summarize_chunk(chunk) for chunk in chunks))
+            text = "\n\n".join(summaries)
+            text_tokens = await self.count_tokens(text)
+            logger.info(f"Sintesi, passaggio {round_number}: {len(chunks)} parti riassunte in {text_tokens} tokens")
+            if text_tokens <= reduce_tokens:
+                break
+        else:
+            raise Exception(f"Il materiale di riferimento è troppo lungo anche dopo {self.condense_max_rounds} passaggi di sintesi")
+        
+        if on_progress:
+            on_progress("reduce", 0, 1)
+        brief = await self._summarize('reference_brief', self.condense_brief_tokens, use_cache, topic=topic, content=text)
+        if on_progress:
+            on_progress("reduce", 1, 1)
+        
+        brief_tokens = self.token_counter.count(brief)
+        logger.info(f"Materiale di riferimento condensato: {original_tokens} -> {brief_tokens} tokens")
+        if brief_tokens > budget:
+            raise Exception(f"La sintesi del materiale di riferimento è troppo lunga ({brief_tokens} tokens, limite {budget})")
+        return brief
+
+    async def generate_article(self, topic: str, content: str = "", use_cache: bool = True, user=None) -> str:
         """
         Genera un articolo usando OpenAI basato sul topic fornito.
+        La generazione attende il proprio turno nello scheduler globale.
         
         Args:
             topic (str): Il topic o le istruzioni per l'articolo
             content (str, optional): Il contenuto del file allegato, se presente
+            use_cache (bool, optional): Se False ignora l'articolo salvato nella cache e lo rigenera
+            user (optional): Identificativo dell'utente, per il turno equo nella coda
         
         Returns:
             str: L'articolo generato
         """
+        async with self.scheduler.slot(user, await self.estimate_job_tokens(topic, content)):
+            return await self._generate_article(topic, content, use_cache)
+
+    async def _generate_article(self, topic: str, content: str, use_cache: bool) -> str:
         try:
-            # Ricarica i prompt prima di ogni generazione
-            await self.reload_prompts()
-            
-            # Ottieni il template
-            template = self.prompts['article_generation']['template']
-            
-            # Formatta il template con topic e content
-            formatted_prompt = template.format(
-                topic=str(topic),
-                content=str(content)
+            content = await self.condense_reference(topic, content, use_cache=use_cache)
+            model, messages, max_tokens = await self._prepare_article_request(topic, content)
+            key, cached = await self._cached_completion(
+                messages, self.temperature, use_cache, model, alternatives=self._candidate_models()
             )
-            
-            # Stima il numero di token
-            estimated_tokens = self.estimate_tokens(formatted_prompt)
-            model_limit = self.token_limits[self.model]
-            
-            # Calcola i token rimanenti per la risposta, lasciando un margine di sicurezza del 10%
-            remaining_tokens = int((model_limit - estimated_tokens) * 0.9)
-            logger.debug(f"Token stimati: {estimated_tokens}, Limite modello: {model_limit}, Token per risposta: {remaining_tokens}")
-            
-            if estimated_tokens > model_limit * 0.9:  # Se il prompt usa più del 90% dei token
-                logger.error(f"Prompt troppo lungo: {estimated_tokens} tokens > {model_limit * 0.9} limite")
-                raise Exception(f"Il prompt è troppo lungo per il modello {self.model} (stimati {estimated_tokens} tokens, limite {int(model_limit * 0.9)})")
+            if cached is not None:
+                logger.info(f"Articolo letto dalla cache ({len(cached)} caratteri)")
+                return cached
 
             # Chiamata all'API OpenAI con la nuova interfaccia asincrona
             try:
-                logger.debug(f"Chiamata a OpenAI con modello {self.model}...")
+                logger.debug(f"Chiamata a OpenAI con modello {model}...")
+                started = time.monotonic()
                 
                 # Imposta un timeout di 120 secondi (2 minuti)
                 response = await asyncio.wait_for(
                     self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {"role": "system", "content": "Sei un assistente esperto nella scrittura di documentazione tecnica."},
-                            {"role": "user", "content": formatted_prompt}
-                        ],
+                        model=model,
+                        messages=messages,
                         temperature=self.temperature,
-                        max_tokens=remaining_tokens
+                        max_tokens=max_tokens
                     ),
                     timeout=120.0
                 )
@@ -131,6 +483,14 @@ class AIHandler:
                 if response and response.choices:
                     generated_content = response.choices[0].message.content
                     logger.info(f"Articolo generato ({len(generated_content)} caratteri)")
+                    if self.router:
+                        output_tokens = response.usage.completion_tokens if response.usage else self.estimate_tokens(generated_content)
+                        self.router.record(model, time.monotonic() - started, output_tokens)
+                    # Un articolo troncato per limite di token non va riproposto ai tentativi successivi
+                    if response.choices[0].finish_reason == 'length':
+                        logger.warning("Articolo troncato per limite di token: non salvato nella cache")
+                    else:
+                        await self._store_completion(key, generated_content, model)
                     return generated_content
                 else:
                     logger.error("Nessuna risposta generata dal modello")
@@ -145,4 +505,89 @@ class AIHandler:
             
         except Exception as e:
             logger.error(f"Errore nella generazione dell'articolo: {str(e)}", exc_info=True)
-            raise Exception(f"Errore nella generazione dell'articolo: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Errore nella generazione dell'articolo: {str(e)}")
+
+    async def stream_article(self, topic: str, content: str = "", use_cache: bool = True):
+        """
+        Genera un articolo in streaming, restituendo i frammenti di testo man mano che arrivano.
+        Invece di un timeout sull'intera generazione si applica un timeout di inattività tra due frammenti.
+        Il materiale troppo lungo va condensato prima con condense_reference.
+        Se l'articolo è già nella cache viene restituito subito, in un unico frammento.
+        
+        Args:
+            topic (str): Il topic o le istruzioni per l'articolo
+            content (str, optional): Il contenuto del file allegato, se presente
+            use_cache (bool, optional): Se False ignora l'articolo salvato nella cache e lo rigenera
+            
+        Yields:
+            str: I frammenti di testo generati
+            
+        Raises:
+            Exception: Se la generazione fallisce o si interrompe
+        """
+        model, messages, max_tokens = await self._prepare_article_request(topic, content)
+        key, cached = await self._cached_completion(
+            messages, self.temperature, use_cache, model, alternatives=self._candidate_models()
+        )
+        if cached is not None:
+            logger.info(f"Articolo letto dalla cache ({len(cached)} caratteri)")
+            yield cached
+            return
+        logger.debug(f"Chiamata in streaming a OpenAI con modello {model}...")
+        started = time.monotonic()
+        try:
+            stream = await asyncio.wait_for(
+                self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                ),
+                timeout=self.stream_idle_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error("Timeout durante l'avvio dello streaming da OpenAI")
+            raise Exception("La generazione dell'articolo non è partita in tempo. Riprova più tardi.")
+        except Exception as e:
+            logger.error(f"Errore durante la chiamata all'API di ChatGPT: {str(e)}", exc_info=True)
+            raise Exception(f"Errore nella generazione dell'articolo: {str(e)}")
+        
+        parts = []
+        finish_reason = None
+        first_token = None
+        chunks = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.stream_idle_timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    logger.error(f"Nessun frammento da OpenAI per {self.stream_idle_timeout} s")
+                    raise Exception("La generazione dell'articolo si è interrotta. Riprova più tardi.")
+                except Exception as e:
+                    logger.error(f"Errore durante lo streaming da ChatGPT: {str(e)}", exc_info=True)
+                    raise Exception(f"Errore nella generazione dell'articolo: {str(e)}")
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    if first_token is None:
+                        first_token = time.monotonic() - started
+                    parts.append(delta)
+                    yield delta
+        finally:
+            await stream.close()
+        
+        generated = ''.join(parts)
+        if not generated:
+            logger.error("Nessuna risposta generata dal modello")
+            raise Exception("Errore nella generazione dell'articolo: Nessuna risposta generata dal modello")
+        logger.info(f"Articolo generato in streaming con {model} ({len(generated)} caratteri)")
+        if self.router:
+            self.router.record(model, time.monotonic() - started, self.estimate_tokens(generated), first_token)
+        
+        # Un articolo troncato per limite di token non viene salvato: il prossimo tentativo lo rigenera
+        if finish_reason != 'length':
+            await self._store_completion(key, generated, model)
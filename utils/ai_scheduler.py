@@ -0,0 +1,175 @@
+# ==========================================================
+# ai_scheduler.py
+# Descrizione: Scheduler globale delle generazioni AI. Limita il numero di generazioni contemporanee (max_in_flight) e i token richiesti al provider in un minuto (tokens_per_minute), servendo le richieste in attesa a turno tra gli utenti (round-robin), così che una raffica di !draft di un utente non blocchi gli altri né provochi i rate limit del provider.
+# Dipendenze principali: asyncio, collections, contextlib, time, logging.
+# Flusso di lavoro: Istanza creata da AIHandler; draft_cog esegue ogni generazione (sintesi del materiale e articolo) dentro uno slot dello scheduler e mostra all'utente la posizione in coda. Le statistiche (coda, attese, token al minuto) sono mostrate dal comando !status.
+# ==========================================================
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Finestra, in secondi, del budget di token al minuto
+TOKEN_WINDOW = 60.0
+
+class _Job:
+    """Generazione in attesa o in corso"""
+    __slots__ = ('user', 'tokens', 'future', 'on_position', 'position', 'enqueued', 'started')
+
+    def __init__(self, user, tokens: int, future: asyncio.Future, on_position=None):
+        self.user = user
+        self.tokens = tokens
+        self.future = future
+        self.on_position = on_position
+        self.position = None
+        self.enqueued = time.monotonic()
+        self.started = None
+
+class AIScheduler:
+    """Coda equa (round-robin per utente) con limite di concorrenza e di token al minuto"""
+
+    def __init__(self, max_in_flight: int = 3, tokens_per_minute: int = 0):
+        """
+        Args:
+            max_in_flight: Numero massimo di generazioni contemporanee
+            tokens_per_minute: Token massimi avviati in un minuto (0 = nessun limite)
+        """
+        self.max_in_flight = max_in_flight
+        self.tokens_per_minute = tokens_per_minute
+        self.in_flight = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._queues = OrderedDict()
+        self._window = deque()
+        self._timer = None
+
+    def _tokens_in_window(self, now: float) -> int:
+        while self._window and now - self._window[0][0] >= TOKEN_WINDOW:
+            self._window.popleft()
+        return sum(tokens for _, tokens in self._window)
+
+    def _order(self) -> list:
+        # Ordine in cui verranno avviate le generazioni in attesa: un job per utente a ogni giro
+        order = []
+        queues = [list(queue) for queue in self._queues.values()]
+        for turn in range(max((len(queue) for queue in queues), default=0)):
+            order.extend(queue[turn] for queue in queues if turn < len(queue))
+        return order
+
+    def _notify_positions(self):
+        for position, job in enumerate(self._order(), start=1):
+            if job.position != position:
+                job.position = position
+                if job.on_position:
+                    job.on_position(position)
+
+    def _dispatch(self):
+        # Avvia le generazioni in attesa finché concorrenza e budget di token lo consentono
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self._queues and self.in_flight < self.max_in_flight:
+            user, queue = next(iter(self._queues.items()))
+            job = queue[0]
+            used = self._tokens_in_window(now)
+            # Una generazione più grande dell'intero budget parte comunque, ma da sola
+            if self.tokens_per_minute and used and used + job.tokens > self.tokens_per_minute:
+                delay = TOKEN_WINDOW - (now - self._window[0][0])
+                self._timer = asyncio.get_running_loop().call_later(max(delay, 0.01), self._dispatch)
+                logger.debug(f"Budget di token al minuto esaurito ({used}/{self.tokens_per_minute}): prossimo avvio tra {delay:.1f} s")
+                break
+            queue.popleft()
+            # Il turno passa all'utente successivo: l'utente servito va in fondo alla rotazione
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue
+            self.in_flight += 1
+            job.started = now
+            wait = now - job.enqueued
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if self.tokens_per_minute:
+                self._window.append((now, job.tokens))
+            job.future.set_result(None)
+            if job.on_position and job.position is not None:
+                job.on_position(0)
+        self._notify_positions()
+
+    def _remove(self, job: _Job):
+        queue = self._queues.get(job.user)
+        if queue is not None and job in queue:
+            queue.remove(job)
+            if not queue:
+                del self._queues[job.user]
+
+    async def acquire(self, user, tokens: int = 0, on_position=None) -> _Job:
+        """
+        Attende il proprio turno per avviare una generazione.
+
+        Args:
+            user: Identificativo dell'utente che ha richiesto la generazione (per il turno equo)
+            tokens: Token stimati della generazione (prompt e risposta)
+            on_position: Funzione chiamata con la posizione in coda quando cambia (0 = generazione avviata)
+
+        Returns:
+            _Job: Il job da passare a release()
+        """
+        job = _Job(user, tokens, asyncio.get_running_loop().create_future(), on_position)
+        self._queues.setdefault(user, deque()).append(job)
+        self._dispatch()
+        if not job.future.done():
+            logger.info(f"Generazione AI in coda per {user}: posizione {job.position}, {self.in_flight} in corso")
+        try:
+            await job.future
+        except asyncio.CancelledError:
+            if job.started is not None:
+                self.release(job)
+            else:
+                self._remove(job)
+                self._dispatch()
+            raise
+        return job
+
+    def release(self, job: _Job):
+        """Libera lo slot di una generazione terminata e avvia la successiva in attesa."""
+        self.in_flight -= 1
+        self.completed += 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user, tokens: int = 0, on_position=None):
+        """
+        Esegue un blocco di codice come generazione AI schedulata.
+
+        Args:
+            user: Identificativo dell'utente che ha richiesto la generazione
+            tokens: Token stimati della generazione
+            on_position: Funzione chiamata con la posizione in coda quando cambia (0 = generazione avviata)
+        """
+        job = await self.acquire(user, tokens, on_position)
+        try:
+            yield job
+        finally:
+            self.release(job)
+
+    def stats(self) -> dict:
+        """Restituisce lo stato della coda e le statistiche di attesa."""
+        now = time.monotonic()
+        waits = [now - job.enqueued for queue in self._queues.values() for job in queue]
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'queued': len(waits),
+            'users_waiting': len(self._queues),
+            'oldest_wait': max(waits, default=0.0),
+            'completed': self.completed,
+            'avg_wait': self.total_wait / (self.completed + self.in_flight) if self.completed + self.in_flight else 0.0,
+            'max_wait': self.max_wait,
+            'tokens_last_minute': self._tokens_in_window(now),
+            'tokens_per_minute': self.tokens_per_minute
+        }
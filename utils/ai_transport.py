@@ -0,0 +1,144 @@
+# ==========================================================
+# ai_transport.py
+# Descrizione: Trasporto HTTP condiviso del client OpenAI, configurato esplicitamente: pool di connessioni keep-alive con limiti, HTTP/2 opzionale (se il pacchetto h2 è installato) e timeout di connessione, lettura, scrittura e attesa del pool. Apre in anticipo le connessioni (warm-up) e misura quante richieste riusano una connessione già aperta, tramite l'estensione trace di httpx.
+# Dipendenze principali: openai, httpx, h2 (opzionale, per HTTP/2), asyncio, importlib, collections, time, logging.
+# Flusso di lavoro: Istanza creata da AIHandler e passata ad AsyncOpenAI come http_client. draft_cog esegue il warm-up all'avvio e periodicamente, così che il primo !draft dopo l'avvio o dopo un periodo di inattività non paghi connessione TCP e handshake TLS. Le statistiche di riuso sono mostrate dal comando !status.
+# ==========================================================
+import asyncio
+import importlib.util
+import logging
+import time
+from collections import Counter
+import httpx
+from openai import APIStatusError
+
+logger = logging.getLogger(__name__)
+
+H2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+class _RequestTrace:
+    """Callback dell'estensione trace per una richiesta: rileva l'apertura di una nuova connessione"""
+    __slots__ = ('new_connection', 'connect_seconds', '_started')
+
+    def __init__(self):
+        self.new_connection = False
+        self.connect_seconds = 0.0
+        self._started = None
+
+    async def __call__(self, event: str, info: dict):
+        if event in ('connection.connect_tcp.started', 'connection.connect_unix_socket.started'):
+            self.new_connection = True
+            self._started = time.perf_counter()
+        elif event in ('connection.connect_tcp.complete', 'connection.start_tls.complete') and self._started is not None:
+            # Connessione TCP più eventuale handshake TLS
+            self.connect_seconds = time.perf_counter() - self._started
+
+class AIHttpTransport:
+    """Client HTTP condiviso per l'API OpenAI, con pool keep-alive e statistiche di riuso delle connessioni"""
+
+    def __init__(self, max_connections: int = 10, max_keepalive_connections: int = 5, keepalive_expiry: float = 300.0,
+                 http2: bool = True, connect_timeout: float = 10.0, read_timeout: float = 120.0,
+                 write_timeout: float = 30.0, pool_timeout: float = 30.0):
+        """
+        Args:
+            max_connections: Numero massimo di connessioni aperte verso l'API
+            max_keepalive_connections: Connessioni inattive tenute aperte per le richieste successive
+            keepalive_expiry: Secondi dopo i quali una connessione inattiva viene chiusa
+            http2: Usa HTTP/2 (una connessione per molte richieste contemporanee) se h2 è installato
+            connect_timeout: Timeout di apertura della connessione, in secondi
+            read_timeout: Timeout di lettura della risposta (tra due frammenti, in streaming)
+            write_timeout: Timeout di invio della richiesta
+            pool_timeout: Attesa massima di una connessione libera nel pool
+        """
+        self.http2 = http2 and H2_AVAILABLE
+        if http2 and not H2_AVAILABLE:
+            logger.warning("HTTP/2 richiesto ma il pacchetto h2 non è installato: uso HTTP/1.1")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=write_timeout, pool=pool_timeout)
+        # I limiti del pool valgono sul trasporto: con un trasporto esplicito httpx ignora quelli del client
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits),
+            timeout=self.timeout,
+            follow_redirects=True,
+            event_hooks={'request': [self._on_request], 'response': [self._on_response]}
+        )
+        self.requests = 0
+        self.new_connections = 0
+        self.connect_seconds = 0.0
+        self.http_versions = Counter()
+        self.warmups = 0
+        self.last_warmup = None
+
+    async def _on_request(self, request):
+        request.extensions['trace'] = _RequestTrace()
+
+    async def _on_response(self, response):
+        trace = response.request.extensions.get('trace')
+        if not isinstance(trace, _RequestTrace):
+            return
+        self.requests += 1
+        self.http_versions[response.http_version] += 1
+        if trace.new_connection:
+            self.new_connections += 1
+            self.connect_seconds += trace.connect_seconds
+
+    async def warm_up(self, client, connections: int = 1):
+        """
+        Apre in anticipo le connessioni del pool con richieste leggere (elenco dei modelli) in parallelo.
+        Con HTTP/2 (negoziato solo su https) basta una connessione.
+
+        Args:
+            client: Il client AsyncOpenAI che usa questo trasporto
+            connections: Numero di connessioni da aprire
+
+        Returns:
+            tuple: (success, message)
+        """
+        multiplexed = self.http2 and client.base_url.scheme == 'https'
+        connections = 1 if multiplexed else max(connections, 1)
+        opened_before = self.new_connections
+        start = time.perf_counter()
+        quick_client = client.with_options(max_retries=0)
+
+        async def ping():
+            try:
+                await quick_client.models.list()
+            except APIStatusError:
+                # Il server ha risposto (ad esempio 404 su un endpoint compatibile): la connessione è aperta
+                pass
+
+        results = await asyncio.gather(*(ping() for _ in range(connections)), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if len(errors) == len(results):
+            return False, f"Warm-up delle connessioni AI fallito: {str(errors[0]) or type(errors[0]).__name__}"
+
+        self.warmups += 1
+        self.last_warmup = time.time()
+        elapsed = time.perf_counter() - start
+        return True, (
+            f"Warm-up delle connessioni AI: {self.new_connections - opened_before} nuove connessioni "
+            f"({'HTTP/2' if multiplexed else 'HTTP/1.1'}) in {elapsed:.2f} s"
+        )
+
+    def stats(self) -> dict:
+        """Restituisce le statistiche di riuso delle connessioni."""
+        reused = self.requests - self.new_connections
+        return {
+            'requests': self.requests,
+            'new_connections': self.new_connections,
+            'reused': max(reused, 0),
+            'reuse_rate': max(reused, 0) / self.requests if self.requests else 0.0,
+            'avg_connect': self.connect_seconds / self.new_connections if self.new_connections else 0.0,
+            'http_versions': dict(self.http_versions),
+            'http2': self.http2,
+            'warmups': self.warmups,
+            'last_warmup': self.last_warmup
+        }
+
+    async def aclose(self):
+        """Chiude le connessioni del pool."""
+        await self.client.aclose()
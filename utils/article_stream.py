@@ -0,0 +1,20 @@
+# ==========================================================
+# article_stream.py
+# Descrizione: Segue in modo incrementale un articolo generato in streaming dall'AI: accumula il testo, rileva le sezioni (<h2>) man mano che vengono completate e riconosce quando il blocco SEO contiene le keywords, così che le fasi successive (ricerca di articoli e video correlati) possano partire prima della fine della generazione.
+# Dipendenze principali: utils.gutenberg.
+# Flusso di lavoro: Alimentato da draft_cog con i frammenti restituiti da AIHandler.stream_article; fornisce i dati per l'anteprima di avanzamento su Discord, le keywords per i contenuti correlati e, a generazione conclusa, titolo e posizione del blocco SEO per inserire le sezioni aggiuntive.
+# ==========================================================
+from utils.gutenberg import GutenbergParser
+
+class ArticleStream(GutenbergParser):
+    """Stato di un articolo generato in streaming"""
+
+    @property
+    def keywords_ready(self) -> bool:
+        """True quando il blocco SEO contiene l'elenco completo delle keywords."""
+        return bool(self.keywords)
+
+    @property
+    def body(self) -> str:
+        """Il testo dell'articolo prima del blocco SEO."""
+        return self.text if self.seo_start is None else self.text[:self.seo_start]
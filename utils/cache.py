@@ -0,0 +1,105 @@
+# ==========================================================
+# cache.py
+# Descrizione: Cache in memoria di dimensione limitata con politica LRU e scadenza (TTL) delle voci. Tiene traccia di hit, miss ed evizioni. Permette anche di leggere le voci scadute con la loro età (stale-while-revalidate).
+# Dipendenze principali: collections, time.
+# Flusso di lavoro: Usata dagli handler (es. wordpress_handler, youtube_handler) per evitare di ripetere richieste identiche verso servizi esterni.
+# ==========================================================
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Cache LRU con scadenza delle voci"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        """
+        Args:
+            max_entries: Numero massimo di voci conservate
+            ttl: Durata di validità di una voce, in secondi
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Restituisce il valore associato alla chiave se presente e non scaduto.
+
+        Args:
+            key: La chiave da cercare
+            default: Valore restituito in caso di miss
+
+        Returns:
+            Il valore in cache oppure default
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key):
+        """
+        Restituisce il valore e la sua età anche se la voce è scaduta (per servire dati
+        non aggiornati mentre vengono rinnovati in background).
+
+        Args:
+            key: La chiave da cercare
+
+        Returns:
+            tuple: (valore, età in secondi), oppure (None, None) se la chiave non è presente
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+        stored_at, value = entry
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value, time.monotonic() - stored_at
+
+    def age(self, key):
+        """Restituisce l'età in secondi di una voce (anche scaduta), o None se assente. Non aggiorna le statistiche."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return time.monotonic() - entry[0]
+
+    def set(self, key, value):
+        """Inserisce o aggiorna una voce, eliminando la meno usata di recente se la cache è piena."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key=None):
+        """Elimina una voce, o tutte le voci se key è None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """Restituisce le statistiche di utilizzo della cache."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,17 +1,20 @@
 # ==========================================================
 # command_utils.py
-# Descrizione: Funzioni e classi di utilità per l'estrazione, validazione e pulizia degli argomenti dei comandi Discord. Gestisce anche la lettura di allegati e messaggi di riferimento.
-# Dipendenze principali: discord, discord.ext.commands, config/config.json, config/messages.json, logging, re, aiohttp, json.
+# Descrizione: Funzioni e classi di utilità per l'estrazione, validazione e pulizia degli argomenti dei comandi Discord. Gestisce anche le opzioni dei comandi (es. --rigenera), la lettura di allegati (inclusi più file .txt e archivi .zip) e messaggi di riferimento.
+# Dipendenze principali: discord, discord.ext.commands, config/config.json, config/messages.json, logging, re, aiohttp, json, io, zipfile, asyncio.
 # Flusso di lavoro: Invocato da tutti i cog che devono estrarre o validare argomenti da messaggi, allegati o thread Discord.
 # ==========================================================
 
 import discord
 from discord.ext import commands
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 import logging
 import re
 import json
 import aiohttp
+import asyncio
+import io
+import zipfile
 
 # Configurazione del logger
 logger = logging.getLogger(__name__)
@@ -200,6 +203,135 @@ async def extract_command_argument(ctx):
         logger.error(f"Errore durante l'estrazione dell'argomento: {str(e)}")
         return False, f"❌ Errore durante l'estrazione dell'argomento: {str(e)}"
 
+# Opzione di !draft che ignora la cache delle risposte dell'AI e rigenera l'articolo
+REGENERATE_FLAG = '--rigenera'
+
+def split_flag(text: str, flag: str) -> Tuple[bool, str]:
+    """
+    Cerca un'opzione (es. --rigenera) tra le parole di un testo e la rimuove.
+    
+    Args:
+        text: Il testo del comando o del suo argomento
+        flag: L'opzione da cercare
+        
+    Returns:
+        Tuple[bool, str]: (opzione presente, testo senza l'opzione)
+    """
+    pattern = re.compile(rf'\s*(?<!\S){re.escape(flag)}(?!\S)')
+    if not text or not pattern.search(text):
+        return False, text
+    return True, pattern.sub('', text, count=1).strip()
+
+def is_bulk_attachment_request(message) -> bool:
+    """
+    Indica se il messaggio contiene più file .txt o un archivio .zip (modalità bozze in blocco).
+    
+    Args:
+        message: Il messaggio Discord
+        
+    Returns:
+        bool: True se gli allegati richiedono la modalità in blocco
+    """
+    names = [attachment.filename.lower() for attachment in message.attachments]
+    return any(name.endswith('.zip') for name in names) or sum(name.endswith('.txt') for name in names) > 1
+
+def _list_zip_texts(data: bytes, max_file_size: int) -> List[zipfile.ZipInfo]:
+    """Elenca i file .txt di un archivio .zip senza decomprimerli, ignorando cartelle, file di sistema e file troppo grandi."""
+    entries = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            basename = name.rsplit('/', 1)[-1]
+            if info.is_dir() or name.startswith('__MACOSX/') or basename.startswith('.'):
+                continue
+            if not basename.lower().endswith('.txt'):
+                continue
+            if info.file_size > max_file_size:
+                logger.warning(f"File {name} ignorato: dimensione {info.file_size} oltre il limite di {max_file_size} byte")
+                continue
+            entries.append(info)
+    return entries
+
+def _read_zip_texts(data: bytes, entries: List[zipfile.ZipInfo]) -> List[Tuple[str, str]]:
+    """Decomprime i file .txt già selezionati da un archivio .zip."""
+    files = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in entries:
+            content = archive.read(info).decode('utf-8', errors='replace')
+            files.append((info.filename.rsplit('/', 1)[-1], clean_content(content)))
+    return files
+
+async def extract_attachment_files(message, max_files: int, max_file_size: int) -> Tuple[bool, Any]:
+    """
+    Legge tutti i file .txt allegati al messaggio, compresi quelli contenuti in archivi .zip.
+    
+    Numero e dimensione complessiva dei file vengono controllati prima di scaricare i .txt
+    e di decomprimere gli archivi, che vengono letti fuori dall'event loop.
+    
+    Args:
+        message: Il messaggio Discord con gli allegati
+        max_files: Numero massimo di file accettati
+        max_file_size: Dimensione massima (in byte) di ogni file
+        
+    Returns:
+        Tuple[bool, Any]: (successo, lista di (nome_file, contenuto) oppure messaggio di errore)
+    """
+    try:
+        max_total_size = max_files * max_file_size
+        # Prima passata: seleziona i file senza leggerli (per gli archivi basta l'indice)
+        sources = []
+        count = 0
+        total_size = 0
+        for attachment in message.attachments:
+            name = attachment.filename.lower()
+            if name.endswith('.txt'):
+                # Stesso limite dei file contenuti negli archivi, controllato prima di scaricare l'allegato
+                if attachment.size > max_file_size:
+                    logger.warning(f"File {attachment.filename} ignorato: dimensione {attachment.size} oltre il limite di {max_file_size} byte")
+                    continue
+                sources.append(('txt', attachment))
+                count += 1
+                total_size += attachment.size
+            elif name.endswith('.zip'):
+                if attachment.size > max_total_size:
+                    return False, messages["draft_bulk_too_large"].format(max_size=max_total_size)
+                data = await attachment.read()
+                entries = await asyncio.to_thread(_list_zip_texts, data, max_file_size)
+                sources.append(('zip', (data, entries)))
+                count += len(entries)
+                total_size += sum(info.file_size for info in entries)
+            if count > max_files:
+                break
+        
+        if count > max_files:
+            return False, messages["draft_bulk_too_many_files"].format(max_files=max_files, count=count)
+        if total_size > max_total_size:
+            return False, messages["draft_bulk_too_large"].format(max_size=max_total_size)
+        
+        # Seconda passata: legge i file selezionati, nell'ordine degli allegati
+        files = []
+        for kind, source in sources:
+            if kind == 'txt':
+                content = await source.read()
+                files.append((source.filename, clean_content(content.decode('utf-8', errors='replace'))))
+            else:
+                files.extend(await asyncio.to_thread(_read_zip_texts, *source))
+        
+        # Scarta i file vuoti
+        files = [(filename, content) for filename, content in files if content.strip()]
+        if not files:
+            return False, messages["draft_bulk_no_files"]
+        
+        logger.debug(f"Estratti {len(files)} file .txt dagli allegati")
+        return True, files
+        
+    except zipfile.BadZipFile:
+        logger.error("Archivio .zip non valido")
+        return False, messages["draft_bulk_invalid_zip"]
+    except Exception as e:
+        logger.error(f"Errore durante la lettura degli allegati: {str(e)}", exc_info=True)
+        return False, f"❌ Errore durante la lettura degli allegati: {str(e)}"
+
 def format_error_message(error: str) -> str:
     """
     Formatta un messaggio di errore in modo consistente.
@@ -0,0 +1,169 @@
+# ==========================================================
+# completion_cache.py
+# Descrizione: Cache persistente su disco (SQLite) delle risposte dell'AI, indirizzata per contenuto: la chiave è l'hash SHA-256 di modello, temperatura e messaggi (prompt di sistema e prompt formattato). La dimensione totale dei testi conservati è limitata: oltre il limite vengono eliminate le risposte usate meno di recente.
+# Dipendenze principali: sqlite3, hashlib, threading, time, os, json, logging.
+# Flusso di lavoro: Usata da AIHandler per articoli e riassunti del materiale di riferimento: un nuovo !draft sullo stesso contenuto (ad esempio dopo un errore di WordPress) riusa la risposta salvata. L'opzione --rigenera di !draft la ignora. Le statistiche sono mostrate dal comando !status.
+# ==========================================================
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class CompletionCache:
+    """Cache persistente delle risposte dell'AI, con chiave l'hash della richiesta"""
+
+    def __init__(self, path: str, max_bytes: int = 50_000_000):
+        """
+        Args:
+            path: Percorso del file SQLite
+            max_bytes: Dimensione massima complessiva dei testi conservati (in byte UTF-8)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions(last_used)")
+
+    @staticmethod
+    def key(model: str, temperature: float, messages: list) -> str:
+        """
+        Restituisce la chiave di cache di una richiesta.
+
+        Args:
+            model: Il modello usato
+            temperature: La temperatura della richiesta
+            messages: I messaggi della chat (prompt di sistema e prompt formattato)
+
+        Returns:
+            str: L'hash SHA-256 esadecimale della richiesta
+        """
+        payload = json.dumps(
+            {'model': model, 'temperature': temperature, 'messages': messages},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """
+        Restituisce la risposta salvata per una chiave.
+
+        Args:
+            key: La chiave della richiesta
+
+        Returns:
+            str: Il testo della risposta, oppure None se non presente
+        """
+        return self.get_any([key])[1]
+
+    def get_any(self, keys: list):
+        """
+        Restituisce la prima risposta salvata tra più chiavi, nell'ordine indicato (ad esempio la stessa
+        richiesta per modelli diversi). La ricerca conta come un solo accesso nelle statistiche.
+
+        Args:
+            keys: Le chiavi da cercare
+
+        Returns:
+            tuple: (chiave trovata, testo), oppure (None, None) se nessuna è presente
+        """
+        with self._lock, self._conn:
+            for key in keys:
+                row = self._conn.execute("SELECT text FROM completions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self.hits += 1
+                    return key, row[0]
+            self.misses += 1
+        return None, None
+
+    def put(self, key: str, model: str, text: str):
+        """
+        Salva una risposta, eliminando le meno usate di recente se si supera la dimensione massima.
+
+        Args:
+            key: La chiave della richiesta
+            model: Il modello che ha generato la risposta
+            text: Il testo della risposta
+        """
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            logger.warning(f"Risposta di {size} byte troppo grande per la cache dell'AI")
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO completions (key, model, text, size, created, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    model = excluded.model,
+                    text = excluded.text,
+                    size = excluded.size,
+                    created = excluded.created,
+                    last_used = excluded.last_used
+            """, (key, model, text, size, now, now))
+            self._evict()
+        self.stored += 1
+
+    def _evict(self):
+        # Chiamato con il lock acquisito e dentro una transazione: tiene le risposte più recenti entro max_bytes
+        cursor = self._conn.execute("""
+            DELETE FROM completions WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS total FROM completions
+                ) WHERE total > ?
+            )
+        """, (self.max_bytes,))
+        if cursor.rowcount > 0:
+            self.evicted += cursor.rowcount
+            logger.debug(f"Cache dell'AI: eliminate {cursor.rowcount} risposte meno recenti")
+
+    def clear(self):
+        """Elimina tutte le risposte salvate."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM completions")
+
+    def stats(self) -> dict:
+        """Restituisce le statistiche di utilizzo della cache."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stored': self.stored,
+            'evicted': self.evicted
+        }
+
+    def close(self):
+        """Chiude la connessione al database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,79 @@
+# ==========================================================
+# discord_progress.py
+# Descrizione: Messaggio di avanzamento Discord aggiornato in modo "accorpato": gli aggiornamenti frequenti vengono fusi e il messaggio viene modificato al massimo una volta ogni intervallo configurato, per rispettare i rate limit delle edit di Discord.
+# Dipendenze principali: discord, asyncio, logging.
+# Flusso di lavoro: Usato da draft_cog per mostrare l'avanzamento delle operazioni lunghe (bozze in blocco, generazione) su un unico messaggio.
+# ==========================================================
+import asyncio
+import logging
+import discord
+
+logger = logging.getLogger(__name__)
+
+class ProgressMessage:
+    """Aggiorna un messaggio Discord al massimo una volta ogni min_interval secondi, mostrando sempre l'ultimo stato"""
+
+    def __init__(self, message: discord.Message, min_interval: float = 3.0):
+        """
+        Args:
+            message: Il messaggio Discord da aggiornare
+            min_interval: Intervallo minimo, in secondi, tra due modifiche del messaggio
+        """
+        self.message = message
+        self.min_interval = min_interval
+        self._current = message.content
+        self._pending = None
+        self._last_edit = 0.0
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def content(self) -> str:
+        """L'ultimo contenuto richiesto (anche se non ancora inviato a Discord)."""
+        return self._pending if self._pending is not None else self._current
+
+    def update(self, content: str):
+        """
+        Richiede l'aggiornamento del messaggio. Le richieste ravvicinate vengono accorpate:
+        viene inviata solo l'ultima, appena trascorso l'intervallo minimo.
+
+        Args:
+            content: Il nuovo contenuto del messaggio
+        """
+        self._pending = content
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def finish(self, content: str):
+        """
+        Invia subito il contenuto finale, annullando gli aggiornamenti in attesa.
+
+        Args:
+            content: Il contenuto finale del messaggio
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._pending = content
+        await self._flush()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._pending is not None:
+            delay = self._last_edit + self.min_interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._flush()
+
+    async def _flush(self):
+        async with self._lock:
+            content, self._pending = self._pending, None
+            if content is None or content == self._current:
+                return
+            try:
+                await self.message.edit(content=content)
+                self._current = content
+            except discord.HTTPException as e:
+                logger.warning(f"Impossibile aggiornare il messaggio di avanzamento: {str(e)}")
+            finally:
+                self._last_edit = asyncio.get_running_loop().time()
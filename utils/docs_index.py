@@ -0,0 +1,230 @@
+# ==========================================================
+# docs_index.py
+# Descrizione: Copia locale dei documenti BetterDocs in un database SQLite con indice full-text FTS5. Conserva titoli ed estratti già puliti (HTML rimosso ed entità decodificate) e i link, così che le ricerche possano essere servite in pochi millisecondi senza chiamare WordPress.
+# Dipendenze principali: sqlite3, threading, time, os, re, logging, utils.ranking, utils.text_utils.
+# Flusso di lavoro: Popolato e aggiornato in modo incrementale da WordPressHandler.sync_docs_index (avviato periodicamente da topic_cog), che a intervalli più lunghi confronta anche l'elenco completo degli id con WordPress per rimuovere i documenti eliminati o non più pubblicati; interrogato da WordPressHandler.search_docs quando l'indice è abilitato e aggiornato. Fornisce anche le statistiche dei termini del corpus per il ranking degli articoli correlati.
+# ==========================================================
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from utils.ranking import TermStatistics, document_tokens
+from utils.text_utils import strip_html
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+class DocsIndex:
+    """Indice locale full-text dei documenti WordPress"""
+
+    def __init__(self, path: str, max_age: float):
+        """
+        Args:
+            path: Percorso del file SQLite
+            max_age: Età massima (in secondi) dell'ultima sincronizzazione oltre la quale l'indice è considerato obsoleto
+        """
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # La connessione è condivisa tra event loop (letture) e thread di sincronizzazione (scritture)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS docs (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    excerpt TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    modified_gmt TEXT NOT NULL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+                    title, excerpt, content,
+                    content='docs', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS docs_ai AFTER INSERT ON docs BEGIN
+                    INSERT INTO docs_fts(rowid, title, excerpt, content)
+                    VALUES (new.id, new.title, new.excerpt, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS docs_ad AFTER DELETE ON docs BEGIN
+                    INSERT INTO docs_fts(docs_fts, rowid, title, excerpt, content)
+                    VALUES ('delete', old.id, old.title, old.excerpt, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS docs_au AFTER UPDATE ON docs BEGIN
+                    INSERT INTO docs_fts(docs_fts, rowid, title, excerpt, content)
+                    VALUES ('delete', old.id, old.title, old.excerpt, old.content);
+                    INSERT INTO docs_fts(rowid, title, excerpt, content)
+                    VALUES (new.id, new.title, new.excerpt, new.content);
+                END;
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+
+    def upsert(self, docs: list) -> int:
+        """
+        Inserisce o aggiorna i documenti ricevuti dall'API REST, pulendo titoli ed estratti.
+
+        Args:
+            docs: Lista di documenti nel formato dell'API REST di WordPress
+
+        Returns:
+            int: Numero di documenti scritti
+        """
+        rows = [
+            (
+                doc['id'],
+                strip_html(doc.get('title', {}).get('rendered', '')),
+                doc.get('link', ''),
+                strip_html(doc.get('excerpt', {}).get('rendered', '')),
+                strip_html(doc.get('content', {}).get('rendered', '')),
+                doc.get('modified_gmt', '')
+            )
+            for doc in docs
+            if 'id' in doc
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO docs (id, title, link, excerpt, content, modified_gmt)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title,
+                    link = excluded.link,
+                    excerpt = excluded.excerpt,
+                    content = excluded.content,
+                    modified_gmt = excluded.modified_gmt
+            """, rows)
+        return len(rows)
+
+    def search(self, search_term: str, limit: int = None) -> list:
+        """
+        Cerca nei documenti indicizzati, ordinando per rilevanza (bm25, titolo con peso maggiore).
+
+        Args:
+            search_term: Il termine di ricerca
+            limit: Numero massimo di risultati (None = tutti)
+
+        Returns:
+            list: Lista di dizionari con id, title, link ed excerpt già puliti
+        """
+        tokens = _TOKEN_RE.findall(search_term.lower())
+        if not tokens:
+            return []
+        # Ogni parola deve comparire (come prefisso), come nella ricerca di WordPress
+        match_query = ' '.join(f'"{token}"*' for token in tokens)
+        query = """
+            SELECT docs.id, docs.title, docs.link, docs.excerpt
+            FROM docs_fts JOIN docs ON docs.id = docs_fts.rowid
+            WHERE docs_fts MATCH ?
+            ORDER BY bm25(docs_fts, 10.0, 3.0, 1.0)
+        """
+        params = [match_query]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {'id': row[0], 'title': row[1], 'link': row[2], 'excerpt': row[3]}
+            for row in rows
+        ]
+
+    def term_statistics(self) -> TermStatistics:
+        """
+        Calcola le statistiche dei termini (titoli ed estratti) dell'intero corpus indicizzato,
+        usate per il ranking BM25 degli articoli correlati.
+
+        Returns:
+            TermStatistics: Le statistiche del corpus
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT title, excerpt FROM docs").fetchall()
+        return TermStatistics.from_token_lists(document_tokens(title, excerpt) for title, excerpt in rows)
+
+    def prune(self, keep_ids) -> int:
+        """
+        Rimuove i documenti che non esistono più su WordPress (eliminati, nel cestino o non più pubblicati).
+
+        Args:
+            keep_ids: Gli id di tutti i documenti pubblicati su WordPress
+
+        Returns:
+            int: Numero di documenti rimossi
+        """
+        keep_ids = set(keep_ids)
+        with self._lock, self._conn:
+            stale = [
+                (doc_id,) for (doc_id,) in self._conn.execute("SELECT id FROM docs")
+                if doc_id not in keep_ids
+            ]
+            # Il trigger docs_ad rimuove anche le voci dell'indice full-text
+            self._conn.executemany("DELETE FROM docs WHERE id = ?", stale)
+        return len(stale)
+
+    def count(self) -> int:
+        """Restituisce il numero di documenti indicizzati."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def last_modified(self):
+        """Restituisce il modified_gmt più recente tra i documenti indicizzati (o None se vuoto)."""
+        with self._lock:
+            return self._conn.execute("SELECT MAX(modified_gmt) FROM docs").fetchone()[0]
+
+    def _get_meta(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def mark_synced(self):
+        """Registra il completamento di una sincronizzazione."""
+        self._set_meta('last_sync', str(time.time()))
+
+    def mark_reconciled(self):
+        """Registra il completamento di un confronto completo degli id con WordPress."""
+        self._set_meta('last_reconcile', str(time.time()))
+
+    def _elapsed(self, key: str):
+        value = self._get_meta(key)
+        if value is None:
+            return None
+        return time.time() - float(value)
+
+    def age(self):
+        """Restituisce i secondi trascorsi dall'ultima sincronizzazione (None se mai sincronizzato)."""
+        return self._elapsed('last_sync')
+
+    def reconcile_age(self):
+        """Restituisce i secondi trascorsi dall'ultimo confronto completo degli id (None se mai eseguito)."""
+        return self._elapsed('last_reconcile')
+
+    def is_stale(self) -> bool:
+        """True se l'indice è vuoto, mai sincronizzato o più vecchio di max_age."""
+        age = self.age()
+        return age is None or age > self.max_age or self.count() == 0
+
+    def close(self):
+        """Chiude la connessione al database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,259 @@
+# ==========================================================
+# gutenberg.py
+# Descrizione: Parser incrementale in un solo passaggio dei blocchi Gutenberg degli articoli generati. Riconosce i delimitatori dei blocchi (<!-- wp:nome {attributi} --> ... <!-- /wp:nome -->), i titoli <h1>-<h6> e il blocco SEO nascosto (keywords e meta description), e inserisce le sezioni aggiuntive nella posizione corretta (prima del blocco SEO) con un'unica copia del testo. I frammenti ricevuti in streaming sono conservati in una lista e uniti una sola volta; la ricerca avviene solo sulla parte finale non ancora esaminata.
+# Dipendenze principali: json, re.
+# Flusso di lavoro: Usato da ArticleStream mentre l'AI genera l'articolo in streaming (ogni frammento viene esaminato una sola volta) e da draft_cog per titolo e keywords dell'articolo e per aggiungere le sezioni "Articoli correlati" e "Video correlati" prima di creare la bozza.
+# ==========================================================
+import json
+import re
+
+COMMENT_START = '<!--'
+COMMENT_END = '-->'
+
+# Contenuto di un commento che delimita un blocco: apertura, chiusura (/wp:nome) o blocco vuoto (wp:nome /)
+_DELIMITER_RE = re.compile(
+    r'^\s*(/)?wp:([a-z][a-z0-9_-]*(?:/[a-z][a-z0-9_-]*)?)\s*(\{.*\})?\s*(/)?\s*$', re.DOTALL
+)
+_HEADING_RE = re.compile(r'<h([1-6])\b[^>]*>(.*?)</h\1\s*>', re.IGNORECASE | re.DOTALL)
+_HEADING_START_RE = re.compile(r'<h[1-6]', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+# Commenti interni al blocco SEO
+SEO_START_MARKER = 'SEO METADATA START'
+SEO_END_MARKER = 'SEO METADATA END'
+KEYWORDS_MARKER = 'KEYWORDS'
+META_DESCRIPTION_MARKER = 'META DESCRIPTION'
+
+class Block:
+    """Blocco Gutenberg riconosciuto nel testo"""
+    __slots__ = ('name', 'attrs', 'start', 'end', 'depth')
+
+    def __init__(self, name: str, attrs: dict, start: int, depth: int):
+        self.name = name
+        self.attrs = attrs
+        self.start = start
+        self.end = None
+        self.depth = depth
+
+    def __repr__(self):
+        return f"Block({self.name!r}, start={self.start}, end={self.end})"
+
+def _parse_attrs(raw: str) -> dict:
+    if not raw:
+        return {}
+    try:
+        attrs = json.loads(raw)
+    except ValueError:
+        return {}
+    return attrs if isinstance(attrs, dict) else {}
+
+def _clean(html: str) -> str:
+    return _TAG_RE.sub('', html).strip()
+
+class GutenbergParser:
+    """Analisi incrementale di un articolo in blocchi Gutenberg"""
+
+    def __init__(self):
+        # Frammenti ricevuti, uniti solo quando serve il testo completo
+        self._chunks = []
+        self._length = 0
+        # Parte finale del testo non ancora esaminata (o ancora necessaria), a partire dalla posizione _offset
+        self._buffer = ''
+        self._offset = 0
+        self.blocks = []
+        self.headings = []
+        self.keywords = None
+        self.meta_description = None
+        self.seo_start = None
+        self.closed = False
+        self._stack = []
+        self._pos = 0
+        self._html_pos = 0
+        self._field = None
+
+    @property
+    def text(self) -> str:
+        """Il testo completo ricevuto finora."""
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def title(self):
+        """Il testo del primo titolo <h1> o <h2>, oppure None."""
+        return next((text for level, text in self.headings if level <= 2), None)
+
+    @property
+    def sections(self) -> list:
+        """I titoli delle sezioni principali (<h2>) completati finora."""
+        return [text for level, text in self.headings if level == 2]
+
+    def feed(self, delta: str):
+        """
+        Aggiunge un frammento di testo ed esamina solo la parte nuova. Un commento o un titolo
+        incompleto viene ripreso al frammento successivo.
+
+        Args:
+            delta: Il frammento di testo
+        """
+        if not delta:
+            return
+        self._chunks.append(delta)
+        self._length += len(delta)
+        self._buffer += delta
+        self._scan()
+        self._trim()
+
+    def close(self):
+        """Segnala la fine del testo: chiude i campi del blocco SEO rimasti aperti."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._field is not None and self._field[0] == 'meta':
+            self._end_meta(self._length)
+        # Testo completo: i frammenti vengono uniti una sola volta
+        self._chunks = [''.join(self._chunks)]
+        self._buffer = ''
+        self._offset = self._length
+
+    def _slice(self, start: int, end: int) -> str:
+        # Posizioni assolute nel testo, lette dalla parte conservata in _buffer
+        return self._buffer[start - self._offset:end - self._offset]
+
+    def _scan(self):
+        # Le posizioni (_pos, _html_pos, blocchi) sono assolute; la ricerca avviene solo in _buffer
+        buffer, offset = self._buffer, self._offset
+        while True:
+            start = buffer.find(COMMENT_START, self._pos - offset)
+            self._scan_headings(start + offset if start >= 0 else self._length)
+            if start < 0:
+                # Un "<!--" può essere diviso tra due frammenti
+                self._pos = max(self._pos, self._length - len(COMMENT_START) + 1)
+                return
+            end = buffer.find(COMMENT_END, start + len(COMMENT_START))
+            if end < 0:
+                self._pos = start + offset
+                return
+            end += len(COMMENT_END)
+            self._pos = self._html_pos = end + offset
+            self._comment(buffer[start + len(COMMENT_START):end - len(COMMENT_END)], start + offset, end + offset)
+
+    def _scan_headings(self, limit: int):
+        # Titoli nel testo HTML tra due commenti; un titolo non ancora chiuso viene riesaminato in seguito
+        buffer, offset = self._buffer, self._offset
+        for match in _HEADING_RE.finditer(buffer, self._html_pos - offset, limit - offset):
+            self.headings.append((int(match.group(1)), _clean(match.group(2))))
+            self._html_pos = match.end() + offset
+        if limit == self._length:
+            # Si riprende dall'apertura del prossimo titolo, o dalla fine se non ce ne sono (un "<h2" può essere diviso)
+            opening = _HEADING_START_RE.search(buffer, self._html_pos - offset)
+            self._html_pos = opening.start() + offset if opening else max(self._html_pos, self._length - 2)
+
+    def _trim(self):
+        # Conserva solo la parte di testo ancora da esaminare e l'eventuale campo SEO aperto
+        keep = min(self._pos, self._html_pos)
+        if self._field is not None:
+            keep = min(keep, self._field[1])
+        if keep > self._offset:
+            self._buffer = self._buffer[keep - self._offset:]
+            self._offset = keep
+
+    def _comment(self, content: str, start: int, end: int):
+        delimiter = _DELIMITER_RE.match(content)
+        if delimiter:
+            closing, name, attrs, void = delimiter.groups()
+            if closing:
+                self._close_block(name, start, end)
+            else:
+                block = Block(name, _parse_attrs(attrs), start, len(self._stack))
+                self.blocks.append(block)
+                if void:
+                    block.end = end
+                else:
+                    self._stack.append(block)
+            return
+
+        marker = content.strip()
+        if marker in (SEO_START_MARKER, KEYWORDS_MARKER):
+            if self.seo_start is None:
+                # Il blocco SEO è il blocco html che contiene i metadati (o il commento stesso, se non è in un blocco)
+                container = next((block for block in reversed(self._stack) if block.name == 'html'), None)
+                self.seo_start = container.start if container is not None else start
+            if marker == KEYWORDS_MARKER and self.keywords is None:
+                self._field = ('keywords', end)
+        elif marker == META_DESCRIPTION_MARKER and self._field is not None and self._field[0] == 'keywords':
+            lines = self._slice(self._field[1], start).split('\n')
+            self.keywords = [line.strip('- ').strip() for line in lines if line.strip()]
+            self._field = ('meta', end)
+        elif marker == SEO_END_MARKER and self._field is not None and self._field[0] == 'meta':
+            self._end_meta(start)
+
+    def _close_block(self, name: str, start: int, end: int):
+        # Chiusura tollerante: i blocchi interni lasciati aperti vengono chiusi insieme al contenitore
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index].name == name:
+                if self._field is not None and self._field[0] == 'meta' and self._stack[index].start == self.seo_start:
+                    self._end_meta(start)
+                for block in self._stack[index:]:
+                    block.end = end
+                del self._stack[index:]
+                return
+
+    def _end_meta(self, position: int):
+        self.meta_description = _clean(self._slice(self._field[1], position)) or None
+        self._field = None
+
+    def insert_before_seo(self, sections: list) -> str:
+        """
+        Restituisce il testo con le sezioni inserite prima del blocco SEO (o in fondo, se manca),
+        con un'unica copia del testo.
+
+        Args:
+            sections: Le sezioni (HTML in blocchi Gutenberg) da inserire, nell'ordine
+
+        Returns:
+            str: Il testo completo
+        """
+        sections = [section for section in sections if section]
+        if not sections:
+            return self.text
+        if self.seo_start is None:
+            return self.text.rstrip('\n') + ''.join(f"\n\n{section}" for section in sections)
+        before = self.text[:self.seo_start].rstrip('\n')
+        inserted = ''.join(f"\n\n{section}" for section in sections)
+        return f"{before}{inserted}\n\n{self.text[self.seo_start:]}"
+
+def parse_article(text: str) -> GutenbergParser:
+    """
+    Analizza un articolo completo.
+
+    Args:
+        text: Il testo dell'articolo
+
+    Returns:
+        GutenbergParser: Il risultato dell'analisi (titolo, sezioni, keywords, meta description, blocchi)
+    """
+    parser = GutenbergParser()
+    parser.feed(text)
+    parser.close()
+    return parser
+
+def link_list_section(heading: str, links: list) -> str:
+    """
+    Crea una sezione con un titolo <h2> e un elenco puntato di link, in blocchi Gutenberg.
+
+    Args:
+        heading: Il titolo della sezione
+        links: Coppie (url, testo) già sicure per l'HTML
+
+    Returns:
+        str: La sezione in blocchi Gutenberg
+    """
+    items = ''.join(f"\n<li><a href=\"{url}\">{label}</a></li>" for url, label in links)
+    return (
+        f"<!-- wp:heading -->\n<h2>{heading}</h2>\n<!-- /wp:heading -->\n\n"
+        f"<!-- wp:list -->\n<ul>{items}\n</ul>\n<!-- /wp:list -->"
+    )
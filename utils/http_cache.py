@@ -0,0 +1,185 @@
+# ==========================================================
+# http_cache.py
+# Descrizione: Cache di rivalidazione HTTP persistente su disco (SQLite). Conserva corpo e header delle risposte GET che includono ETag o Last-Modified e, alle richieste successive sullo stesso URL, invia If-None-Match / If-Modified-Since: se il server risponde 304 Not Modified il corpo viene ricostruito dalla copia locale, senza riscaricarlo.
+# Dipendenze principali: sqlite3, threading, time, os, json, logging, requests.
+# Flusso di lavoro: Usata da WordPressHandler all'interno del pool di thread HTTP, per le ricerche paginate e la sincronizzazione dell'indice. Le statistiche (rivalidazioni, byte risparmiati) sono mostrate dal comando !status.
+# ==========================================================
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Header della risposta 304 che aggiornano quelli conservati (RFC 9111, sezione 4.3.4)
+_REVALIDATION_HEADERS = ('ETag', 'Last-Modified', 'Date', 'Cache-Control', 'Expires')
+
+class RevalidationCache:
+    """Cache HTTP persistente basata su richieste condizionali (ETag / Last-Modified)"""
+
+    def __init__(self, path: str, max_entries: int = 2000):
+        """
+        Args:
+            path: Percorso del file SQLite
+            max_entries: Numero massimo di risposte conservate (le meno usate di recente vengono eliminate)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.revalidated = 0
+        self.stored = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # La connessione è usata dai thread del pool HTTP
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+
+    @staticmethod
+    def key(url: str, params=None) -> str:
+        """Restituisce la chiave di cache: l'URL completo di query string."""
+        return requests.Request('GET', url, params=params).prepare().url
+
+    def conditional_headers(self, key: str) -> dict:
+        """
+        Restituisce gli header condizionali per una richiesta già presente in cache.
+
+        Args:
+            key: La chiave (URL) della richiesta
+
+        Returns:
+            dict: If-None-Match e/o If-Modified-Since (vuoto se l'URL non è in cache)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return {}
+        etag, last_modified = row
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, key: str, response: requests.Response):
+        """
+        Conserva una risposta 200 se il server ha fornito un validatore (ETag o Last-Modified).
+
+        Args:
+            key: La chiave (URL) della richiesta
+            response: La risposta ricevuta
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code != 200 or not (etag or last_modified):
+            return
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO responses (url, etag, last_modified, headers, body, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    headers = excluded.headers,
+                    body = excluded.body,
+                    last_used = excluded.last_used
+            """, (key, etag, last_modified, json.dumps(dict(response.headers)), response.content, time.time()))
+            self._evict()
+        self.stored += 1
+
+    def revalidate(self, key: str, response: requests.Response):
+        """
+        Ricostruisce la risposta completa a partire da una 304 Not Modified e dalla copia conservata.
+
+        Args:
+            key: La chiave (URL) della richiesta
+            response: La risposta 304 ricevuta
+
+        Returns:
+            requests.Response: La risposta ricostruita (status 200), oppure la 304 originale se l'URL non è più in cache
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT headers, body FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return response
+
+        headers = CaseInsensitiveDict(json.loads(row[0]))
+        for name in _REVALIDATION_HEADERS:
+            if name in response.headers:
+                headers[name] = response.headers[name]
+
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.reason = 'OK'
+        cached._content = row[1]
+        cached.headers = headers
+        cached.encoding = requests.utils.get_encoding_from_headers(headers)
+        cached.url = response.url
+        cached.request = response.request
+        cached.elapsed = response.elapsed
+        cached.from_cache = True
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET etag = ?, last_modified = ?, headers = ?, last_used = ? WHERE url = ?",
+                (headers.get('ETag'), headers.get('Last-Modified'), json.dumps(dict(headers)), time.time(), key)
+            )
+        self.revalidated += 1
+        self.bytes_saved += len(row[1])
+        return cached
+
+    def _evict(self):
+        # Chiamato con il lock acquisito e dentro una transazione
+        self._conn.execute("""
+            DELETE FROM responses WHERE url IN (
+                SELECT url FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def clear(self):
+        """Elimina tutte le risposte conservate."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """Restituisce le statistiche di utilizzo della cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'revalidated': self.revalidated,
+            'stored': self.stored,
+            'misses': self.misses,
+            'bytes_saved': self.bytes_saved
+        }
+
+    def close(self):
+        """Chiude la connessione al database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,93 @@
+# ==========================================================
+# keyword_extractor.py
+# Descrizione: Estrazione locale e veloce delle keywords di un testo, senza AI. Usa un approccio in stile RAKE: le frasi candidate sono sequenze di parole significative delimitate da punteggiatura e stopwords italiane; le frasi e le loro sottosequenze ricevono un punteggio TF-IDF (frequenza nel testo per rarità delle parole nel corpus dei documenti, se disponibile), con un peso maggiore per le frasi di più parole.
+# Dipendenze principali: collections, re, utils.text_utils.
+# Flusso di lavoro: Usato da draft_cog per avviare la ricerca anticipata (speculativa) di articoli e video correlati dal materiale di riferimento, mentre l'AI genera l'articolo; le keywords locali vengono poi confrontate con le keywords SEO prodotte dall'AI.
+# ==========================================================
+import re
+from collections import Counter
+from utils.text_utils import ITALIAN_STOPWORDS, normalize_key, strip_html, tokenize
+
+# Separatori di frase: punteggiatura e a capo interrompono le frasi candidate
+_FRAGMENT_RE = re.compile(r"[.,;:!?()\[\]{}\"'“”«»<>/\\|*#=+\n\t-]+")
+_WORD_RE = re.compile(r'\w+')
+
+def _candidate_phrases(text: str, max_words: int) -> list:
+    # Sequenze di parole significative (minuscole, senza accenti) tra punteggiatura e stopwords
+    phrases = []
+    for fragment in _FRAGMENT_RE.split(normalize_key(text)):
+        current = []
+        for word in _WORD_RE.findall(fragment):
+            if len(word) < 3 or word in ITALIAN_STOPWORDS or not word.isalpha():
+                if current:
+                    phrases.append(tuple(current))
+                current = []
+                continue
+            current.append(word)
+            if len(current) == max_words:
+                phrases.append(tuple(current))
+                current = []
+        if current:
+            phrases.append(tuple(current))
+    return phrases
+
+def extract_keywords(text: str, max_keywords: int = 5, max_words: int = 3, stats=None) -> list:
+    """
+    Estrae le keywords più rappresentative di un testo.
+
+    Args:
+        text: Il testo (anche HTML) da analizzare
+        max_keywords: Numero massimo di keywords restituite
+        max_words: Numero massimo di parole per keyword
+        stats: Statistiche dei termini del corpus (TermStatistics) per pesare le parole rare; opzionale
+
+    Returns:
+        list: Le keywords (minuscole, senza accenti), dalla più rilevante
+    """
+    phrases = _candidate_phrases(strip_html(text or ''), max_words)
+    if not phrases:
+        return []
+
+    # Candidati: le frasi e le loro sottosequenze (n-grammi), contati su tutto il testo
+    counts = Counter(
+        phrase[start:start + length]
+        for phrase in phrases
+        for length in range(1, len(phrase) + 1)
+        for start in range(len(phrase) - length + 1)
+    )
+
+    def idf(word):
+        return stats.idf(word) if stats is not None and stats.document_count else 1.0
+
+    # Frequenza del candidato per rarità media delle sue parole; le frasi più lunghe sono più specifiche
+    scores = {
+        ngram: count * (1 + 0.5 * (len(ngram) - 1)) * sum(idf(word) for word in ngram) / len(ngram)
+        for ngram, count in counts.items()
+    }
+
+    # Le frasi composte solo da parole già coperte da keywords scelte non aggiungono informazione
+    keywords = []
+    covered = set()
+    for phrase in sorted(scores, key=lambda phrase: (-scores[phrase], -len(phrase), phrase)):
+        if set(phrase) <= covered:
+            continue
+        keywords.append(' '.join(phrase))
+        covered.update(phrase)
+        if len(keywords) >= max_keywords:
+            break
+    return keywords
+
+def keyword_overlap(keywords: list, reference_keywords: list) -> list:
+    """
+    Restituisce le keywords coperte da un altro elenco: quelle le cui parole significative
+    compaiono tutte tra le parole delle keywords di riferimento.
+
+    Args:
+        keywords: Le keywords da verificare (es. quelle SEO generate dall'AI)
+        reference_keywords: Le keywords di riferimento (es. quelle estratte in locale)
+
+    Returns:
+        list: Le keywords coperte, nell'ordine originale
+    """
+    reference_words = {word for keyword in reference_keywords for word in tokenize(keyword)}
+    return [keyword for keyword in keywords if tokenize(keyword) and set(tokenize(keyword)) <= reference_words]
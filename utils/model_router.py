@@ -0,0 +1,156 @@
+# ==========================================================
+# model_router.py
+# Descrizione: Sceglie il modello AI per ogni richiesta tra quelli configurati in token_limits, in base alla dimensione stimata del prompt, alla lunghezza desiderata della risposta e alla latenza e al costo di ogni modello. La latenza parte da una stima configurata e viene poi aggiornata con le misure reali (media mobile esponenziale del tempo al primo token e del tempo per token generato).
+# Dipendenze principali: logging.
+# Flusso di lavoro: Usato da AIHandler prima di ogni generazione di articolo: i prompt piccoli vanno al modello più rapido, quelli grandi al modello con la finestra di contesto più ampia invece di essere rifiutati. Ogni generazione completata aggiorna le misure del modello usato.
+# ==========================================================
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Quota della finestra del modello utilizzabile dal prompt (come in AIHandler._prepare_article_request)
+PROMPT_LIMIT_RATIO = 0.9
+
+class ModelRouter:
+    """Sceglie il modello per una richiesta in base a dimensione, latenza e costo"""
+
+    def __init__(self, models: dict, token_limits: dict, output_tokens: int = 2500,
+                 latency_weight: float = 1.0, cost_weight: float = 0.5, ewma_alpha: float = 0.3):
+        """
+        Args:
+            models: Per ogni modello: input_cost e output_cost (per 1000 token), seconds_per_1k_output
+                e first_token_seconds (stime iniziali della latenza)
+            token_limits: Finestra di contesto di ogni modello; sono considerati solo i modelli presenti in entrambi
+            output_tokens: Lunghezza desiderata della risposta, in token
+            latency_weight: Peso della latenza stimata nella scelta
+            cost_weight: Peso del costo stimato nella scelta
+            ewma_alpha: Peso delle nuove misure nella media mobile della latenza
+        """
+        self.models = {name: spec for name, spec in models.items() if name in token_limits}
+        if not self.models:
+            raise ValueError("Nessun modello configurato per il routing è presente in token_limits")
+        self.token_limits = token_limits
+        self.output_tokens = output_tokens
+        self.latency_weight = latency_weight
+        self.cost_weight = cost_weight
+        self.ewma_alpha = ewma_alpha
+        self._latency = {
+            name: {
+                'first_token': spec.get('first_token_seconds', 1.0),
+                'per_token': spec.get('seconds_per_1k_output', 30.0) / 1000,
+                'samples': 0
+            }
+            for name, spec in self.models.items()
+        }
+        self.choices = {name: 0 for name in self.models}
+
+    @property
+    def largest_model(self) -> str:
+        """Il modello con la finestra di contesto più ampia."""
+        return max(self.models, key=lambda name: self.token_limits[name])
+
+    def response_tokens(self, model: str, prompt_tokens: int) -> int:
+        """Token disponibili per la risposta, con il margine di sicurezza del 10%."""
+        return max(int((self.token_limits[model] - prompt_tokens) * 0.9), 0)
+
+    def estimate(self, model: str, prompt_tokens: int, output_tokens: int) -> tuple:
+        """
+        Stima latenza e costo di una richiesta.
+
+        Returns:
+            tuple: (secondi, costo in dollari)
+        """
+        spec = self.models[model]
+        latency = self._latency[model]
+        seconds = latency['first_token'] + latency['per_token'] * output_tokens
+        cost = (prompt_tokens * spec.get('input_cost', 0.0) + output_tokens * spec.get('output_cost', 0.0)) / 1000
+        return seconds, cost
+
+    def select(self, prompt_tokens: int, output_tokens: int = None) -> tuple:
+        """
+        Sceglie il modello per una richiesta: tra quelli in cui prompt e risposta desiderata entrano
+        nella finestra di contesto, quello con il miglior compromesso tra latenza e costo stimati.
+        Se nessun modello ha spazio sufficiente si usa quello con la finestra più ampia.
+
+        Args:
+            prompt_tokens: Token stimati del prompt
+            output_tokens: Lunghezza desiderata della risposta (default: output_tokens del router)
+
+        Returns:
+            tuple: (modello, stime {modello: (secondi, costo)} dei candidati)
+        """
+        output_tokens = output_tokens or self.output_tokens
+        candidates = [
+            name for name in self.models
+            if prompt_tokens <= self.token_limits[name] * PROMPT_LIMIT_RATIO
+            and self.response_tokens(name, prompt_tokens) >= output_tokens
+        ]
+        if not candidates:
+            return self.largest_model, {}
+
+        estimates = {name: self.estimate(name, prompt_tokens, output_tokens) for name in candidates}
+        # Latenza e costo normalizzati rispetto al miglior candidato, così che i pesi non dipendano dalle unità
+        best_seconds = min(seconds for seconds, _ in estimates.values()) or 1.0
+        best_cost = min(cost for _, cost in estimates.values()) or 1.0
+
+        def score(name):
+            seconds, cost = estimates[name]
+            return self.latency_weight * seconds / best_seconds + self.cost_weight * cost / best_cost
+
+        return min(candidates, key=score), estimates
+
+    def choose(self, prompt_tokens: int, output_tokens: int = None) -> str:
+        """
+        Come select(), registrando e scrivendo nei log la scelta.
+
+        Returns:
+            str: Il nome del modello
+        """
+        output_tokens = output_tokens or self.output_tokens
+        model, estimates = self.select(prompt_tokens, output_tokens)
+        self.choices[model] += 1
+        if not estimates:
+            logger.info(
+                f"Modello scelto: {model} (prompt {prompt_tokens} token: nessun modello ha spazio per "
+                f"{output_tokens} token di risposta, uso la finestra più ampia)"
+            )
+        else:
+            summary = ", ".join(
+                f"{name}: {seconds:.0f} s, ${cost:.3f}" for name, (seconds, cost) in sorted(estimates.items())
+            )
+            logger.info(f"Modello scelto: {model} (prompt {prompt_tokens} token, risposta {output_tokens} token; stime {summary})")
+        return model
+
+    def record(self, model: str, elapsed: float, output_tokens: int, first_token: float = None):
+        """
+        Aggiorna la latenza misurata di un modello dopo una generazione completata.
+
+        Args:
+            model: Il modello usato
+            elapsed: Durata complessiva della richiesta, in secondi
+            output_tokens: Token generati
+            first_token: Secondi prima del primo frammento (solo in streaming)
+        """
+        latency = self._latency.get(model)
+        if latency is None or output_tokens <= 0:
+            return
+        alpha = self.ewma_alpha
+        if first_token is not None:
+            latency['first_token'] += alpha * (first_token - latency['first_token'])
+            per_token = max(elapsed - first_token, 0.0) / output_tokens
+        else:
+            per_token = max(elapsed - latency['first_token'], 0.0) / output_tokens
+        latency['per_token'] += alpha * (per_token - latency['per_token'])
+        latency['samples'] += 1
+
+    def stats(self) -> dict:
+        """Restituisce per ogni modello le scelte e la latenza stimata."""
+        return {
+            name: {
+                'choices': self.choices[name],
+                'samples': latency['samples'],
+                'first_token': latency['first_token'],
+                'seconds_per_1k_output': latency['per_token'] * 1000
+            }
+            for name, latency in self._latency.items()
+        }
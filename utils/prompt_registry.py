@@ -0,0 +1,146 @@
+# ==========================================================
+# prompt_registry.py
+# Descrizione: Registro in memoria dei template dei prompt letti da config/prompts.json. Ogni template viene analizzato e validato una sola volta (testo, descrizione e insieme dei segnaposto); il file viene riletto solo quando cambiano mtime, inode o dimensione, verificati con una semplice stat. Se il nuovo file non è valido si continua a usare la versione precedente e lo stesso file non viene riletto finché non cambia di nuovo.
+# Dipendenze principali: json, os, string, threading, logging.
+# Flusso di lavoro: Usato da AIHandler per ottenere i template per nome (es. "article_generation"). draft_cog controlla periodicamente le modifiche al file e il comando !reloadprompts forza la ricarica.
+# ==========================================================
+import json
+import logging
+import os
+import string
+import threading
+
+logger = logging.getLogger(__name__)
+
+class PromptError(Exception):
+    """Eccezione per template dei prompt mancanti o non validi"""
+    pass
+
+class PromptTemplate:
+    """Template di un prompt già analizzato, con l'insieme dei segnaposto"""
+    __slots__ = ('name', 'template', 'description', 'fields')
+
+    def __init__(self, name: str, template: str, description: str = ''):
+        """
+        Args:
+            name: Nome del template (chiave in prompts.json)
+            template: Testo del template con segnaposto {nome}
+            description: Descrizione del template
+
+        Raises:
+            PromptError: Se il template non è valido
+        """
+        if not isinstance(template, str) or not template.strip():
+            raise PromptError(f"Il prompt '{name}' non ha un template valido")
+        fields = set()
+        try:
+            for _, field_name, _, _ in string.Formatter().parse(template):
+                if field_name is None:
+                    continue
+                if not field_name.isidentifier():
+                    raise PromptError(f"Segnaposto non valido '{{{field_name}}}' nel prompt '{name}'")
+                fields.add(field_name)
+        except ValueError as e:
+            raise PromptError(f"Template del prompt '{name}' non valido: {str(e)}")
+        self.name = name
+        self.template = template
+        self.description = description
+        self.fields = frozenset(fields)
+
+    def format(self, **values) -> str:
+        """
+        Compila il template con i valori dei segnaposto.
+
+        Raises:
+            PromptError: Se manca il valore di un segnaposto
+        """
+        missing = self.fields - values.keys()
+        if missing:
+            raise PromptError(f"Valori mancanti per il prompt '{self.name}': {', '.join(sorted(missing))}")
+        return self.template.format(**{field: str(values[field]) for field in self.fields})
+
+class PromptRegistry:
+    """Template dei prompt in memoria, ricaricati solo quando il file cambia"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Percorso del file JSON dei prompt
+        """
+        self.path = path
+        self.templates = {}
+        self.reloads = 0
+        self._signature = None
+        self._failed_signature = None
+        self._failed_message = None
+        self._lock = threading.Lock()
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def changed(self) -> bool:
+        """True se il file dei prompt è cambiato dall'ultimo caricamento."""
+        try:
+            return self._file_signature() not in (self._signature, self._failed_signature)
+        except OSError:
+            return False
+
+    def load(self, force: bool = False):
+        """
+        Carica e valida i template dal file, se è cambiato (o sempre, con force=True).
+        In caso di errore restano in uso i template caricati in precedenza e il file
+        non viene riletto finché non cambia (salvo force=True).
+
+        Args:
+            force: Ricarica anche se il file non è cambiato
+
+        Returns:
+            tuple: (success, message)
+        """
+        with self._lock:
+            signature = None
+            try:
+                signature = self._file_signature()
+                if not force and signature == self._signature:
+                    return True, "Prompt già aggiornati"
+                if not force and signature == self._failed_signature:
+                    # Stesso file già scartato: errore non ripetuto a ogni controllo
+                    logger.debug("File dei prompt non valido e non modificato: ricarica saltata")
+                    return False, self._failed_message
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                templates = {}
+                for name, entry in data.items():
+                    if name.startswith('__'):
+                        continue
+                    if not isinstance(entry, dict):
+                        raise PromptError(f"Il prompt '{name}' deve essere un oggetto con 'template'")
+                    templates[name] = PromptTemplate(name, entry.get('template'), entry.get('description', ''))
+            except (OSError, ValueError, PromptError) as e:
+                logger.error(f"Errore nel caricamento dei prompt: {str(e)}")
+                self._failed_signature = signature
+                self._failed_message = f"Errore nel caricamento dei prompt: {str(e)}"
+                return False, self._failed_message
+            self.templates = templates
+            self._signature = signature
+            self._failed_signature = None
+            self.reloads += 1
+            logger.info(f"Prompt caricati correttamente ({', '.join(sorted(templates))})")
+            return True, f"Prompt ricaricati con successo ({len(templates)} template)"
+
+    def get(self, name: str) -> PromptTemplate:
+        """
+        Restituisce un template per nome.
+
+        Raises:
+            PromptError: Se il template non esiste
+        """
+        template = self.templates.get(name)
+        if template is None:
+            raise PromptError(f"Prompt '{name}' non trovato in {self.path}")
+        return template
+
+    def names(self) -> list:
+        """Restituisce i nomi dei template disponibili."""
+        return sorted(self.templates)
@@ -0,0 +1,127 @@
+# ==========================================================
+# ranking.py
+# Descrizione: Ordinamento per rilevanza (BM25) dei documenti candidati rispetto a un testo di riferimento, ad esempio l'articolo appena generato. Supporta statistiche dei termini precalcolate sull'intero corpus, così che il punteggio di ogni candidato costi solo una somma su pochi termini.
+# Dipendenze principali: collections, math, utils.text_utils.
+# Flusso di lavoro: Invocato da related_content per scegliere i migliori articoli correlati tra i candidati trovati per tutte le keywords; le statistiche del corpus sono fornite da docs_index. Usato anche da video_catalog per la ricerca locale dei video del canale.
+# ==========================================================
+import math
+from collections import Counter
+from utils.text_utils import tokenize
+
+class TermStatistics:
+    """Statistiche dei termini di un corpus (numero di documenti, lunghezza media, document frequency)"""
+
+    def __init__(self, document_count: int, average_length: float, document_frequency: dict):
+        self.document_count = document_count
+        self.average_length = average_length
+        self.document_frequency = document_frequency
+
+    @classmethod
+    def from_token_lists(cls, token_lists):
+        """
+        Calcola le statistiche a partire dai documenti già suddivisi in parole.
+
+        Args:
+            token_lists: Iterabile di liste di parole, una per documento
+
+        Returns:
+            TermStatistics: Le statistiche del corpus
+        """
+        document_frequency = Counter()
+        document_count = 0
+        total_length = 0
+        for tokens in token_lists:
+            document_count += 1
+            total_length += len(tokens)
+            document_frequency.update(set(tokens))
+        average_length = total_length / document_count if document_count else 0.0
+        return cls(document_count, average_length, dict(document_frequency))
+
+    def idf(self, term: str) -> float:
+        """Inverse document frequency (variante BM25 sempre positiva)."""
+        df = self.document_frequency.get(term, 0)
+        return math.log(1 + (self.document_count - df + 0.5) / (df + 0.5))
+
+def document_tokens(title: str, excerpt: str = '', title_weight: int = 2) -> list:
+    """Parole di un documento candidato, con il titolo ripetuto per pesarlo di più."""
+    return tokenize(title) * title_weight + tokenize(excerpt)
+
+class BM25Ranker:
+    """Ordina i documenti candidati per rilevanza BM25 rispetto a un testo di riferimento"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, k3: float = 8.0, stats: TermStatistics = None):
+        """
+        Args:
+            k1: Saturazione della frequenza dei termini nel documento
+            b: Normalizzazione per lunghezza del documento
+            k3: Saturazione della frequenza dei termini nel testo di riferimento
+            stats: Statistiche precalcolate del corpus; se assenti vengono calcolate sui candidati
+        """
+        self.k1 = k1
+        self.b = b
+        self.k3 = k3
+        self.stats = stats
+
+    def _query_weights(self, reference_text: str, stats: TermStatistics) -> dict:
+        # Il testo di riferimento viene pesato una sola volta: idf per frequenza saturata
+        query_tf = Counter(tokenize(reference_text))
+        return {
+            term: stats.idf(term) * (self.k3 + 1) * tf / (self.k3 + tf)
+            for term, tf in query_tf.items()
+        }
+
+    def score(self, tokens: list, query_weights: dict, stats: TermStatistics) -> float:
+        """
+        Calcola il punteggio BM25 di un documento.
+
+        Args:
+            tokens: Le parole del documento
+            query_weights: Pesi dei termini del testo di riferimento
+            stats: Statistiche del corpus
+
+        Returns:
+            float: Il punteggio di rilevanza
+        """
+        if not tokens:
+            return 0.0
+        average_length = stats.average_length or len(tokens)
+        norm = self.k1 * (1 - self.b + self.b * len(tokens) / average_length)
+        total = 0.0
+        for term, tf in Counter(tokens).items():
+            weight = query_weights.get(term)
+            if weight:
+                total += weight * tf * (self.k1 + 1) / (tf + norm)
+        return total
+
+    def score_all(self, reference_text: str, token_lists: list) -> list:
+        """
+        Calcola il punteggio BM25 di documenti già suddivisi in parole.
+
+        Args:
+            reference_text: Il testo di riferimento
+            token_lists: Lista delle parole di ogni documento
+
+        Returns:
+            list: I punteggi, nello stesso ordine dei documenti
+        """
+        stats = self.stats or TermStatistics.from_token_lists(token_lists)
+        query_weights = self._query_weights(reference_text, stats)
+        return [self.score(tokens, query_weights, stats) for tokens in token_lists]
+
+    def rank(self, reference_text: str, candidates: list, top_k: int = None) -> list:
+        """
+        Ordina i candidati per rilevanza rispetto al testo di riferimento.
+
+        Args:
+            reference_text: Il testo di riferimento (es. l'articolo generato, senza HTML)
+            candidates: Lista di dizionari con almeno 'title' ed eventualmente 'excerpt'
+            top_k: Numero di candidati da restituire (None = tutti)
+
+        Returns:
+            list: I candidati ordinati per punteggio decrescente (a parità, ordine originale)
+        """
+        token_lists = [document_tokens(c['title'], c.get('excerpt', '')) for c in candidates]
+        scores = self.score_all(reference_text, token_lists)
+        order = sorted(range(len(candidates)), key=lambda i: -scores[i])
+        ranked = [candidates[i] for i in order]
+        return ranked[:top_k] if top_k is not None else ranked
@@ -0,0 +1,143 @@
+# ==========================================================
+# related_content.py
+# Descrizione: Ricerca degli articoli correlati a partire dalle keywords SEO di un articolo generato. Esegue le ricerche di tutte le keywords in parallelo, elimina i duplicati per ID/link, annulla le ricerche ancora in corso appena sono stati raccolti abbastanza candidati e li ordina per rilevanza (BM25) rispetto al testo dell'articolo.
+# Dipendenze principali: asyncio, logging, time, utils.ranking, utils.wordpress_handler.
+# Flusso di lavoro: Invocato da draft_cog per costruire la sezione "Articoli correlati": sia per la ricerca anticipata con le keywords estratte in locale dal materiale di riferimento, sia con le keywords SEO dell'articolo generato.
+# ==========================================================
+import asyncio
+import logging
+import time
+from utils.ranking import BM25Ranker
+
+logger = logging.getLogger(__name__)
+
+class RelatedContentResolver:
+    """Risolve gli articoli correlati interrogando WordPress per più keywords in parallelo"""
+
+    def __init__(self, wp_handler, candidates_per_keyword: int = 10, max_candidates: int = 40):
+        """
+        Args:
+            wp_handler: L'istanza di WordPressHandler da usare per le ricerche
+            candidates_per_keyword: Candidati raccolti per ogni keyword quando è attivo il ranking
+            max_candidates: Numero totale di candidati oltre il quale le ricerche vengono fermate
+        """
+        self.wp_handler = wp_handler
+        self.candidates_per_keyword = candidates_per_keyword
+        self.max_candidates = max_candidates
+
+    async def resolve(self, keywords: list, max_articles: int, reference_text: str = None):
+        """
+        Cerca gli articoli correlati per tutte le keywords contemporaneamente.
+        Se viene fornito un testo di riferimento, raccoglie un insieme più ampio di candidati
+        e sceglie i più rilevanti con BM25; altrimenti tiene i primi risultati di ogni keyword.
+
+        Args:
+            keywords: Lista di keywords da cercare
+            max_articles: Numero di articoli correlati da restituire
+            reference_text: Testo (senza HTML) rispetto a cui ordinare i candidati, es. l'articolo generato
+
+        Returns:
+            tuple: (articles, timings)
+                - articles (list): Articoli correlati (dizionari con id, title, link, excerpt)
+                - timings (dict): Per ogni keyword, durata in secondi, numero di risultati e stato
+        """
+        if reference_text:
+            candidates, timings = await self.collect(keywords, self.candidates_per_keyword, self.max_candidates)
+        else:
+            candidates, timings = await self.collect(keywords, max_articles, max_articles)
+
+        articles = candidates
+        if reference_text and candidates:
+            articles = await self.rank(reference_text, candidates, max_articles)
+
+        return articles[:max_articles], timings
+
+    async def rank(self, reference_text: str, candidates: list, max_articles: int) -> list:
+        """
+        Ordina i candidati per rilevanza BM25 rispetto al testo di riferimento.
+
+        Args:
+            reference_text: Testo (senza HTML) rispetto a cui ordinare i candidati
+            candidates: Candidati raccolti (dizionari con id, title, link, excerpt)
+            max_articles: Numero di articoli da restituire
+
+        Returns:
+            list: I candidati più rilevanti
+        """
+        start = time.perf_counter()
+        ranker = BM25Ranker(stats=await self.wp_handler.get_term_statistics())
+        articles = ranker.rank(reference_text, candidates, top_k=max_articles)
+        logger.info(f"Ranking BM25 di {len(candidates)} candidati in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return articles
+
+    async def collect(self, keywords: list, per_keyword_limit: int, total_limit: int):
+        """
+        Raccoglie i candidati per tutte le keywords in parallelo, senza duplicati.
+
+        Args:
+            keywords: Lista di keywords da cercare
+            per_keyword_limit: Numero massimo di risultati letti per ogni keyword
+            total_limit: Numero di candidati raggiunto il quale le ricerche in corso vengono annullate
+
+        Returns:
+            tuple: (candidates, timings)
+                - candidates (list): Candidati ordinati per keyword e poi per posizione nei risultati
+                - timings (dict): Per ogni keyword, durata in secondi, numero di risultati e stato
+        """
+        keywords = list(dict.fromkeys(keywords))
+        seen = set()
+        per_keyword = {keyword: [] for keyword in keywords}
+        timings = {}
+        enough = asyncio.Event()
+
+        async def search(keyword):
+            start = time.perf_counter()
+            status = 'completata'
+            stream = self.wp_handler.iter_docs(keyword)
+            try:
+                async for doc in stream:
+                    key = doc.id if doc.id is not None else doc.link
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    per_keyword[keyword].append(doc)
+                    if len(seen) >= total_limit:
+                        enough.set()
+                        break
+                    if len(per_keyword[keyword]) >= per_keyword_limit:
+                        break
+            except asyncio.CancelledError:
+                status = 'annullata'
+                raise
+            except Exception as e:
+                status = f"errore: {str(e)}"
+                logger.error(f"Errore nella ricerca di articoli per '{keyword}': {str(e)}")
+            finally:
+                await stream.aclose()
+                timings[keyword] = {
+                    'seconds': time.perf_counter() - start,
+                    'results': len(per_keyword[keyword]),
+                    'status': status
+                }
+
+        tasks = [asyncio.create_task(search(keyword)) for keyword in keywords]
+        if tasks:
+            all_done = asyncio.gather(*tasks, return_exceptions=True)
+            enough_reached = asyncio.create_task(enough.wait())
+            await asyncio.wait({all_done, enough_reached}, return_when=asyncio.FIRST_COMPLETED)
+
+            # Annulla le ricerche ancora in corso: abbiamo già abbastanza risultati
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            enough_reached.cancel()
+
+        for keyword, timing in timings.items():
+            logger.info(
+                f"Ricerca articoli per '{keyword}': {timing['results']} risultati in "
+                f"{timing['seconds'] * 1000:.0f} ms ({timing['status']})"
+            )
+
+        candidates = [doc.to_dict() for keyword in keywords for doc in per_keyword[keyword]]
+        return candidates, timings
@@ -0,0 +1,246 @@
+# ==========================================================
+# resilience.py
+# Descrizione: Livello di resilienza condiviso per le chiamate a servizi esterni: retry con backoff esponenziale e jitter, rispetto dell'header Retry-After e circuit breaker per endpoint. Quando un endpoint fallisce ripetutamente il circuito si apre e le chiamate successive falliscono subito, finché non è trascorso il tempo di attesa.
+# Dipendenze principali: asyncio, logging, random, time, email.utils, config/config.json, json.
+# Flusso di lavoro: Usato da wordpress_handler (ricerca e creazione bozze) e youtube_handler (ricerca video e info canale). Lo stato dei circuit breaker è registrato nei log e mostrato dal comando !status.
+# ==========================================================
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Eccezione sollevata quando il circuit breaker di un endpoint è aperto"""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+        super().__init__(
+            f"Servizio {endpoint} temporaneamente non disponibile dopo errori ripetuti "
+            f"(nuovo tentativo tra {retry_in:.0f} s)"
+        )
+
+def parse_retry_after(value):
+    """
+    Interpreta il valore dell'header Retry-After (secondi o data HTTP).
+
+    Args:
+        value: Il valore dell'header (può essere None)
+
+    Returns:
+        float: I secondi da attendere, oppure None se l'header è assente o non valido
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """Circuit breaker per un singolo endpoint (stati: chiuso, aperto, semiaperto)"""
+
+    CLOSED = 'chiuso'
+    OPEN = 'aperto'
+    HALF_OPEN = 'semiaperto'
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        """
+        Args:
+            name: Nome dell'endpoint protetto
+            failure_threshold: Fallimenti consecutivi che aprono il circuito
+            reset_timeout: Secondi di attesa prima di provare di nuovo l'endpoint
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def retry_in(self) -> float:
+        """Secondi mancanti alla prossima prova quando il circuito è aperto."""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Indica se una chiamata può essere eseguita (in semiaperto passa una sola chiamata di prova)."""
+        if self.state == self.OPEN:
+            if self.retry_in() > 0:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+            logger.info(f"Circuit breaker {self.name}: semiaperto, provo una nuova chiamata")
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def release(self):
+        """Libera la chiamata di prova senza registrarne l'esito (errori non imputabili all'endpoint)."""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.total_successes += 1
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit breaker {self.name}: chiuso, il servizio risponde di nuovo")
+        self.state = self.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"Circuit breaker {self.name}: aperto dopo {self.consecutive_failures} errori consecutivi "
+                    f"(pausa di {self.reset_timeout:.0f} s)"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'failures': self.total_failures,
+            'successes': self.total_successes,
+            'rejected': self.rejected,
+            'retry_in': self.retry_in() if self.state == self.OPEN else 0.0
+        }
+
+class ResiliencePolicy:
+    """Retry con backoff esponenziale e jitter, con un circuit breaker per ogni endpoint"""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 10.0,
+                 max_retry_after: float = 30.0, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        """
+        Args:
+            max_attempts: Numero massimo di tentativi per chiamata (incluso il primo)
+            base_delay: Attesa di base, in secondi, raddoppiata a ogni tentativo
+            max_delay: Attesa massima tra due tentativi
+            max_retry_after: Attesa massima accettata da un header Retry-After (oltre si rinuncia)
+            failure_threshold: Fallimenti consecutivi che aprono il circuito di un endpoint
+            reset_timeout: Secondi di attesa prima di provare di nuovo un endpoint con circuito aperto
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """Restituisce (creandolo se necessario) il circuit breaker di un endpoint."""
+        if endpoint not in self._breakers:
+            self._breakers[endpoint] = CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout)
+        return self._breakers[endpoint]
+
+    def backoff_delay(self, attempt: int, retry_after: float = None) -> float:
+        """Attesa prima del prossimo tentativo: Retry-After se presente, altrimenti backoff con jitter completo."""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def call(self, endpoint: str, func, retry_result=None, retry_exception=None):
+        """
+        Esegue una chiamata con retry e circuit breaker.
+
+        Args:
+            endpoint: Nome dell'endpoint (chiave del circuit breaker), es. "wordpress:docs"
+            func: Funzione senza argomenti che restituisce la coroutine da eseguire a ogni tentativo
+            retry_result: Funzione (risultato) -> (ritentare, retry_after) per i risultati di errore (es. status 503)
+            retry_exception: Funzione (eccezione) -> (ritentare, retry_after) per le eccezioni;
+                le eccezioni non ritentabili vengono propagate senza contare come guasto dell'endpoint
+
+        Returns:
+            Il risultato dell'ultimo tentativo
+
+        Raises:
+            CircuitOpenError: Se il circuito dell'endpoint è aperto
+        """
+        breaker = self.breaker(endpoint)
+        for attempt in range(self.max_attempts):
+            if not breaker.allow():
+                raise CircuitOpenError(endpoint, breaker.retry_in())
+            last_attempt = attempt == self.max_attempts - 1
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                retry, retry_after = retry_exception(e) if retry_exception else (False, None)
+                if not retry:
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                if last_attempt or breaker.state == CircuitBreaker.OPEN or not self._can_wait(retry_after):
+                    raise
+                reason = f"{type(e).__name__}: {str(e)}"
+            else:
+                retry, retry_after = retry_result(result) if retry_result else (False, None)
+                if not retry:
+                    breaker.record_success()
+                    return result
+                breaker.record_failure()
+                if last_attempt or breaker.state == CircuitBreaker.OPEN or not self._can_wait(retry_after):
+                    return result
+                reason = f"risposta {result!r}"
+
+            delay = self.backoff_delay(attempt, retry_after)
+            logger.warning(
+                f"{endpoint}: tentativo {attempt + 1}/{self.max_attempts} fallito ({reason}), "
+                f"nuovo tentativo tra {delay:.1f} s"
+            )
+            await asyncio.sleep(delay)
+
+    def _can_wait(self, retry_after) -> bool:
+        return retry_after is None or retry_after <= self.max_retry_after
+
+    def stats(self) -> dict:
+        """Restituisce lo stato di tutti i circuit breaker."""
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
+
+# Politica condivisa da tutti gli handler
+_shared_policy = None
+
+def get_resilience_policy() -> ResiliencePolicy:
+    """
+    Restituisce la politica di resilienza condivisa, configurata dalla sezione "resilience" di config.json.
+
+    Returns:
+        ResiliencePolicy: La politica condivisa
+    """
+    global _shared_policy
+    if _shared_policy is None:
+        with open('config/config.json', 'r') as f:
+            config = json.load(f).get('resilience', {})
+        _shared_policy = ResiliencePolicy(
+            max_attempts=config.get('max_attempts', 4),
+            base_delay=config.get('base_delay', 0.5),
+            max_delay=config.get('max_delay', 10.0),
+            max_retry_after=config.get('max_retry_after', 30.0),
+            failure_threshold=config.get('failure_threshold', 5),
+            reset_timeout=config.get('reset_timeout', 60.0)
+        )
+    return _shared_policy
@@ -0,0 +1,69 @@
+# ==========================================================
+# text_chunker.py
+# Descrizione: Suddivide un testo lungo in parti che rispettano un limite di token, tagliando ai confini dei paragrafi. Un paragrafo troppo lungo viene diviso per frasi e, se necessario, per parole.
+# Dipendenze principali: re.
+# Flusso di lavoro: Usato da AIHandler per la sintesi a più passaggi (map-reduce) del materiale di riferimento troppo lungo per il prompt dell'articolo.
+# ==========================================================
+import re
+
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_SENTENCE_RE = re.compile(r'(?<=[.!?;:])\s+')
+
+# Token stimati per il separatore tra due paragrafi ("\n\n")
+SEPARATOR_TOKENS = 1
+
+def _pack(pieces, count_tokens, max_tokens, separator):
+    # Raggruppa in ordine i pezzi (già entro il limite) finché la parte corrente non supera il limite
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        extra = tokens + (SEPARATOR_TOKENS if current else 0)
+        if current and current_tokens + extra > max_tokens:
+            chunks.append(separator.join(current))
+            current = []
+            current_tokens = 0
+            extra = tokens
+        current.append(piece)
+        current_tokens += extra
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+def _split_long(text, count_tokens, max_tokens):
+    # Divide un paragrafo troppo lungo per frasi e, se una frase è ancora troppo lunga, per parole
+    pieces = []
+    for sentence in _SENTENCE_RE.split(text):
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            pieces.append((sentence, tokens))
+            continue
+        words = [(word, count_tokens(word) + 1) for word in sentence.split()]
+        pieces.extend((chunk, count_tokens(chunk)) for chunk in _pack(words, count_tokens, max_tokens, ' '))
+    return _pack(pieces, count_tokens, max_tokens, ' ')
+
+def split_into_chunks(text: str, count_tokens, max_tokens: int) -> list:
+    """
+    Suddivide un testo in parti di al massimo max_tokens token, rispettando i paragrafi.
+
+    Args:
+        text: Il testo da suddividere
+        count_tokens: Funzione che conta i token di un testo (es. TokenCounter.count)
+        max_tokens: Numero massimo di token per parte
+
+    Returns:
+        list: Le parti del testo, nell'ordine originale
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens deve essere positivo")
+    pieces = []
+    for paragraph in _PARAGRAPH_RE.split(text or ''):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            pieces.append((paragraph, tokens))
+        else:
+            pieces.extend((part, count_tokens(part)) for part in _split_long(paragraph, count_tokens, max_tokens))
+    return _pack(pieces, count_tokens, max_tokens, '\n\n')
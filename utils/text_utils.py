@@ -0,0 +1,66 @@
+# ==========================================================
+# text_utils.py
+# Descrizione: Funzioni di utilità per la pulizia dei testi provenienti da WordPress (rimozione dei tag HTML e decodifica delle entità) per la normalizzazione delle chiavi di ricerca e per la suddivisione in parole (con stopwords italiane) usata dal ranking.
+# Dipendenze principali: html, re, unicodedata.
+# Flusso di lavoro: Invocato da wordpress_handler e docs_index per pulire titoli ed estratti una sola volta, al momento dell'acquisizione, per calcolare le chiavi della cache delle ricerche e da ranking per il calcolo della rilevanza.
+# ==========================================================
+import html
+import re
+import unicodedata
+
+_TAG_RE = re.compile(r'<[^<]+?>')
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'[^\W\d_]{2,}')
+
+# Parole funzionali italiane (e qualche inglese frequente nei documenti) escluse dall'analisi del testo
+ITALIAN_STOPWORDS = frozenset("""
+a ad al alla alle allo agli ai all anche ancora avere aveva avevano c che chi ci cio come con contro cosa cui
+da dal dalla dalle dallo dagli dai dall degli dei del della delle dello dell di do dove e ed era erano essere
+gli ha hai hanno ho i il in io l la le lei li lo loro lui ma me mi mia mie miei mio ne nei nel nella nelle nello
+nell negli noi non nostra nostre nostri nostro o ogni per perche piu po poi puo quale quali quando quanto quella
+quelle quelli quello questa queste questi questo qui se sei si sia siamo siete sono su sua sue sui sul sulla
+sulle sullo sull suoi suo ti tra tu tua tue tuo tuoi tutti tutto tutte tutta un una uno vi voi gia cosi molto
+sempre senza sotto stato stata stati state fare fa fatto essere puoi deve devi dopo prima solo altro altri altra
+altre via modo tipo the and of to for on with is are be this that it
+""".split())
+
+def strip_html(text: str) -> str:
+    """
+    Rimuove i tag HTML, decodifica le entità e compatta gli spazi.
+
+    Args:
+        text: Il testo HTML da pulire
+
+    Returns:
+        str: Il testo semplice
+    """
+    if not text:
+        return ''
+    text = html.unescape(_TAG_RE.sub('', text))
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+def normalize_key(text: str) -> str:
+    """
+    Normalizza un testo per usarlo come chiave di cache: minuscole, senza accenti e con spazi compattati.
+
+    Args:
+        text: Il testo da normalizzare
+
+    Returns:
+        str: Il testo normalizzato
+    """
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+def tokenize(text: str) -> list:
+    """
+    Suddivide un testo in parole normalizzate (minuscole, senza accenti), escludendo numeri e stopwords.
+
+    Args:
+        text: Il testo da analizzare
+
+    Returns:
+        list: Le parole significative, nell'ordine in cui compaiono
+    """
+    return [word for word in _WORD_RE.findall(normalize_key(text)) if word not in ITALIAN_STOPWORDS]
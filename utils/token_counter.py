@@ -0,0 +1,147 @@
+# ==========================================================
+# token_counter.py
+# Descrizione: Conteggio esatto dei token con il tokenizer BPE di OpenAI (tiktoken), usando i file di vocabolario inclusi nel repository (config/tokenizers), così da funzionare anche senza accesso a internet. Memorizza il conteggio della parte statica di ogni template, così che per ogni prompt vengano tokenizzati solo i valori inseriti. Se tiktoken o il vocabolario non sono disponibili ripiega sulla stima di 4 caratteri per token.
+# Dipendenze principali: tiktoken, os, string, logging, functools.
+# Flusso di lavoro: Usato da AIHandler per calcolare i token del prompt (rifiuto dei prompt troppo lunghi) e il valore di max_tokens della risposta.
+# ==========================================================
+import logging
+import os
+import string
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    from tiktoken.load import load_tiktoken_bpe
+    from tiktoken.model import encoding_name_for_model
+except ImportError:
+    tiktoken = None
+
+TOKENIZERS_DIR = os.path.join('config', 'tokenizers')
+
+# Specifiche delle codifiche usate dai modelli OpenAI (da tiktoken_ext.openai_public),
+# con il vocabolario letto dai file locali invece che scaricato
+_ENCODING_SPECS = {
+    'cl100k_base': {
+        'expected_hash': '223921b76ee99bde995b7ff738513eef100fb51d18c93597a113bcffe865b2a7',
+        'pat_str': r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s""",
+        'special_tokens': {
+            '<|endoftext|>': 100257,
+            '<|fim_prefix|>': 100258,
+            '<|fim_middle|>': 100259,
+            '<|fim_suffix|>': 100260,
+            '<|endofprompt|>': 100276
+        }
+    },
+    'o200k_base': {
+        'expected_hash': '446a9538cb6c348e3516120d7c08b09f57c36495e2acfffe59a5bf8b0cfb1a2d',
+        'pat_str': "|".join([
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""\p{N}{1,3}""",
+            r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+            r"""\s*[\r\n]+""",
+            r"""\s+(?!\S)""",
+            r"""\s+""",
+        ]),
+        'special_tokens': {
+            '<|endoftext|>': 199999,
+            '<|endofprompt|>': 200018
+        }
+    }
+}
+
+# Token aggiuntivi per ogni messaggio della chat e per l'avvio della risposta (formato ChatML)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+@lru_cache(maxsize=None)
+def load_encoding(name: str, tokenizers_dir: str = TOKENIZERS_DIR):
+    """
+    Carica una codifica BPE dal file di vocabolario locale (una sola volta per processo).
+
+    Args:
+        name: Nome della codifica (es. "cl100k_base")
+        tokenizers_dir: Cartella dei file .tiktoken
+
+    Returns:
+        tiktoken.Encoding: La codifica, oppure None se non disponibile
+    """
+    spec = _ENCODING_SPECS.get(name)
+    path = os.path.join(tokenizers_dir, f"{name}.tiktoken")
+    if tiktoken is None or spec is None or not os.path.exists(path):
+        logger.warning(f"Tokenizer {name} non disponibile: uso la stima di 4 caratteri per token")
+        return None
+    return tiktoken.Encoding(
+        name=name,
+        pat_str=spec['pat_str'],
+        mergeable_ranks=load_tiktoken_bpe(path, expected_hash=spec['expected_hash']),
+        special_tokens=spec['special_tokens']
+    )
+
+class TokenCounter:
+    """Conta i token di testi, template e messaggi per un modello"""
+
+    def __init__(self, model: str, tokenizers_dir: str = TOKENIZERS_DIR):
+        """
+        Args:
+            model: Nome del modello (es. "gpt-4")
+            tokenizers_dir: Cartella dei file .tiktoken
+        """
+        self.model = model
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = load_encoding(encoding_name_for_model(model), tokenizers_dir)
+            except KeyError:
+                logger.warning(f"Nessun tokenizer noto per il modello {model}: uso la stima di 4 caratteri per token")
+        self._template_cache = {}
+
+    @property
+    def exact(self) -> bool:
+        """True se il conteggio usa il tokenizer BPE (False se è una stima)."""
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        """Restituisce il numero di token di un testo."""
+        if not text:
+            return 0
+        if self.encoding is None:
+            return len(text) // 4
+        # I testi dell'utente possono contenere sequenze come "<|endoftext|>": vanno contate come testo normale
+        return len(self.encoding.encode_ordinary(text))
+
+    def _template_parts(self, template: str):
+        # Parte statica del template (testo letterale) e nomi dei segnaposto, calcolati una sola volta
+        parts = self._template_cache.get(template)
+        if parts is None:
+            literals = []
+            fields = []
+            for literal, field_name, _, _ in string.Formatter().parse(template):
+                literals.append(literal)
+                if field_name is not None:
+                    fields.append(field_name)
+            parts = (self.count(''.join(literals)), fields)
+            self._template_cache[template] = parts
+        return parts
+
+    def count_template(self, template: str, **values) -> int:
+        """
+        Conta i token di un template formattato senza ritokenizzare la parte statica.
+        Il risultato può differire di qualche token dal conteggio del testo completo (fusioni BPE
+        ai confini dei segnaposto): per ogni segnaposto si aggiunge un token di margine.
+
+        Args:
+            template: Il template con segnaposto {nome}
+            **values: I valori dei segnaposto
+
+        Returns:
+            int: Il numero di token (per eccesso)
+        """
+        static_tokens, fields = self._template_parts(template)
+        return static_tokens + sum(self.count(str(values[field])) + 1 for field in fields)
+
+    def count_messages(self, messages: list) -> int:
+        """Conta i token di una lista di messaggi della chat, inclusi i token di formato."""
+        return sum(TOKENS_PER_MESSAGE + self.count(message['content']) for message in messages) + TOKENS_PER_REPLY
@@ -0,0 +1,110 @@
+# ==========================================================
+# video_catalog.py
+# Descrizione: Catalogo locale dei video caricati sul canale YouTube (titolo, descrizione, tag), salvato su disco in JSON. Permette di cercare i video correlati in-process con ranking BM25, senza chiamare search.list dell'API (100 unità di quota per ricerca).
+# Dipendenze principali: json, os, time, logging, utils.ranking.
+# Flusso di lavoro: Popolato da YouTubeHandler.sync_video_catalog (avviato periodicamente da draft_cog) tramite la playlist degli upload del canale; interrogato da YouTubeHandler.search_videos in modalità locale.
+# ==========================================================
+import json
+import logging
+import os
+import time
+from utils.ranking import BM25Ranker, TermStatistics, document_tokens
+
+logger = logging.getLogger(__name__)
+
+class VideoCatalog:
+    """Catalogo locale dei video del canale, con ricerca per rilevanza"""
+
+    def __init__(self, path: str, max_age: float):
+        """
+        Args:
+            path: Percorso del file JSON del catalogo
+            max_age: Età massima (in secondi) dell'ultima sincronizzazione oltre la quale il catalogo è considerato obsoleto
+        """
+        self.path = path
+        self.max_age = max_age
+        self.synced_at = None
+        # Video, parole e ranker sostituiti insieme: replace può essere eseguito in un thread durante una ricerca
+        self._index = ([], [], BM25Ranker())
+        self._load()
+
+    @property
+    def videos(self) -> list:
+        return self._index[0]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._set_videos(data.get('videos', []), data.get('synced_at'))
+            logger.info(f"Catalogo video caricato: {len(self.videos)} video")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Impossibile leggere il catalogo video {self.path}: {str(e)}")
+
+    def _set_videos(self, videos: list, synced_at):
+        # Parole e statistiche vengono calcolate una sola volta per ogni aggiornamento del catalogo
+        token_lists = [
+            document_tokens(f"{video['title']} {' '.join(video.get('tags', []))}", video.get('description', ''))
+            for video in videos
+        ]
+        self._index = (videos, token_lists, BM25Ranker(stats=TermStatistics.from_token_lists(token_lists)))
+        self.synced_at = synced_at
+
+    def replace(self, videos: list):
+        """
+        Sostituisce il contenuto del catalogo e lo salva su disco.
+        Operazione bloccante: dall'event loop va eseguita con asyncio.to_thread.
+
+        Args:
+            videos: Lista di dizionari con id, title, description, tags e published_at
+        """
+        self._set_videos(videos, time.time())
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Scrittura su file temporaneo e rinomina, per non lasciare un catalogo troncato
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'synced_at': self.synced_at, 'videos': videos}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def search(self, keywords: list, max_results: int = 5) -> list:
+        """
+        Cerca i video più rilevanti per le keywords (titolo e tag pesano più della descrizione).
+
+        Args:
+            keywords: Lista di keywords
+            max_results: Numero massimo di video restituiti
+
+        Returns:
+            list: Dizionari con id, title e url, ordinati per rilevanza (solo video con almeno una keyword)
+        """
+        videos, token_lists, ranker = self._index
+        if not videos:
+            return []
+        scores = ranker.score_all(" ".join(keywords), token_lists)
+        order = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+        return [
+            {
+                'id': videos[i]['id'],
+                'title': videos[i]['title'],
+                'url': f"https://www.youtube.com/watch?v={videos[i]['id']}"
+            }
+            for i in order[:max_results]
+        ]
+
+    def age(self):
+        """Restituisce i secondi trascorsi dall'ultima sincronizzazione (None se mai sincronizzato)."""
+        if self.synced_at is None:
+            return None
+        return time.time() - self.synced_at
+
+    def is_stale(self) -> bool:
+        """True se il catalogo è vuoto, mai sincronizzato o più vecchio di max_age."""
+        age = self.age()
+        return age is None or age > self.max_age or not self.videos
+
+    def __len__(self) -> int:
+        return len(self.videos)
@@ -1,40 +1,254 @@
 # ==========================================================
 # wordpress_handler.py
-# Descrizione: Gestisce la comunicazione con l'API REST di WordPress per la ricerca di documenti/articoli e la creazione di draft tramite BetterDocs. Si occupa di autenticazione, paginazione e formattazione risultati.
-# Dipendenze principali: cloudscraper, dotenv, logging, config/config.json, os, json.
-# Flusso di lavoro: Invocato dai cog (topic_cog, draft_cog) per cercare documenti e creare draft su WordPress.
+# Descrizione: Gestisce la comunicazione con l'API REST di WordPress per la ricerca di documenti/articoli e la creazione di draft tramite BetterDocs. Si occupa di autenticazione, paginazione, formattazione risultati, cache delle ricerche, rivalidazione HTTP (ETag / Last-Modified) e sincronizzazione dell'indice locale dei documenti.
+# Dipendenze principali: cloudscraper, dotenv, logging, config/config.json, os, json, asyncio, concurrent.futures, requests, utils.cache, utils.docs_index, utils.http_cache, utils.resilience, utils.text_utils.
+# Flusso di lavoro: Invocato dai cog (topic_cog, draft_cog) per cercare documenti e creare draft su WordPress. Le chiamate HTTP (sincrone in cloudscraper) vengono eseguite su un pool di thread limitato, così da non bloccare l'event loop di Discord.
 # ==========================================================
 import cloudscraper
 import os
 from dotenv import load_dotenv
 import json
 import logging
+import asyncio
+import functools
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from utils.cache import TTLCache
+from utils.docs_index import DocsIndex
+from utils.http_cache import RevalidationCache
+from utils.resilience import get_resilience_policy, parse_retry_after
+from utils.text_utils import strip_html, normalize_key
 
 logger = logging.getLogger(__name__)
 
+# Status HTTP temporanei per cui una richiesta viene ritentata
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_STATUSES_NON_IDEMPOTENT = {429, 503}
+
+# Campi richiesti all'API REST per le ricerche (payload ridotto)
+SEARCH_FIELDS = 'id,title,link,excerpt'
+
+class WordPressError(Exception):
+    """Eccezione per le risposte di errore dell'API REST di WordPress"""
+    pass
+
+class DocResult:
+    """Risultato compatto di una ricerca, con titolo ed estratto già ripuliti dall'HTML"""
+    __slots__ = ('id', 'title', 'link', 'excerpt')
+
+    def __init__(self, id, title, link, excerpt=''):
+        self.id = id
+        self.title = title
+        self.link = link
+        self.excerpt = excerpt
+
+    @classmethod
+    def from_api(cls, doc):
+        """Crea un risultato da un documento dell'API REST."""
+        return cls(
+            id=doc.get('id'),
+            title=strip_html(doc.get('title', {}).get('rendered', '')),
+            link=doc.get('link', ''),
+            excerpt=strip_html(doc.get('excerpt', {}).get('rendered', ''))
+        )
+
+    def to_dict(self):
+        return {'id': self.id, 'title': self.title, 'link': self.link, 'excerpt': self.excerpt}
+
+    def __getitem__(self, key):
+        # Compatibilità con il vecchio formato a dizionario (doc['title'])
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+# Istanza condivisa tra i cog (una sola sessione keep-alive e un solo pool di thread)
+_shared_handler = None
+
+def get_wordpress_handler():
+    """
+    Restituisce l'istanza condivisa di WordPressHandler, creandola al primo utilizzo.
+    
+    Returns:
+        WordPressHandler: L'handler condiviso da tutti i cog
+    """
+    global _shared_handler
+    if _shared_handler is None:
+        _shared_handler = WordPressHandler()
+    return _shared_handler
+
 class WordPressHandler:
-    def __init__(self):
+    def __init__(self, config=None):
+        """
+        Args:
+            config (dict, optional): Configurazione già caricata (default: letta da config/config.json)
+        """
         load_dotenv()
         self.site_url = os.getenv('WP_API_URL')
         self.username = os.getenv('WP_USERNAME')
         self.app_password = os.getenv('WP_APP_PASSWORD')
-        self.scraper = cloudscraper.create_scraper()
         
         # Load config
-        with open('config/config.json', 'r') as f:
-            self.config = json.load(f)
-        self.per_page = self.config['wordpress']['results_per_page']
+        if config is None:
+            with open('config/config.json', 'r') as f:
+                config = json.load(f)
+        self.config = config
+        wp_config = self.config['wordpress']
+        self.per_page = wp_config['results_per_page']
+        self.max_workers = wp_config.get('max_workers', 8)
+        self.timeout = wp_config.get('timeout', 30)
+        self.page_concurrency = wp_config.get('page_concurrency', 4)
+        
+        # Sessione cloudscraper con pool di connessioni keep-alive dimensionato sul numero di worker
+        self.scraper = cloudscraper.create_scraper()
+        self._mount_pooled_adapters()
+        
+        # Pool di thread limitato su cui vengono eseguite le richieste sincrone
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='wordpress-http'
+        )
+        
+        # Retry e circuit breaker condivisi con gli altri handler
+        self.resilience = get_resilience_policy()
+        
+        # Cache LRU con scadenza dei risultati delle ricerche live
+        cache_config = wp_config.get('cache', {})
+        self.search_cache = TTLCache(
+            max_entries=cache_config.get('max_entries', 256),
+            ttl=cache_config.get('ttl_seconds', 600)
+        )
+        
+        # Cache HTTP persistente con richieste condizionali (ETag / Last-Modified)
+        http_cache_config = wp_config.get('http_cache', {})
+        self.http_cache = None
+        if http_cache_config.get('enabled', False):
+            self.http_cache = RevalidationCache(
+                http_cache_config.get('path', 'data/http_cache.sqlite3'),
+                max_entries=http_cache_config.get('max_entries', 2000)
+            )
+        
+        # Indice locale full-text dei documenti (opzionale)
+        index_config = wp_config.get('index', {})
+        self.docs_index = None
+        self._term_statistics = None
+        self.reconcile_interval = index_config.get('reconcile_interval_minutes', 360) * 60
+        if index_config.get('enabled', False):
+            self.docs_index = DocsIndex(
+                index_config.get('path', 'data/docs_index.sqlite3'),
+                max_age=index_config.get('max_age_minutes', 60) * 60
+            )
+
+    def _mount_pooled_adapters(self):
+        """
+        Sostituisce gli adapter della sessione con adapter dal pool di max_workers connessioni.
+        Per https si riusa il contesto SSL di cloudscraper, così da mantenere la sua suite TLS.
+        """
+        for prefix, adapter in list(self.scraper.adapters.items()):
+            options = {
+                'pool_connections': DEFAULT_POOLSIZE,
+                'pool_maxsize': self.max_workers,
+                'max_retries': adapter.max_retries
+            }
+            if isinstance(adapter, cloudscraper.CipherSuiteAdapter):
+                pooled = cloudscraper.CipherSuiteAdapter(
+                    ssl_context=adapter.ssl_context,
+                    source_address=adapter.source_address,
+                    **options
+                )
+            else:
+                pooled = HTTPAdapter(**options)
+            self.scraper.mount(prefix, pooled)
+            adapter.close()
+
+    async def _request(self, method, url, endpoint=None, **kwargs):
+        """
+        Esegue una richiesta HTTP con cloudscraper senza bloccare l'event loop.
+        Se viene indicato un endpoint, la richiesta passa dal livello di resilienza
+        (retry con backoff, Retry-After e circuit breaker).
+        
+        Args:
+            method (str): Metodo HTTP (GET, POST, ...)
+            url (str): URL della richiesta
+            endpoint (str, optional): Nome dell'endpoint per retry e circuit breaker
+            **kwargs: Parametri aggiuntivi passati a requests (params, json, ...)
+            
+        Returns:
+            requests.Response: La risposta HTTP
+            
+        Raises:
+            CircuitOpenError: Se il circuito dell'endpoint è aperto
+        """
+        kwargs.setdefault('auth', (self.username, self.app_password))
+        kwargs.setdefault('timeout', self.timeout)
+        loop = asyncio.get_running_loop()
+        
+        def send():
+            return loop.run_in_executor(
+                self._executor,
+                functools.partial(self._send, method, url, **kwargs)
+            )
+        
+        if endpoint is None:
+            return await send()
+        
+        # Le richieste non idempotenti vengono ritentate solo se il server non le ha elaborate
+        idempotent = method.upper() in ('GET', 'HEAD')
+        retry_statuses = RETRY_STATUSES if idempotent else RETRY_STATUSES_NON_IDEMPOTENT
+        retry_exceptions = (requests.ConnectionError, requests.Timeout) if idempotent else (requests.exceptions.ConnectTimeout,)
+        
+        def retry_result(response):
+            if response.status_code in retry_statuses:
+                return True, parse_retry_after(response.headers.get('Retry-After'))
+            return False, None
+        
+        def retry_exception(error):
+            return isinstance(error, retry_exceptions), None
+        
+        return await self.resilience.call(endpoint, send, retry_result=retry_result, retry_exception=retry_exception)
+
+    def _send(self, method, url, **kwargs):
+        """
+        Esegue la richiesta HTTP (nel pool di thread). Le GET passano dalla cache di rivalidazione:
+        se l'URL è già in cache si inviano gli header condizionali e una 304 viene servita dalla copia locale.
+        """
+        if self.http_cache is None or method.upper() != 'GET':
+            return self.scraper.request(method, url, **kwargs)
+        
+        key = self.http_cache.key(url, kwargs.get('params'))
+        conditional = self.http_cache.conditional_headers(key)
+        if conditional:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **conditional}
+        
+        response = self.scraper.request(method, url, **kwargs)
+        if response.status_code == 304 and conditional:
+            return self.http_cache.revalidate(key, response)
+        self.http_cache.store(key, response)
+        return response
+
+    def close(self):
+        """Chiude la sessione HTTP e il pool di thread."""
+        self._executor.shutdown(wait=False)
+        self.scraper.close()
+        if self.docs_index is not None:
+            self.docs_index.close()
+        if self.http_cache is not None:
+            self.http_cache.close()
+
+    def cache_stats(self):
+        """Restituisce le statistiche (hit, miss, voci) della cache delle ricerche."""
+        return self.search_cache.stats()
+
+    def http_cache_stats(self):
+        """Restituisce le statistiche della cache di rivalidazione HTTP (None se disabilitata)."""
+        return self.http_cache.stats() if self.http_cache is not None else None
         
     async def test_connection(self):
         try:
-            # Configurazione dell'autenticazione Basic
-            auth = (self.username, self.app_password)
-            
             # Tentativo di fare una richiesta GET all'endpoint
-            response = self.scraper.get(
-                self.site_url,
-                auth=auth
-            )
+            response = await self._request('GET', self.site_url)
             
             if response.status_code == 200:
                 return True, "Connessione a WordPress riuscita!"
@@ -44,55 +258,299 @@ class WordPressHandler:
         except Exception as e:
             return False, f"Errore nella connessione: {str(e)}"
 
-    async def search_docs(self, search_term):
+    async def _fetch_page(self, params, page):
+        """
+        Scarica una singola pagina della collezione dei documenti.
+        
+        Args:
+            params (dict): Parametri della query (search, modified_after, _fields, ...)
+            page (int): Il numero di pagina da scaricare
+            
+        Returns:
+            tuple: (success, docs, total_pages, total)
+                - success (bool): True se la pagina è stata scaricata (o non esiste)
+                - docs (list/str): Documenti della pagina o messaggio di errore
+                - total_pages (int): Numero totale di pagine indicato da X-WP-TotalPages
+                - total (int): Numero totale di documenti indicato da X-WP-Total
+        """
+        response = await self._request(
+            'GET',
+            self.site_url,
+            endpoint='wordpress:docs',
+            params={**params, 'per_page': self.per_page, 'page': page}
+        )
+        
+        if response.status_code == 200:
+            docs = response.json()
+            total_pages = int(response.headers.get('X-WP-TotalPages', '1'))
+            total = int(response.headers.get('X-WP-Total', str(len(docs))))
+            return True, docs, total_pages, total
+        elif response.status_code == 400:
+            # La pagina richiesta non esiste, nessun risultato
+            return True, [], 0, 0
+        else:
+            return False, f"Errore nella ricerca: Status code {response.status_code}", 0, 0
+
+    async def iter_docs(self, search_term, on_total=None, use_index=None, fields=SEARCH_FIELDS):
+        """
+        Cerca documenti e li restituisce uno alla volta, pagina per pagina, appena disponibili.
+        Le pagine successive alla prima vengono scaricate in anticipo (con limite di concorrenza);
+        se il consumatore si ferma prima della fine, le richieste ancora in corso vengono annullate.
+        
+        Nota: chi interrompe l'iterazione deve chiamare aclose() sul generatore.
+        
+        Args:
+            search_term (str): Il termine di ricerca
+            on_total (callable, optional): Chiamata una sola volta con il numero totale di risultati
+            use_index (bool, optional): Forza (True) o esclude (False) l'uso dell'indice locale.
+                Di default l'indice viene usato se abilitato in configurazione.
+            fields (str, optional): Campi richiesti all'API REST tramite _fields
+            
+        Yields:
+            DocResult: I documenti trovati, nell'ordine restituito da WordPress
+            
+        Raises:
+            WordPressError: Se WordPress risponde con un errore
+        """
+        if use_index is None:
+            use_index = self.docs_index is not None
+        if use_index and self.docs_index is not None:
+            # Le query all'indice attendono il lock tenuto dalla sincronizzazione: si eseguono nel pool di thread
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(self._executor, self.docs_index.is_stale):
+                docs = await loop.run_in_executor(self._executor, self.docs_index.search, search_term)
+                results = [DocResult(**doc) for doc in docs]
+                logger.debug(f"Ricerca '{search_term}' servita dall'indice locale ({len(results)} risultati)")
+                if on_total:
+                    on_total(len(results))
+                for doc in results:
+                    yield doc
+                return
+            logger.info("Indice locale dei documenti non aggiornato: uso la ricerca live")
+
+        # Le ricerche equivalenti (maiuscole, spazi, accenti) condividono la stessa voce di cache
+        cache_key = normalize_key(search_term)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Ricerca '{search_term}' servita dalla cache")
+            if on_total:
+                on_total(len(cached))
+            for doc in cached:
+                yield doc
+            return
+
+        # La prima pagina indica il numero totale di pagine
+        params = {'search': search_term}
+        if fields:
+            params['_fields'] = fields
+        success, first_page, total_pages, total = await self._fetch_page(params, 1)
+        if not success:
+            raise WordPressError(first_page)
+        if on_total:
+            on_total(total)
+        
+        collected = [DocResult.from_api(doc) for doc in first_page]
+        pending = []
         try:
-            auth = (self.username, self.app_password)
-            formatted_results = []
-            page = 1
+            for doc in collected:
+                yield doc
             
-            while True:
-                # Costruzione dell'URL con paginazione
-                search_url = f"{self.site_url}?search={search_term}&per_page={self.per_page}&page={page}"
+            if total_pages > 1:
+                # Scarica le pagine rimanenti in parallelo, con un limite di concorrenza
+                semaphore = asyncio.Semaphore(self.page_concurrency)
                 
-                # Esecuzione della ricerca
-                response = self.scraper.get(
-                    search_url,
-                    auth=auth
-                )
+                async def fetch(page):
+                    async with semaphore:
+                        return await self._fetch_page(params, page)
                 
-                if response.status_code == 200:
-                    results = response.json()
-                    if not results:
-                        break  # Nessun altro risultato disponibile
-                        
-                    # Aggiunge i risultati di questa pagina
-                    for doc in results:
-                        formatted_results.append({
-                            'title': doc.get('title', {}).get('rendered', ''),
-                            'link': doc.get('link', ''),
-                            'excerpt': doc.get('excerpt', {}).get('rendered', '')
-                        })
-                    
-                    # Controlla se ci sono altre pagine
-                    total_pages = int(response.headers.get('X-WP-TotalPages', '1'))
-                    if page >= total_pages:
-                        break
-                        
-                    page += 1
-                elif response.status_code == 400:
-                    # La pagina richiesta non esiste, abbiamo finito
-                    break
-                else:
-                    return False, f"Errore nella ricerca: Status code {response.status_code}"
+                pending = [asyncio.ensure_future(fetch(page)) for page in range(2, total_pages + 1)]
+                # Le pagine vengono restituite nell'ordine originale
+                for task in pending:
+                    success, docs, _, _ = await task
+                    if not success:
+                        raise WordPressError(docs)
+                    page_results = [DocResult.from_api(doc) for doc in docs]
+                    collected.extend(page_results)
+                    for doc in page_results:
+                        yield doc
             
+            # Solo le ricerche completate vengono messe in cache
+            self.search_cache.set(cache_key, collected)
+        finally:
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+
+    async def search_docs(self, search_term, use_index=None):
+        """
+        Cerca documenti su WordPress, o nell'indice locale se abilitato e aggiornato.
+        
+        Args:
+            search_term (str): Il termine di ricerca
+            use_index (bool, optional): Forza (True) o esclude (False) l'uso dell'indice locale.
+                Di default l'indice viene usato se abilitato in configurazione.
+            
+        Returns:
+            tuple: (success, results)
+                - success (bool): True se sono stati trovati documenti
+                - results (list/str): Lista di documenti (id, title, link, excerpt) o messaggio di errore
+        """
+        try:
+            formatted_results = [
+                doc.to_dict() async for doc in self.iter_docs(search_term, use_index=use_index)
+            ]
             if formatted_results:
                 return True, formatted_results
             else:
                 return False, "Nessun documento trovato per questo argomento."
                 
+        except WordPressError as e:
+            return False, str(e)
         except Exception as e:
             return False, f"Errore durante la ricerca: {str(e)}"
 
+    async def get_term_statistics(self):
+        """
+        Restituisce le statistiche dei termini del corpus indicizzato (calcolate una volta
+        e riutilizzate fino alla prossima sincronizzazione con modifiche).
+        
+        Returns:
+            TermStatistics: Le statistiche, o None se l'indice locale non è disponibile
+        """
+        if self.docs_index is None:
+            return None
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(self._executor, self.docs_index.count) == 0:
+            return None
+        if self._term_statistics is None:
+            self._term_statistics = await loop.run_in_executor(self._executor, self.docs_index.term_statistics)
+        return self._term_statistics
+
+    async def _fetch_all_ids(self):
+        """
+        Scarica gli id di tutti i documenti pubblicati (solo il campo id, pagina per pagina).
+        
+        Returns:
+            tuple: (success, result)
+                - success (bool): True se l'elenco è completo
+                - result (set/str): Gli id dei documenti o messaggio di errore
+        """
+        params = {'orderby': 'id', 'order': 'asc', '_fields': 'id'}
+        ids = set()
+        expected = None
+        page = 1
+        while True:
+            success, docs, total_pages, total = await self._fetch_page(params, page)
+            if not success:
+                return False, docs
+            if expected is None:
+                expected = total
+            ids.update(doc['id'] for doc in docs if 'id' in doc)
+            if page >= total_pages:
+                break
+            page += 1
+        if len(ids) != expected:
+            # Documenti aggiunti o eliminati durante la paginazione: l'elenco potrebbe essere incompleto
+            return False, f"Elenco degli id incompleto ({len(ids)} su {expected})"
+        return True, ids
+
+    async def _reconcile_docs_index(self, ids=None):
+        """
+        Rimuove dall'indice locale i documenti eliminati, nel cestino o non più pubblicati,
+        che la sincronizzazione incrementale (modified_after) non può rilevare.
+        
+        Args:
+            ids (set, optional): Id già noti di tutti i documenti (default: scaricati da WordPress)
+            
+        Returns:
+            tuple: (success, result)
+                - success (bool): True se il confronto è stato eseguito
+                - result (int/str): Numero di documenti rimossi o messaggio di errore
+        """
+        if ids is None:
+            success, ids = await self._fetch_all_ids()
+            if not success:
+                return False, ids
+        if not ids:
+            # Un elenco vuoto indica più probabilmente un problema dell'endpoint che un sito senza documenti
+            return False, "Nessun documento restituito da WordPress: indice locale non modificato"
+        loop = asyncio.get_running_loop()
+        removed = await loop.run_in_executor(self._executor, self.docs_index.prune, ids)
+        await loop.run_in_executor(self._executor, self.docs_index.mark_reconciled)
+        return True, removed
+
+    async def sync_docs_index(self):
+        """
+        Sincronizza in modo incrementale l'indice locale con WordPress, scaricando solo
+        i documenti modificati dopo l'ultimo modified_gmt indicizzato. Ogni reconcile_interval
+        confronta anche gli id indicizzati con quelli pubblicati e rimuove i documenti mancanti.
+        
+        Returns:
+            tuple: (success, result)
+                - success (bool): True se la sincronizzazione è riuscita
+                - result (int/str): Numero di documenti aggiornati o rimossi, oppure messaggio di errore
+        """
+        if self.docs_index is None:
+            return False, "Indice locale dei documenti disabilitato"
+        try:
+            loop = asyncio.get_running_loop()
+            params = {
+                'orderby': 'modified',
+                'order': 'asc',
+                '_fields': 'id,title,link,excerpt,content,modified_gmt'
+            }
+            last_modified = await loop.run_in_executor(self._executor, self.docs_index.last_modified)
+            if last_modified:
+                # Margine di un secondo: modified_after è esclusivo e l'upsert è idempotente
+                since = datetime.fromisoformat(last_modified) - timedelta(seconds=1)
+                params['modified_after'] = since.strftime('%Y-%m-%dT%H:%M:%SZ')
+            
+            updated = 0
+            # Con un download completo gli id di tutti i documenti sono già disponibili
+            seen_ids = set() if not last_modified else None
+            expected = None
+            page = 1
+            while True:
+                success, docs, total_pages, total = await self._fetch_page(params, page)
+                if not success:
+                    return False, docs
+                if expected is None:
+                    expected = total
+                if docs:
+                    updated += await loop.run_in_executor(self._executor, self.docs_index.upsert, docs)
+                    if seen_ids is not None:
+                        seen_ids.update(doc['id'] for doc in docs if 'id' in doc)
+                if page >= total_pages:
+                    break
+                page += 1
+            
+            await loop.run_in_executor(self._executor, self.docs_index.mark_synced)
+            
+            removed = 0
+            reconcile_age = await loop.run_in_executor(self._executor, self.docs_index.reconcile_age)
+            if seen_ids is not None and len(seen_ids) == expected:
+                success, result = await self._reconcile_docs_index(seen_ids)
+            elif reconcile_age is None or reconcile_age >= self.reconcile_interval:
+                success, result = await self._reconcile_docs_index()
+            else:
+                success, result = True, 0
+            if success:
+                removed = result
+            else:
+                # Gli aggiornamenti sono comunque validi: il confronto verrà ripetuto alla prossima sincronizzazione
+                logger.warning(f"Confronto degli id dell'indice locale non eseguito: {result}")
+            
+            if updated or removed:
+                # I documenti sono cambiati: i risultati in cache e le statistiche potrebbero essere superati
+                self.search_cache.invalidate()
+                self._term_statistics = None
+            logger.info(f"Indice locale dei documenti sincronizzato: {updated} documenti aggiornati, {removed} rimossi")
+            return True, updated + removed
+            
+        except Exception as e:
+            logger.error(f"Errore durante la sincronizzazione dell'indice locale: {str(e)}", exc_info=True)
+            return False, f"Errore durante la sincronizzazione dell'indice: {str(e)}"
+
     async def create_draft(self, title, content):
         """
         Crea una bozza su WordPress usando l'API REST di BetterDocs.
@@ -134,19 +592,14 @@ class WordPressHandler:
                 'status': 'draft'  # Crea come bozza
             }
             
-            # Configurazione dell'autenticazione Basic
-            auth = (self.username, self.app_password)
-            
             # Esegui la richiesta POST
-            response = self.scraper.post(
-                endpoint,
-                json=data,
-                auth=auth
-            )
+            response = await self._request('POST', endpoint, endpoint='wordpress:create_draft', json=data)
             
             if response.status_code in [200, 201]:
                 post_data = response.json()
                 post_url = post_data.get('link', '')
+                # Il nuovo contenuto rende superati i risultati di ricerca in cache
+                self.search_cache.invalidate()
                 return True, "✅ Bozza creata con successo!", post_url
             else:
                 error_msg = f"❌ Errore nella creazione della bozza: Status code {response.status_code}"
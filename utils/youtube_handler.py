@@ -1,15 +1,80 @@
 # ==========================================================
 # youtube_handler.py
-# Descrizione: Gestisce la comunicazione con l'API di YouTube per recuperare informazioni sul canale e cercare video tramite keywords. Si occupa di autenticazione e parsing dei risultati.
-# Dipendenze principali: googleapiclient, dotenv, logging, config/config.json, os, json.
-# Flusso di lavoro: Invocato dai cog (config_cog, draft_cog) per mostrare info canale e suggerire video correlati.
+# Descrizione: Gestisce la comunicazione con l'API di YouTube per recuperare informazioni sul canale e cercare video tramite keywords. Si occupa di autenticazione e parsing dei risultati. Il client viene costruito una sola volta dal documento di discovery statico incluso nella libreria (nessun download all'avvio) ed è condiviso da tutti i cog.
+# Dipendenze principali: googleapiclient, httplib2, dotenv, logging, config/config.json, os, json, html, asyncio, threading, re, math, datetime, concurrent.futures, utils.cache, utils.resilience, utils.video_catalog, utils.youtube_quota.
+# Flusso di lavoro: Invocato dai cog (config_cog, draft_cog) tramite get_youtube_handler() per mostrare info canale e suggerire video correlati; i video vengono cercati nel catalogo locale del canale quando è abilitato e aggiornato. Le chiamate all'API (sincrone in googleapiclient) vengono eseguite su un pool di thread limitato, ognuno con la propria connessione httplib2, così da non bloccare l'event loop di Discord. Ogni chiamata viene addebitata sulla quota giornaliera e, vicino al limite, le ricerche ripiegano sul catalogo locale. I dettagli dei video (visualizzazioni, durata) vengono richiesti in blocco e messi in cache per ID.
 # ==========================================================
 import os
 from dotenv import load_dotenv
 import googleapiclient.discovery
+import httplib2
 import logging
 import json
+import asyncio
+import functools
+import html
+import math
+import re
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from googleapiclient import discovery_cache
 from googleapiclient.errors import HttpError
+from utils.cache import TTLCache
+from utils.resilience import get_resilience_policy, parse_retry_after
+from utils.video_catalog import VideoCatalog
+from utils.youtube_quota import QuotaTracker
+
+# Status HTTP temporanei per cui una richiesta viene ritentata
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Motivi di un 403 che indicano un limite di frequenza (la quota giornaliera esaurita non si ritenta)
+RETRY_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+# Durata ISO 8601 restituita da contentDetails (es. "PT1H2M30S")
+_DURATION_RE = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+def parse_duration(value):
+    """Converte una durata ISO 8601 di YouTube in secondi (0 se non valida)."""
+    match = _DURATION_RE.match(value or '')
+    if not match:
+        return 0
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+def _error_reasons(error):
+    """Estrae i motivi (campo "reason") dal corpo JSON di un errore dell'API YouTube."""
+    try:
+        data = json.loads(error.content.decode('utf-8'))
+        return {item.get('reason') for item in data['error'].get('errors', []) if isinstance(item, dict)}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+
+def _retry_http_error(error):
+    """Classifica un errore dell'API YouTube: (ritentare, retry_after)."""
+    if not isinstance(error, HttpError):
+        return False, None
+    status = error.resp.status
+    retry_after = parse_retry_after(error.resp.get('retry-after'))
+    if status in RETRY_STATUSES:
+        return True, retry_after
+    if status == 403:
+        return bool(_error_reasons(error) & RETRY_REASONS), retry_after
+    return False, None
+
+# Istanza condivisa tra i cog (un solo client e un solo pool di thread)
+_shared_handler = None
+
+def get_youtube_handler():
+    """
+    Restituisce l'istanza condivisa di YouTubeHandler, creandola al primo utilizzo.
+    
+    Returns:
+        YouTubeHandler: L'handler condiviso da tutti i cog
+    """
+    global _shared_handler
+    if _shared_handler is None:
+        _shared_handler = YouTubeHandler()
+    return _shared_handler
 
 class YouTubeHandler:
     def __init__(self):
@@ -19,18 +84,154 @@ class YouTubeHandler:
         # Carica la configurazione
         with open('config/config.json', 'r') as f:
             self.config = json.load(f)
+        yt_config = self.config['youtube']
+        self.max_workers = yt_config.get('max_workers', 4)
+        self.timeout = yt_config.get('timeout', 30)
+        
+        # Inizializza l'API di YouTube dal documento di discovery statico (senza richieste di rete)
+        developer_key = os.getenv('YOUTUBE_API_KEY')
+        discovery_document = discovery_cache.get_static_doc("youtube", "v3")
+        if discovery_document is not None:
+            self.youtube = googleapiclient.discovery.build_from_document(
+                discovery_document, developerKey=developer_key, http=httplib2.Http(timeout=self.timeout)
+            )
+        else:
+            self.logger.warning("Documento di discovery statico non disponibile, lo scarico da Google")
+            self.youtube = googleapiclient.discovery.build(
+                "youtube", "v3", developerKey=developer_key, cache_discovery=False
+            )
+        self.channel_id = yt_config['channel_id']
+        
+        # Pool di thread limitato su cui vengono eseguite le richieste sincrone;
+        # httplib2.Http non è thread-safe, quindi ogni thread usa la propria connessione
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='youtube-api'
+        )
+        self._thread_local = threading.local()
         
-        # Inizializza l'API di YouTube
-        self.youtube = googleapiclient.discovery.build(
-            "youtube", "v3", developerKey=os.getenv('YOUTUBE_API_KEY')
+        # Retry e circuit breaker condivisi con gli altri handler
+        self.resilience = get_resilience_policy()
+        
+        # Cache delle informazioni dei canali (stale-while-revalidate)
+        channel_cache_config = yt_config.get('channel_info_cache', {})
+        self.channel_cache = TTLCache(
+            max_entries=channel_cache_config.get('max_entries', 16),
+            ttl=channel_cache_config.get('ttl_minutes', 30) * 60
+        )
+        self.channel_max_stale = channel_cache_config.get('max_stale_hours', 24) * 3600
+        self._channel_refreshes = {}
+        
+        # Contabilità e budget della quota giornaliera dell'API
+        quota_config = yt_config.get('quota', {})
+        self.quota = None
+        if quota_config.get('enabled', True):
+            self.quota = QuotaTracker(
+                quota_config.get('path', 'data/youtube_quota.json'),
+                daily_limit=quota_config.get('daily_limit', 10000),
+                search_threshold=quota_config.get('search_threshold', 0.8),
+                save_delay=quota_config.get('save_delay_seconds', 5)
+            )
+        
+        # Arricchimento dei video (statistiche e durata) con cache per ID
+        enrichment_config = yt_config.get('enrichment', {})
+        self.enrichment_enabled = enrichment_config.get('enabled', True)
+        self.enrichment_candidates = enrichment_config.get('candidates', 15)
+        self.min_duration = enrichment_config.get('min_duration_seconds', 60)
+        self.recency_half_life = enrichment_config.get('recency_half_life_days', 365)
+        self.video_weights = {'relevance': 0.6, 'popularity': 0.3, 'recency': 0.1}
+        self.video_weights.update(enrichment_config.get('weights', {}))
+        self.video_details_cache = TTLCache(
+            max_entries=enrichment_config.get('cache_max_entries', 2000),
+            ttl=enrichment_config.get('cache_ttl_hours', 6) * 3600
         )
-        self.channel_id = self.config['youtube']['channel_id']
+        
+        # Catalogo locale dei video del canale (opzionale)
+        catalog_config = yt_config.get('catalog', {})
+        self.video_catalog = None
+        if catalog_config.get('enabled', False):
+            self.video_catalog = VideoCatalog(
+                catalog_config.get('path', 'data/youtube_catalog.json'),
+                max_age=catalog_config.get('max_age_hours', 48) * 3600
+            )
         
         self.logger.info("YouTubeHandler inizializzato con successo")
 
+    async def _execute(self, endpoint, request):
+        """
+        Esegue una richiesta all'API di YouTube con retry e circuit breaker.
+        
+        Args:
+            endpoint (str): Nome dell'endpoint per retry e circuit breaker
+            request: La richiesta googleapiclient da eseguire
+            
+        Returns:
+            dict: La risposta dell'API
+        """
+        loop = asyncio.get_running_loop()
+        
+        def attempt():
+            # Ogni tentativo consuma quota, anche se fallisce
+            if self.quota is not None:
+                self.quota.record(endpoint)
+            return loop.run_in_executor(self._executor, functools.partial(self._execute_in_thread, request))
+        
+        try:
+            return await self.resilience.call(endpoint, attempt, retry_exception=_retry_http_error)
+        except HttpError as e:
+            if self.quota is not None and e.resp.status == 403 and 'quotaExceeded' in _error_reasons(e):
+                self.quota.exhaust()
+            raise
+
+    def _execute_in_thread(self, request):
+        """Esegue la richiesta nel thread corrente con la sua connessione httplib2."""
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            http = self._thread_local.http = httplib2.Http(timeout=self.timeout)
+        return request.execute(http=http)
+
+    def close(self):
+        """Chiude il pool di thread, annulla gli aggiornamenti in background e salva la quota usata."""
+        for task in self._channel_refreshes.values():
+            task.cancel()
+        if self.quota is not None:
+            self.quota.flush()
+        self._executor.shutdown(wait=False)
+
     async def get_channel_info(self, channel_id):
         """
         Ottiene le informazioni di un canale YouTube dato il suo ID.
+        Le informazioni vengono servite dalla cache; se sono scadute (ma non oltre max_stale)
+        si restituisce subito la copia in cache e la si aggiorna in background.
+        
+        Args:
+            channel_id (str): L'ID del canale YouTube
+            
+        Returns:
+            tuple: (success, result)
+                - success (bool): True se la richiesta è andata a buon fine
+                - result (dict/str): Dizionario con le informazioni del canale o messaggio di errore
+        """
+        channel_info, age = self.channel_cache.peek(channel_id)
+        if channel_info is not None and age <= self.channel_cache.ttl + self.channel_max_stale:
+            if age > self.channel_cache.ttl:
+                self._schedule_channel_refresh(channel_id)
+            return True, channel_info
+        return await self.refresh_channel_info(channel_id)
+
+    def channel_info_age(self, channel_id):
+        """Restituisce l'età in secondi delle informazioni del canale in cache (None se assenti)."""
+        return self.channel_cache.age(channel_id)
+
+    def _schedule_channel_refresh(self, channel_id):
+        # Un solo aggiornamento in background per canale
+        task = self._channel_refreshes.get(channel_id)
+        if task is None or task.done():
+            self._channel_refreshes[channel_id] = asyncio.create_task(self.refresh_channel_info(channel_id))
+
+    async def refresh_channel_info(self, channel_id):
+        """
+        Scarica le informazioni di un canale dall'API e aggiorna la cache.
         
         Args:
             channel_id (str): L'ID del canale YouTube
@@ -48,7 +249,7 @@ class YouTubeHandler:
                 part="snippet,statistics",
                 id=channel_id
             )
-            response = request.execute()
+            response = await self._execute('youtube:channels', request)
             
             # Verifica se il canale esiste
             if not response['items']:
@@ -66,6 +267,7 @@ class YouTubeHandler:
             }
             
             self.logger.info(f"Informazioni del canale recuperate con successo: {channel_info['title']}")
+            self.channel_cache.set(channel_id, channel_info)
             return True, channel_info
             
         except HttpError as e:
@@ -77,13 +279,28 @@ class YouTubeHandler:
             self.logger.error(error_msg)
             return False, error_msg
 
-    async def search_videos(self, keywords, max_results=5):
+    def video_search_allowed(self):
+        """True se la politica di budget consente una ricerca search.list (100 unità)."""
+        return self.quota is None or self.quota.allows('youtube:search')
+
+    def video_search_available(self):
+        """True se search_videos può restituire risultati (catalogo locale disponibile o budget sufficiente)."""
+        has_catalog = self.video_catalog is not None and len(self.video_catalog) > 0
+        return has_catalog or self.video_search_allowed()
+
+    def quota_stats(self):
+        """Restituisce l'utilizzo della quota giornaliera (None se la contabilità è disabilitata)."""
+        return self.quota.stats() if self.quota is not None else None
+
+    async def search_videos(self, keywords, max_results=5, use_catalog=None):
         """
         Cerca video nel canale specificato usando le keywords fornite.
+        Se il catalogo locale è abilitato e aggiornato, la ricerca avviene in locale senza consumare quota.
         
         Args:
             keywords (list): Lista di keywords per la ricerca
             max_results (int): Numero massimo di risultati da restituire
+            use_catalog (bool, optional): Forza (True) o esclude (False) il catalogo locale
             
         Returns:
             tuple: (success, results)
@@ -93,6 +310,21 @@ class YouTubeHandler:
         try:
             self.logger.info(f"Ricerca video per keywords: {keywords}")
             
+            if use_catalog is None:
+                use_catalog = self.video_catalog is not None and not self.video_catalog.is_stale()
+            if not use_catalog and not self.video_search_allowed():
+                # Budget quasi esaurito: si ripiega sul catalogo locale anche se non aggiornato
+                if self.video_catalog is None or not len(self.video_catalog):
+                    error_msg = "Quota YouTube quasi esaurita: ricerca dei video saltata"
+                    self.logger.warning(error_msg)
+                    return False, error_msg
+                self.logger.warning("Quota YouTube quasi esaurita: uso il catalogo locale non aggiornato")
+                use_catalog = True
+            if use_catalog and self.video_catalog is not None:
+                videos = self.video_catalog.search(keywords, max_results)
+                self.logger.info(f"Trovati {len(videos)} video nel catalogo locale")
+                return True, videos
+            
             # Combina le keywords in una singola stringa di ricerca
             search_query = " ".join(keywords)
             
@@ -105,14 +337,15 @@ class YouTubeHandler:
                 maxResults=max_results,
                 order="relevance"
             )
-            response = request.execute()
+            response = await self._execute('youtube:search', request)
             
             # Estrai i video trovati
             videos = []
             for item in response.get('items', []):
                 video = {
                     'id': item['id']['videoId'],
-                    'title': item['snippet']['title'],
+                    # search.list restituisce i titoli con entità HTML, videos.list (catalogo) in testo semplice
+                    'title': html.unescape(item['snippet']['title']),
                     'url': f"https://www.youtube.com/watch?v={item['id']['videoId']}"
                 }
                 videos.append(video)
@@ -127,4 +360,150 @@ class YouTubeHandler:
         except Exception as e:
             error_msg = f"Errore durante la ricerca dei video: {str(e)}"
             self.logger.error(error_msg)
-            return False, error_msg 
\ No newline at end of file
+            return False, error_msg 
+
+    async def enrich_videos(self, videos):
+        """
+        Aggiunge ai video statistiche, durata e data di pubblicazione. I dettagli mancanti in cache
+        vengono richiesti con una sola chiamata videos.list ogni 50 ID (1 unità di quota per chiamata).
+        
+        Args:
+            videos (list): Lista di video (dizionari con almeno 'id')
+            
+        Returns:
+            tuple: (success, result)
+                - success (bool): True se i dettagli sono stati recuperati
+                - result (list/str): Video arricchiti (stesso ordine) o messaggio di errore
+        """
+        try:
+            missing = [video['id'] for video in videos if self.video_details_cache.get(video['id']) is None]
+            for start in range(0, len(missing), 50):
+                response = await self._execute('youtube:videos', self.youtube.videos().list(
+                    part="snippet,statistics,contentDetails",
+                    id=",".join(missing[start:start + 50])
+                ))
+                for item in response.get('items', []):
+                    statistics = item.get('statistics', {})
+                    self.video_details_cache.set(item['id'], {
+                        'view_count': int(statistics.get('viewCount', 0)),
+                        'like_count': int(statistics.get('likeCount', 0)),
+                        'duration': parse_duration(item.get('contentDetails', {}).get('duration')),
+                        'published_at': item.get('snippet', {}).get('publishedAt', '')
+                    })
+            self.logger.info(f"Dettagli di {len(videos)} video ({len(missing)} richiesti all'API)")
+            return True, [
+                {**video, **(self.video_details_cache.get(video['id']) or {})}
+                for video in videos
+            ]
+            
+        except HttpError as e:
+            error_msg = f"Errore API YouTube: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+        except Exception as e:
+            error_msg = f"Errore durante il recupero dei dettagli dei video: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+
+    def _video_score(self, video, rank, max_views):
+        # Combinazione di rilevanza (posizione nei risultati), popolarità (visualizzazioni, scala log) e recenza
+        relevance = 1 / (1 + rank)
+        popularity = math.log1p(video.get('view_count', 0)) / math.log1p(max_views) if max_views else 0.0
+        recency = 0.0
+        if video.get('published_at'):
+            published = datetime.fromisoformat(video['published_at'].replace('Z', '+00:00'))
+            age_days = (datetime.now(timezone.utc) - published).total_seconds() / 86400
+            recency = 0.5 ** (max(0.0, age_days) / self.recency_half_life)
+        weights = self.video_weights
+        return weights['relevance'] * relevance + weights['popularity'] * popularity + weights['recency'] * recency
+
+    async def select_best_videos(self, videos, count):
+        """
+        Sceglie i migliori video tra i candidati combinando rilevanza, visualizzazioni e recenza.
+        I video più corti di min_duration_seconds (es. Shorts) vengono scartati se restano abbastanza candidati.
+        
+        Args:
+            videos (list): Candidati ordinati per rilevanza
+            count (int): Numero di video da restituire
+            
+        Returns:
+            list: I video scelti, arricchiti con i dettagli (i primi candidati se i dettagli non sono disponibili)
+        """
+        if not videos:
+            return []
+        success, enriched = await self.enrich_videos(videos)
+        if not success:
+            return videos[:count]
+        long_videos = [video for video in enriched if video.get('duration', 0) >= self.min_duration]
+        if len(long_videos) >= count:
+            enriched = long_videos
+        max_views = max(video.get('view_count', 0) for video in enriched)
+        ranks = {video['id']: rank for rank, video in enumerate(videos)}
+        enriched.sort(key=lambda video: -self._video_score(video, ranks[video['id']], max_views))
+        return enriched[:count]
+
+    async def sync_video_catalog(self):
+        """
+        Aggiorna il catalogo locale con tutti i video caricati sul canale.
+        Usa la playlist degli upload (playlistItems.list) e videos.list per i tag: 1 unità di quota
+        per ogni pagina di 50 video, invece delle 100 unità di ogni search.list.
+        
+        Returns:
+            tuple: (success, result)
+                - success (bool): True se la sincronizzazione è andata a buon fine
+                - result (int/str): Numero di video nel catalogo o messaggio di errore
+        """
+        if self.video_catalog is None:
+            return False, "Catalogo video non abilitato"
+        try:
+            # Playlist degli upload del canale
+            response = await self._execute('youtube:channels', self.youtube.channels().list(
+                part="contentDetails",
+                id=self.channel_id
+            ))
+            if not response.get('items'):
+                return False, f"Canale non trovato: {self.channel_id}"
+            uploads_playlist = response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+            
+            videos = []
+            page_token = None
+            while True:
+                playlist_page = await self._execute('youtube:playlist_items', self.youtube.playlistItems().list(
+                    part="contentDetails",
+                    playlistId=uploads_playlist,
+                    maxResults=50,
+                    pageToken=page_token
+                ))
+                video_ids = [item['contentDetails']['videoId'] for item in playlist_page.get('items', [])]
+                if video_ids:
+                    # I tag non sono inclusi in playlistItems: si leggono con videos.list (fino a 50 ID per chiamata)
+                    details = await self._execute('youtube:videos', self.youtube.videos().list(
+                        part="snippet",
+                        id=",".join(video_ids)
+                    ))
+                    for item in details.get('items', []):
+                        snippet = item['snippet']
+                        videos.append({
+                            'id': item['id'],
+                            'title': snippet.get('title', ''),
+                            'description': snippet.get('description', ''),
+                            'tags': snippet.get('tags', []),
+                            'published_at': snippet.get('publishedAt', '')
+                        })
+                page_token = playlist_page.get('nextPageToken')
+                if not page_token:
+                    break
+            
+            # Indicizzazione e scrittura del file fuori dall'event loop
+            await asyncio.to_thread(self.video_catalog.replace, videos)
+            self.logger.info(f"Catalogo video sincronizzato: {len(videos)} video")
+            return True, len(videos)
+            
+        except HttpError as e:
+            error_msg = f"Errore API YouTube: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+        except Exception as e:
+            error_msg = f"Errore durante la sincronizzazione del catalogo video: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
@@ -0,0 +1,186 @@
+# ==========================================================
+# youtube_quota.py
+# Descrizione: Contabilità della quota giornaliera dell'API YouTube Data v3. Registra il costo in unità di ogni chiamata (search.list = 100, le altre letture = 1), salva i contatori su disco (con scrittura differita fuori dall'event loop) e li azzera alla mezzanotte del Pacifico, come fa Google. Applica una politica di budget: oltre la soglia configurata le ricerche costose vengono evitate, al limite giornaliero ogni chiamata viene bloccata.
+# Dipendenze principali: asyncio, json, os, logging, threading, datetime, zoneinfo.
+# Flusso di lavoro: Usato da YouTubeHandler prima di ogni chiamata all'API; search_videos ripiega sul catalogo locale (o salta la ricerca) quando il budget non consente search.list. L'utilizzo è mostrato dal comando !status.
+# ==========================================================
+import asyncio
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+# La quota giornaliera di YouTube si azzera a mezzanotte, ora del Pacifico
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+# Costo in unità delle chiamate usate dal bot (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    'youtube:search': 100
+}
+DEFAULT_COST = 1
+
+class QuotaExceededError(Exception):
+    """Eccezione sollevata quando una chiamata supererebbe il budget giornaliero della quota"""
+
+    def __init__(self, endpoint: str, used: int, daily_limit: int):
+        self.endpoint = endpoint
+        super().__init__(
+            f"Quota YouTube esaurita per oggi ({used}/{daily_limit} unità): chiamata {endpoint} non eseguita"
+        )
+
+def quota_cost(endpoint: str) -> int:
+    """Restituisce il costo in unità di una chiamata all'endpoint indicato."""
+    return QUOTA_COSTS.get(endpoint, DEFAULT_COST)
+
+class QuotaTracker:
+    """Contatori giornalieri della quota YouTube, persistiti su disco"""
+
+    def __init__(self, path: str, daily_limit: int = 10000, search_threshold: float = 0.8, save_delay: float = 5.0):
+        """
+        Args:
+            path: Percorso del file JSON dei contatori
+            daily_limit: Quota giornaliera del progetto, in unità
+            search_threshold: Frazione del limite oltre la quale le ricerche (search.list) non vengono più eseguite
+            save_delay: Secondi di attesa prima di salvare i contatori, per raggruppare più chiamate in una scrittura
+        """
+        self.path = path
+        self.daily_limit = daily_limit
+        self.search_threshold = search_threshold
+        self.save_delay = save_delay
+        self.day = self._today()
+        self.used = 0
+        self.by_endpoint = {}
+        self._dirty = False
+        self._save_task = None
+        self._write_lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Impossibile leggere i contatori della quota YouTube {self.path}: {str(e)}")
+            return
+        # I contatori di un giorno precedente non contano più
+        if data.get('day') == self.day:
+            self.used = data.get('used', 0)
+            self.by_endpoint = data.get('by_endpoint', {})
+
+    def _write(self, data: dict):
+        # Un errore di scrittura non deve bloccare le chiamate all'API
+        with self._write_lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Impossibile salvare i contatori della quota YouTube: {str(e)}")
+
+    def _snapshot(self) -> dict:
+        # Copia dei contatori presa nel thread dell'event loop, prima di passarla al thread di scrittura
+        self._dirty = False
+        return {'day': self.day, 'used': self.used, 'by_endpoint': dict(self.by_endpoint)}
+
+    def _save(self):
+        """Pianifica il salvataggio dei contatori: le chiamate ravvicinate producono una sola scrittura, fuori dall'event loop."""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Fuori da un event loop (script, test) si salva subito
+            self.flush()
+            return
+        if self._save_task is not None and not self._save_task.done() and self._save_task.get_loop() is loop:
+            return
+        self._save_task = loop.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        if self._dirty:
+            await asyncio.to_thread(self._write, self._snapshot())
+
+    def flush(self):
+        """Salva subito i contatori non ancora scritti su disco (es. alla chiusura del bot)."""
+        if self._dirty:
+            self._write(self._snapshot())
+
+    def _roll_over(self):
+        # Azzeramento alla mezzanotte del Pacifico
+        today = self._today()
+        if today != self.day:
+            logger.info(f"Quota YouTube: nuovo giorno {today}, contatori azzerati (ieri {self.used} unità)")
+            self.day = today
+            self.used = 0
+            self.by_endpoint = {}
+            self._save()
+
+    def allows(self, endpoint: str) -> bool:
+        """
+        Indica se la politica di budget consente una chiamata all'endpoint.
+        Le ricerche sono consentite solo sotto la soglia search_threshold; le altre chiamate fino al limite giornaliero.
+
+        Args:
+            endpoint: Nome dell'endpoint (es. "youtube:search")
+
+        Returns:
+            bool: True se la chiamata rientra nel budget
+        """
+        self._roll_over()
+        cost = quota_cost(endpoint)
+        limit = self.daily_limit * self.search_threshold if cost > DEFAULT_COST else self.daily_limit
+        return self.used + cost <= limit
+
+    def record(self, endpoint: str):
+        """
+        Registra il costo di una chiamata all'API.
+
+        Raises:
+            QuotaExceededError: Se la chiamata non rientra nel budget
+        """
+        if not self.allows(endpoint):
+            raise QuotaExceededError(endpoint, self.used, self.daily_limit)
+        cost = quota_cost(endpoint)
+        self.used += cost
+        self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + cost
+        self._save()
+
+    def exhaust(self):
+        """Segna la quota come esaurita (es. dopo un errore quotaExceeded restituito da Google)."""
+        self._roll_over()
+        if self.used < self.daily_limit:
+            logger.warning("Quota YouTube esaurita secondo Google: blocco le chiamate fino al reset")
+            self.used = self.daily_limit
+            self._save()
+
+    def seconds_until_reset(self) -> float:
+        """Secondi mancanti alla prossima mezzanotte del Pacifico."""
+        now = datetime.now(QUOTA_TIMEZONE)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=QUOTA_TIMEZONE)
+        return (midnight - now).total_seconds()
+
+    def stats(self) -> dict:
+        """Restituisce l'utilizzo della quota del giorno corrente."""
+        self._roll_over()
+        return {
+            'day': self.day,
+            'used': self.used,
+            'daily_limit': self.daily_limit,
+            'remaining': max(0, self.daily_limit - self.used),
+            'by_endpoint': dict(self.by_endpoint),
+            'reset_in': self.seconds_until_reset()
+        }